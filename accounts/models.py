@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser
 from django.db.models import TextChoices, CharField
+from django.utils.functional import cached_property
 
 
 class User(AbstractUser):
@@ -18,3 +19,11 @@ class User(AbstractUser):
 
     def __str__(self):
         return f"{self.username} ({self.role})"
+
+    @cached_property
+    def business(self):
+        """The business the user belongs to (their first membership), if any."""
+        membership = (
+            self.business_roles.select_related("business").order_by("id").first()
+        )
+        return membership.business if membership else None
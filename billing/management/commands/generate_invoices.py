@@ -0,0 +1,67 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from billing.managers.invoice_manager import InvoiceManager
+from common.dates import business_timezone, date_range_filter
+from sales.models import Sale
+
+
+class Command(BaseCommand):
+    help = (
+        "End-of-day invoicing: creates invoices for the day's sales that do "
+        "not have one yet. Safe to re-run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--business", type=int, help="Only invoice this business")
+        parser.add_argument(
+            "--date",
+            help="Local sale date, YYYY-MM-DD (default: today in each "
+            "business's timezone)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Sales invoiced per transaction (default: 500)",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            requested = date.fromisoformat(options["date"]) if options["date"] else None
+        except ValueError:
+            raise CommandError(f"❌ Invalid date: {options['date']}")
+
+        if options["business"]:
+            business_ids = [options["business"]]
+        else:
+            business_ids = (
+                Sale.objects.filter(business__isnull=False)
+                .values_list("business_id", flat=True)
+                .distinct()
+                .order_by()
+            )
+
+        invoiced = 0
+        for business_id in business_ids:
+            tz = business_timezone(business_id)
+            # A business's day ends at its own midnight, not the server's
+            day = requested or timezone.localdate(timezone=tz)
+            sales = Sale.objects.for_business(business_id).filter(
+                invoices__isnull=True,
+                **date_range_filter("sale_date", day, day, tz),
+            )
+            ids = list(sales.order_by("id").values_list("id", flat=True))
+            for offset in range(0, len(ids), options["batch_size"]):
+                batch = Sale.objects.filter(
+                    id__in=ids[offset : offset + options["batch_size"]]
+                )
+                invoiced += len(InvoiceManager.invoice_sales(batch))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ Created {invoiced} invoices for {requested or 'today'}."
+            )
+        )
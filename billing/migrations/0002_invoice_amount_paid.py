@@ -0,0 +1,36 @@
+# Generated by Django 5.1.1 on 2026-10-18 02:42
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum
+
+
+def backfill_amount_paid(apps, schema_editor):
+    Invoice = apps.get_model("billing", "Invoice")
+    BillingPayment = apps.get_model("billing", "BillingPayment")
+
+    paid = (
+        BillingPayment.objects.filter(invoice=OuterRef("pk"), is_confirmed=True)
+        .order_by()
+        .values("invoice")
+        .annotate(total=Sum("amount"))
+        .values("total")
+    )
+    Invoice.objects.filter(
+        pk__in=BillingPayment.objects.filter(is_confirmed=True).values("invoice")
+    ).update(amount_paid=Subquery(paid))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("billing", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="invoice",
+            name="amount_paid",
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.RunPython(backfill_amount_paid, migrations.RunPython.noop),
+    ]
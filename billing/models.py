@@ -1,3 +1,5 @@
+from decimal import Decimal
+
 from django.db.models import (
     ForeignKey,
     CharField,
@@ -7,15 +9,18 @@ from django.db.models import (
     BooleanField,
     CASCADE,
     PositiveIntegerField,
+    Sum,
 )
-from django.utils import timezone
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
 
 from django.conf import settings
-from common.models import GenericModel
-from sales.models import Sale, SaleItem, Purchase
+from common.models import GenericModel, LoadedValuesMixin, TenantModel
+from sales.models import Sale, Purchase
 
 
-class Invoice(GenericModel):
+class Invoice(TenantModel):
     business = ForeignKey(
         "business.Business", on_delete=CASCADE, related_name="invoices"
     )
@@ -30,6 +35,7 @@ class Invoice(GenericModel):
     due_date = DateField(null=True, blank=True)
     total_amount = DecimalField(max_digits=12, decimal_places=2, default=0)
     tax_amount = DecimalField(max_digits=12, decimal_places=2, default=0)
+    amount_paid = DecimalField(max_digits=12, decimal_places=2, default=0)
     status = CharField(
         max_length=20,
         choices=[
@@ -46,10 +52,15 @@ class Invoice(GenericModel):
         return f"Invoice #{self.invoice_number}"
 
     def calculate_total(self):
-        total = sum(item.subtotal for item in self.items.all())
-        self.total_amount = total
-        self.tax_amount = sum(item.tax_amount for item in self.items.all())
-        self.save()
+        totals = self.items.aggregate(
+            total_amount=Coalesce(Sum("subtotal"), Decimal(0)),
+            tax_amount=Coalesce(Sum("tax_amount"), Decimal(0)),
+        )
+        # Only the total columns: a full save could overwrite a payment
+        # recorded since this instance was loaded
+        Invoice.objects.filter(pk=self.pk).update(**totals)
+        self.total_amount = totals["total_amount"]
+        self.tax_amount = totals["tax_amount"]
 
 
 class InvoiceItem(GenericModel):
@@ -72,7 +83,7 @@ class InvoiceItem(GenericModel):
         return f"{self.product.name if self.product else 'N/A'} x {self.quantity}"
 
 
-class BillingPayment(GenericModel):
+class BillingPayment(LoadedValuesMixin, GenericModel):
     invoice = ForeignKey(Invoice, on_delete=CASCADE, related_name="payments")
     amount = DecimalField(max_digits=12, decimal_places=2)
     payment_date = DateTimeField(auto_now_add=True)
@@ -85,19 +96,42 @@ class BillingPayment(GenericModel):
     def __str__(self):
         return f"Payment {self.amount} for Invoice {self.invoice.invoice_number}"
 
+    @property
+    def confirmed_amount(self):
+        return self.amount if self.is_confirmed else Decimal(0)
+
     def save(self, *args, **kwargs):
+        from billing.managers.invoice_manager import InvoiceManager
+
+        adding = self._state.adding
+        loaded = getattr(self, "_loaded_values", None)
         super().save(*args, **kwargs)
-        # Update invoice status
-        total_paid = sum(
-            p.amount for p in self.invoice.payments.filter(is_confirmed=True)
-        )
-        if total_paid >= self.invoice.total_amount:
-            self.invoice.status = "paid"
-        elif total_paid > 0:
-            self.invoice.status = "pending"
+
+        # Update the invoice's amount paid and status
+        if adding:
+            InvoiceManager.record_payment(self.invoice_id, self.confirmed_amount)
+        elif not loaded:
+            InvoiceManager.sync_payments([self.invoice_id])
         else:
-            self.invoice.status = "draft"
-        self.invoice.save()
+            old_amount = loaded["amount"] if loaded["is_confirmed"] else Decimal(0)
+            if loaded["invoice_id"] != self.invoice_id:
+                InvoiceManager.record_payment(loaded["invoice_id"], -old_amount)
+                old_amount = Decimal(0)
+            InvoiceManager.record_payment(
+                self.invoice_id, self.confirmed_amount - old_amount
+            )
+        self.invoice.refresh_from_db(fields=["amount_paid", "status"])
+
+
+@receiver(post_delete, sender=BillingPayment)
+def take_back_deleted_payment(sender, instance, **kwargs):
+    """
+    Take a deleted payment off its invoice. A receiver rather than a
+    ``delete`` override, so queryset and cascading deletes are covered too.
+    """
+    from billing.managers.invoice_manager import InvoiceManager
+
+    InvoiceManager.record_payment(instance.invoice_id, -instance.confirmed_amount)
 
 
 def create_invoice_from_sale(sale: "Sale") -> Invoice:
@@ -105,36 +139,9 @@ def create_invoice_from_sale(sale: "Sale") -> Invoice:
     Creates an Invoice from a Sale and all its SaleItems.
     Returns the created Invoice instance.
     """
-    if not sale or not sale.id:
-        raise ValueError("Sale must be saved before creating an invoice.")
-
-    # Generate a unique invoice number (example: INV-YYYYMMDD-ID)
-    invoice_number = f"INV-{timezone.now().strftime('%Y%m%d')}-{sale.id}"
-
-    # Create the Invoice linked to the Sale
-    invoice = Invoice.objects.create(
-        business=sale.customer.business if sale.customer else None,
-        sale=sale,
-        invoice_number=invoice_number,
-        issue_date=timezone.now().date(),
-        due_date=None,  # Optional: could be sale_date + 30 days
-        status="pending",
-    )
-
-    # Create InvoiceItems from SaleItems
-    for item in sale.items.all():
-        InvoiceItem.objects.create(
-            invoice=invoice,
-            product=item.product,
-            quantity=item.quantity,
-            price=item.price,
-            tax_rate=getattr(
-                item.product, "tax_rate", 0
-            ),  # Use product's tax rate if defined
-        )
+    from billing.managers.invoice_manager import InvoiceManager
 
-    # Invoice totals are auto-calculated in InvoiceItem.save()
-    return invoice
+    return InvoiceManager.invoice_sale(sale)
 
 
 def create_invoice_from_purchase(purchase: "Purchase") -> Invoice:
@@ -142,31 +149,6 @@ def create_invoice_from_purchase(purchase: "Purchase") -> Invoice:
     Creates an Invoice for a Purchase (supplier invoice) from all its PurchaseItems.
     Returns the created Invoice instance.
     """
-    if not purchase or not purchase.id:
-        raise ValueError("Purchase must be saved before creating an invoice.")
-
-    # Generate a unique invoice number (example: PINV-YYYYMMDD-ID)
-    invoice_number = f"PINV-{timezone.now().strftime('%Y%m%d')}-{purchase.id}"
-
-    # Create the Invoice linked to the Purchase
-    invoice = Invoice.objects.create(
-        business=purchase.business if hasattr(purchase, "business") else None,
-        purchase=purchase,
-        invoice_number=invoice_number,
-        issue_date=timezone.now().date(),
-        due_date=None,  # Optional: could set payment terms
-        status="pending",
-    )
-
-    # Create InvoiceItems from PurchaseItems
-    for item in purchase.items.all():
-        InvoiceItem.objects.create(
-            invoice=invoice,
-            product=item.product,
-            quantity=item.quantity,
-            price=item.cost_price,
-            tax_rate=getattr(item.product, "tax_rate", 0),  # Optional: GST/VAT
-        )
+    from billing.managers.invoice_manager import InvoiceManager
 
-    # Invoice totals are auto-calculated in InvoiceItem.save()
-    return invoice
+    return InvoiceManager.invoice_purchase(purchase)
@@ -1,3 +1,199 @@
-from django.test import TestCase
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from business.models import Business, BusinessSettings
+from products.models import Product
+from sales.models import Sale, SaleItem
+
+from .managers.invoice_manager import InvoiceManager
+from .models import BillingPayment, Invoice, InvoiceItem, create_invoice_from_sale
+
+
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class InvoiceBuilderTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = Business.objects.create(name="Invoice Co")
+        cls.products = [
+            Product.objects.create(
+                business=cls.business,
+                name=f"Item {i}",
+                sku=f"I-{i}",
+                price=10,
+                stock=0,
+                tax_rate=Decimal("18.00"),
+            )
+            for i in range(6)
+        ]
+
+    def make_sale(self, lines):
+        # bulk_create keeps the sale's own signals out of the picture
+        sale = Sale.objects.bulk_create(
+            [Sale(business=self.business, total_amount=0, payment_method="cash")]
+        )[0]
+        SaleItem.objects.bulk_create(
+            [
+                SaleItem(
+                    sale=sale,
+                    business=self.business,
+                    product=self.products[i % len(self.products)],
+                    quantity=2,
+                    price=Decimal("10.05"),
+                    subtotal=Decimal("20.10"),
+                )
+                for i in range(lines)
+            ]
+        )
+        return sale
+
+    def test_totals_match_per_item_saves(self):
+        sale = self.make_sale(3)
+        invoice = create_invoice_from_sale(sale)
+
+        self.assertEqual(invoice.items.count(), 3)
+        invoice.refresh_from_db()
+        self.assertEqual(invoice.total_amount, Decimal("60.30"))
+        # 18% of 20.10 is 3.618, stored per line as 3.62
+        self.assertEqual(invoice.tax_amount, Decimal("10.86"))
+
+        # Saving a line the old way stores the same amounts
+        item = invoice.items.first()
+        item.save()
+        invoice.refresh_from_db()
+        self.assertEqual(invoice.total_amount, Decimal("60.30"))
+        self.assertEqual(invoice.tax_amount, Decimal("10.86"))
+
+    def test_query_count_does_not_grow_with_lines(self):
+        small, large = self.make_sale(2), self.make_sale(40)
+        with self.assertNumQueries(5):
+            create_invoice_from_sale(small)
+        with self.assertNumQueries(5):
+            create_invoice_from_sale(large)
+
+    def test_batch_invoices_each_sale_once(self):
+        sales = [self.make_sale(lines) for lines in (1, 2, 3)]
+        create_invoice_from_sale(sales[0])
+
+        invoices = InvoiceManager.invoice_sales(sales)
+        self.assertEqual(
+            [invoice.sale_id for invoice in invoices], [s.id for s in sales[1:]]
+        )
+        self.assertEqual(InvoiceItem.objects.count(), 6)
+        self.assertEqual(InvoiceManager.invoice_sales(sales), [])
+
+    def test_generate_invoices_command(self):
+        self.make_sale(2)
+        self.make_sale(1)
+        call_command("generate_invoices", business=self.business.id, stdout=StringIO())
+        call_command("generate_invoices", business=self.business.id, stdout=StringIO())
+        self.assertEqual(Invoice.objects.count(), 2)
+
+    def test_generate_invoices_defaults_to_each_business_today(self):
+        ahead = Business.objects.create(name="Kiritimati Co")
+        BusinessSettings.objects.create(business=ahead, timezone="Pacific/Kiritimati")
+        now = datetime(2026, 1, 1, 12, tzinfo=dt_timezone.utc)
+        # 11:00 UTC is already January 2nd in UTC+14
+        sale = Sale.objects.bulk_create(
+            [Sale(business=ahead, total_amount=0, payment_method="cash")]
+        )[0]
+        Sale.objects.filter(pk=sale.pk).update(sale_date=now - timedelta(hours=1))
+
+        with mock.patch("django.utils.timezone.now", return_value=now):
+            call_command("generate_invoices", stdout=StringIO())
+        self.assertTrue(Invoice.objects.filter(sale=sale).exists())
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class InvoicePaymentTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = Business.objects.create(name="Payments Co")
+
+    def setUp(self):
+        self.invoice = Invoice.objects.create(
+            business=self.business, invoice_number="INV-P-1", total_amount=100
+        )
+
+    def pay(self, amount, **kwargs):
+        return BillingPayment.objects.create(
+            invoice=self.invoice, amount=amount, payment_method="cash", **kwargs
+        )
+
+    def assertPaid(self, amount_paid, status):
+        self.invoice.refresh_from_db()
+        self.assertEqual(self.invoice.amount_paid, Decimal(amount_paid))
+        self.assertEqual(self.invoice.status, status)
+
+    def test_status_follows_confirmed_payments(self):
+        self.pay(30)
+        self.assertPaid(30, "pending")
+        self.pay(50, is_confirmed=False)
+        self.assertPaid(30, "pending")
+        payment = self.pay(70)
+        self.assertPaid(100, "paid")
+
+        payment = BillingPayment.objects.get(pk=payment.pk)
+        payment.amount = 20
+        payment.save()
+        self.assertPaid(50, "pending")
+
+        unconfirmed = BillingPayment.objects.get(is_confirmed=False)
+        unconfirmed.is_confirmed = True
+        unconfirmed.save()
+        self.assertPaid(100, "paid")
+
+        unconfirmed.delete()
+        self.assertPaid(50, "pending")
+
+    def test_queryset_deletes_take_payments_back(self):
+        self.pay(30)
+        self.pay(70)
+        self.pay(10, is_confirmed=False)
+        self.assertPaid(100, "paid")
+
+        BillingPayment.objects.filter(amount__gte=30).delete()
+        self.assertPaid(0, "draft")
+
+        unconfirmed = BillingPayment.objects.get()
+        self.assertEqual(unconfirmed.confirmed_amount, Decimal(0))
+        self.assertIsInstance(unconfirmed.confirmed_amount, Decimal)
+
+    def test_payment_cost_does_not_grow_with_history(self):
+        BillingPayment.objects.bulk_create(
+            [
+                BillingPayment(invoice=self.invoice, amount=1, payment_method="cash")
+                for _ in range(50)
+            ]
+        )
+        InvoiceManager.sync_payments([self.invoice.id])
+        self.assertPaid(50, "pending")
+
+        with self.assertNumQueries(3):
+            self.pay(50)
+        self.assertPaid(100, "paid")
+
+    def test_calculate_total_aggregates_items(self):
+        InvoiceItem.objects.bulk_create(
+            [
+                InvoiceItem(
+                    invoice=self.invoice,
+                    price=10,
+                    subtotal=10,
+                    tax_amount=Decimal("1.5"),
+                )
+                for _ in range(3)
+            ]
+        )
+        with self.assertNumQueries(2):
+            self.invoice.calculate_total()
+        self.invoice.refresh_from_db()
+        self.assertEqual(self.invoice.total_amount, Decimal("30"))
+        self.assertEqual(self.invoice.tax_amount, Decimal("4.5"))
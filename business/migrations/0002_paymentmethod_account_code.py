@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-18 02:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("business", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="paymentmethod",
+            name="account_code",
+            field=models.CharField(blank=True, default="", max_length=20),
+        ),
+    ]
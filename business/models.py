@@ -102,6 +102,8 @@ class PaymentMethod(GenericModel):
     business = ForeignKey(Business, on_delete=CASCADE, related_name="payment_methods")
     method_name = CharField(max_length=50)
     active = BooleanField(default=True)
+    # Account the method's money is posted to, e.g. "1002"; blank uses the default
+    account_code = CharField(max_length=20, blank=True, default="")
 
     def __str__(self):
         return f"{self.method_name} ({'Active' if self.active else 'Inactive'})"
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from business.models import BusinessSettings
+from common.dates import forget_business_timezone
+
+
+@receiver(post_save, sender=BusinessSettings)
+@receiver(post_delete, sender=BusinessSettings)
+def forget_cached_timezone(sender, instance, **kwargs):
+    forget_business_timezone(instance.business_id)
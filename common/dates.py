@@ -0,0 +1,78 @@
+"""
+Business-local date handling.
+
+Reports take calendar dates, but ``sale_date`` & co. are UTC timestamps.
+Filtering with ``__date`` casts every row and cannot use an index, so dates
+are turned into half-open ``[start 00:00, day after end 00:00)`` ranges in
+the business's timezone and compared against the raw column instead.
+"""
+
+from datetime import date, datetime, time, timedelta, tzinfo
+from typing import Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from business.models import BusinessSettings
+
+
+TIMEZONE_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def _timezone_cache_key(business_id: int) -> str:
+    return f"business:timezone:{business_id}"
+
+
+def business_timezone(business_id: Optional[int]) -> tzinfo:
+    """The timezone configured in BusinessSettings, else settings.TIME_ZONE."""
+    if not business_id:
+        return timezone.get_default_timezone()
+
+    key = _timezone_cache_key(business_id)
+    name = cache.get(key)
+    if name is None:
+        name = (
+            BusinessSettings.objects.filter(business_id=business_id)
+            .values_list("timezone", flat=True)
+            .first()
+        ) or ""
+        cache.set(key, name, TIMEZONE_CACHE_TIMEOUT)
+
+    try:
+        return ZoneInfo(name) if name else timezone.get_default_timezone()
+    except (ZoneInfoNotFoundError, ValueError):
+        return timezone.get_default_timezone()
+
+
+def forget_business_timezone(business_id: int):
+    cache.delete(_timezone_cache_key(business_id))
+
+
+def start_of_day(day: date, tz: tzinfo) -> datetime:
+    return datetime.combine(day, time.min, tzinfo=tz)
+
+
+def day_range(start: date, end: date, tz: tzinfo) -> Tuple[datetime, datetime]:
+    """Aware datetimes bounding the local days ``start``..``end`` (inclusive)."""
+    return start_of_day(start, tz), start_of_day(end + timedelta(days=1), tz)
+
+
+def date_range_filter(
+    field: str,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    tz: Optional[tzinfo] = None,
+) -> dict:
+    """
+    Lookups selecting rows whose ``field`` falls on local days
+    ``start``..``end``, e.g. ``Sale.objects.filter(**date_range_filter(
+    "sale_date", start, end, tz))``. Either bound may be omitted.
+    """
+    tz = tz or timezone.get_default_timezone()
+    lookups = {}
+    if start:
+        lookups[f"{field}__gte"] = start_of_day(start, tz)
+    if end:
+        lookups[f"{field}__lt"] = start_of_day(end + timedelta(days=1), tz)
+    return lookups
@@ -48,4 +48,6 @@ ERROR_DETAILS = {
     "module_detail_not_found": "The module detail is not found.",
     "role_detail_not_found": "The role detail is not found.",
     "req_param_missing_email": "Invalid email or password. Please try again.",
+    "insufficient_stock": "Not enough stock to complete this operation.",
+    "business_not_found": "No business is linked to this user.",
 }
@@ -1,4 +1,11 @@
-from django.db.models import Model, ForeignKey, DateTimeField, SET_NULL
+from django.db.models import (
+    Model,
+    ForeignKey,
+    DateTimeField,
+    Manager,
+    QuerySet,
+    SET_NULL,
+)
 from django.conf import settings
 
 
@@ -28,3 +35,54 @@ class GenericModel(Model):
 
     class Meta:
         abstract = True
+
+
+class TenantQuerySet(QuerySet):
+    def for_business(self, business):
+        """
+        Rows owned by ``business`` (instance or id), read from the model's own
+        indexed ``business_id`` column. No business means no rows.
+        """
+        if business is None:
+            return self.none()
+        return self.filter(business=business)
+
+
+class TenantManager(Manager.from_queryset(TenantQuerySet)):
+    pass
+
+
+class TenantModel(GenericModel):
+    """
+    GenericModel for rows owned by a business. Subclasses declare their own
+    ``business`` foreign key and get ``Model.objects.for_business()``.
+    """
+
+    objects = TenantManager()
+
+    class Meta:
+        abstract = True
+
+
+class LoadedValuesMixin:
+    """
+    Remembers the column values an instance was loaded (or last saved) with,
+    so save/delete handlers can compute deltas without re-fetching the row.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def loaded_value(self, attname, default=None):
+        return getattr(self, "_loaded_values", {}).get(attname, default)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # post_save handlers have run by now and seen the previous values
+        self._loaded_values = {
+            field.attname: getattr(self, field.attname)
+            for field in self._meta.concrete_fields
+        }
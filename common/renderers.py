@@ -0,0 +1,151 @@
+"""
+Renderers for report exports (CSV, Parquet, Arrow IPC stream).
+
+Exports are too large to build into ``Response.data``, so the view streams
+them itself: it declares these renderers so DRF's ``?format=`` / ``Accept``
+negotiation picks one, then passes its rows to ``renderer.stream``. Columns
+are declared once per export as ``(name, type)`` pairs, with ``type`` one of
+``COLUMN_TYPES``; CSV only uses the names, Parquet and Arrow write typed
+columns (exact decimals, UTC timestamps) one record batch at a time.
+"""
+
+import json
+from itertools import islice
+from typing import Iterable, Iterator, List, Sequence, Tuple
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from rest_framework.renderers import BaseRenderer
+
+from common.utils import stream_csv
+
+
+Columns = List[Tuple[str, str]]
+
+COLUMN_TYPES = {
+    "int": pa.int64(),
+    "string": pa.string(),
+    "bool": pa.bool_(),
+    "decimal": pa.decimal128(12, 2),  # DecimalField(max_digits=12, decimal_places=2)
+    "timestamp": pa.timestamp("us", tz="UTC"),
+}
+
+
+class StreamingExportRenderer(BaseRenderer):
+    charset = None
+    extension = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # Only error payloads (bad parameters, auth) go through render()
+        response = (renderer_context or {}).get("response")
+        if response is not None:
+            response["Content-Type"] = "application/json"
+        return json.dumps(data).encode("utf-8")
+
+    def stream(self, columns: Columns, rows: Iterable[Sequence]) -> Iterator[bytes]:
+        raise NotImplementedError
+
+
+class CSVExportRenderer(StreamingExportRenderer):
+    media_type = "text/csv"
+    format = "csv"
+    extension = "csv"
+    timestamp_format = "%Y-%m-%d %H:%M"
+
+    def stream(self, columns, rows):
+        timestamps = [
+            index for index, (_, kind) in enumerate(columns) if kind == "timestamp"
+        ]
+        if timestamps:
+            rows = (self._format_timestamps(row, timestamps) for row in rows)
+        return stream_csv([name for name, _ in columns], rows)
+
+    def _format_timestamps(self, row, timestamps):
+        row = list(row)
+        for index in timestamps:
+            if row[index] is not None:
+                row[index] = row[index].strftime(self.timestamp_format)
+        return row
+
+
+class _Sink:
+    """
+    Write-only file object handed to pyarrow; bytes are collected until the
+    generator drains them, so nothing is buffered beyond one batch.
+    """
+
+    closed = False
+
+    def __init__(self):
+        self.buffer = []
+        self.position = 0
+
+    def write(self, data):
+        self.buffer.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self.buffer)
+        self.buffer = []
+        return data
+
+
+class ColumnarExportRenderer(StreamingExportRenderer):
+    batch_size = 50_000  # rows per record batch / parquet row group
+
+    def open_writer(self, sink, schema):
+        raise NotImplementedError
+
+    def stream(self, columns, rows):
+        schema = pa.schema(
+            [pa.field(name, COLUMN_TYPES[kind]) for name, kind in columns]
+        )
+        sink = _Sink()
+        writer = self.open_writer(sink, schema)
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                break
+            arrays = [
+                pa.array(values, type=field.type)
+                for values, field in zip(zip(*batch), schema)
+            ]
+            writer.write_batch(pa.record_batch(arrays, schema=schema))
+            yield sink.drain()
+        writer.close()
+        yield sink.drain()
+
+
+class ParquetExportRenderer(ColumnarExportRenderer):
+    media_type = "application/vnd.apache.parquet"
+    format = "parquet"
+    extension = "parquet"
+
+    def open_writer(self, sink, schema):
+        return pq.ParquetWriter(sink, schema, compression="zstd")
+
+
+class ArrowStreamExportRenderer(ColumnarExportRenderer):
+    media_type = "application/vnd.apache.arrow.stream"
+    format = "arrow"
+    extension = "arrows"
+
+    def open_writer(self, sink, schema):
+        return pa.ipc.new_stream(
+            sink, schema, options=pa.ipc.IpcWriteOptions(compression="zstd")
+        )
+
+
+EXPORT_RENDERERS = [
+    CSVExportRenderer,
+    ParquetExportRenderer,
+    ArrowStreamExportRenderer,
+]
@@ -1,3 +1,75 @@
-from django.test import TestCase
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from zoneinfo import ZoneInfo
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from business.models import Business, BusinessSettings
+
+from .dates import business_timezone, date_range_filter
+
+
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+class DateRangeFilterTests(SimpleTestCase):
+    def test_range_is_half_open_in_the_given_timezone(self):
+        lookups = date_range_filter(
+            "sale_date", date(2025, 3, 1), date(2025, 3, 31), ZoneInfo("Asia/Kolkata")
+        )
+        self.assertEqual(
+            lookups["sale_date__gte"].astimezone(dt_timezone.utc),
+            datetime(2025, 2, 28, 18, 30, tzinfo=dt_timezone.utc),
+        )
+        self.assertEqual(
+            lookups["sale_date__lt"].astimezone(dt_timezone.utc),
+            datetime(2025, 3, 31, 18, 30, tzinfo=dt_timezone.utc),
+        )
+
+    def test_range_follows_daylight_saving_changes(self):
+        # Clocks go forward on 2025-03-30 in Berlin: UTC+1 before, UTC+2 after
+        lookups = date_range_filter(
+            "sale_date", date(2025, 3, 30), date(2025, 3, 30), ZoneInfo("Europe/Berlin")
+        )
+        lower, upper = (
+            lookups[lookup].astimezone(dt_timezone.utc)
+            for lookup in ("sale_date__gte", "sale_date__lt")
+        )
+        self.assertEqual(upper - lower, timedelta(hours=23))
+
+    def test_open_bounds_are_omitted(self):
+        self.assertEqual(
+            list(date_range_filter("d", start=date(2025, 1, 1))), ["d__gte"]
+        )
+        self.assertEqual(list(date_range_filter("d", end=date(2025, 1, 1))), ["d__lt"])
+        self.assertEqual(date_range_filter("d"), {})
+
+
+@override_settings(CACHES=LOCMEM_CACHE, TIME_ZONE="UTC")
+class BusinessTimezoneTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = Business.objects.create(name="Zoned Co")
+
+    def test_defaults_to_the_project_timezone(self):
+        self.assertEqual(str(business_timezone(self.business.id)), "UTC")
+        self.assertEqual(str(business_timezone(None)), "UTC")
+
+    def test_uses_and_refreshes_the_configured_timezone(self):
+        business_timezone(self.business.id)  # cache the default
+        settings = BusinessSettings.objects.create(
+            business=self.business, timezone="Asia/Kolkata"
+        )
+        self.assertEqual(str(business_timezone(self.business.id)), "Asia/Kolkata")
+
+        settings.timezone = "America/New_York"
+        settings.save()
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                str(business_timezone(self.business.id)), "America/New_York"
+            )
+        with self.assertNumQueries(0):
+            business_timezone(self.business.id)
+
+    def test_unknown_timezone_falls_back_to_the_default(self):
+        BusinessSettings.objects.create(business=self.business, timezone="Mars/Base")
+        self.assertEqual(str(business_timezone(self.business.id)), "UTC")
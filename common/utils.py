@@ -1,5 +1,7 @@
+import csv
 import random
 import string
+from typing import Iterable, Iterator, Sequence
 
 from accounts.models import User
 
@@ -27,3 +29,21 @@ def generate_username(first_name, last_name):
         username = f"{first}{last}{''.join(random.choices(string.digits, k=3))}"
         if not User.objects.filter(username=username).exists():
             return username
+
+
+class Echo:
+    """
+    Pseudo-buffer for ``csv.writer``: ``write`` returns the formatted line
+    instead of storing it, so rows can be yielded straight into a
+    ``StreamingHttpResponse``.
+    """
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(header: Sequence, rows: Iterable[Sequence]) -> Iterator[str]:
+    writer = csv.writer(Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
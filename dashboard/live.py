@@ -0,0 +1,225 @@
+"""
+Pub/sub for the live dashboard stream.
+
+Write paths publish ready-made server-sent event frames on a per-business
+channel; every open stream holds a ``Subscription`` to its business's
+channel (see LiveUpdateManager). ``RedisBroker`` publishes through Redis
+so every web process sees every write, and keeps one Redis subscriber per
+process that fans messages out to the local streams. ``InMemoryBroker`` is
+that local fan-out alone, for tests, benchmarks and single-process
+development (``LIVE_UPDATES_BROKER = "memory"``).
+"""
+
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+from typing import Iterable, List, Optional, Set
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Sent instead of the backlog to a stream that fell too far behind; the
+# client reloads the dashboard instead of replaying deltas
+RESYNC = "event: resync\ndata: {}\n\n"
+
+
+def channel(business_id: int) -> str:
+    return f"live:business:{business_id}"
+
+
+class Subscription:
+    """One stream's bounded queue of frames, bound to its event loop."""
+
+    def __init__(self, broker, channel: str, size: int):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=size)
+
+    def put(self, message: str):
+        """Queue ``message``. Only called on the subscription's loop."""
+        if self.queue.full():
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            message = RESYNC
+        self.queue.put_nowait(message)
+
+    async def get(self, timeout: Optional[float] = None) -> str:
+        """
+        Everything queued so far as one chunk, waiting up to ``timeout``
+        seconds (``asyncio.TimeoutError``) for the first frame.
+        """
+        if self.queue.empty():
+            frames = [await asyncio.wait_for(self.queue.get(), timeout)]
+        else:
+            frames = []
+        while not self.queue.empty():
+            frames.append(self.queue.get_nowait())
+        return "".join(frames)
+
+    async def close(self):
+        await self.broker.unsubscribe(self)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+def _deliver(subscriptions: List[Subscription], message: str):
+    for subscription in subscriptions:
+        subscription.put(message)
+
+
+class InMemoryBroker:
+    """Process-local pub/sub with the same API as ``RedisBroker``."""
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self.subscriptions = defaultdict(set)
+        self.lock = threading.Lock()
+
+    @property
+    def connections(self) -> int:
+        with self.lock:
+            return sum(len(subs) for subs in self.subscriptions.values())
+
+    def publish(self, channel: str, message: str) -> int:
+        """Deliver ``message`` to the channel's subscribers. Thread-safe."""
+        return self.fan_out(channel, message)
+
+    def fan_out(self, channel: str, message: str) -> int:
+        by_loop = defaultdict(list)
+        with self.lock:
+            for subscription in self.subscriptions.get(channel, ()):
+                by_loop[subscription.loop].append(subscription)
+        # One wake-up per event loop rather than per stream
+        for loop, subscriptions in by_loop.items():
+            try:
+                loop.call_soon_threadsafe(_deliver, subscriptions, message)
+            except RuntimeError:
+                pass  # the loop is closed; unsubscribed shortly
+        return sum(len(subscriptions) for subscriptions in by_loop.values())
+
+    def listening(self, channels: Iterable[str]) -> Set[str]:
+        """The ``channels`` that have at least one subscriber."""
+        with self.lock:
+            return {name for name in channels if self.subscriptions.get(name)}
+
+    async def subscribe(self, channel: str) -> Subscription:
+        subscription = Subscription(self, channel, self.queue_size)
+        with self.lock:
+            self.subscriptions[channel].add(subscription)
+        return subscription
+
+    async def unsubscribe(self, subscription: Subscription) -> bool:
+        """Drop ``subscription``. True if it was the channel's last one."""
+        with self.lock:
+            subscriptions = self.subscriptions.get(subscription.channel, set())
+            subscriptions.discard(subscription)
+            if subscriptions:
+                return False
+            self.subscriptions.pop(subscription.channel, None)
+            return True
+
+
+class RedisBroker(InMemoryBroker):
+    def __init__(self, url: str, queue_size: int = 100):
+        super().__init__(queue_size)
+        self.url = url
+        self.pubsub = None
+        self.reader = None
+
+    @property
+    def client(self):
+        from django_redis import get_redis_connection
+
+        return get_redis_connection("default")
+
+    def publish(self, channel: str, message: str) -> int:
+        """Publish to every process. Returns the processes listening."""
+        return self.client.publish(channel, message)
+
+    def listening(self, channels: Iterable[str]) -> Set[str]:
+        channels = list(channels)
+        if not channels:
+            return set()
+        return {
+            name.decode() if isinstance(name, bytes) else name
+            for name, count in self.client.pubsub_numsub(*channels)
+            if count
+        }
+
+    async def subscribe(self, channel: str) -> Subscription:
+        subscription = await super().subscribe(channel)
+        with self.lock:
+            first = len(self.subscriptions[channel]) == 1
+        if first:
+            await self._pubsub().subscribe(channel)
+        return subscription
+
+    async def unsubscribe(self, subscription: Subscription) -> bool:
+        last = await super().unsubscribe(subscription)
+        if last and self.pubsub is not None:
+            await self.pubsub.unsubscribe(subscription.channel)
+        return last
+
+    def _pubsub(self):
+        # Redis only sends a process the channels its own streams watch
+        if self.reader is None or self.reader.done():
+            import redis.asyncio as redis
+
+            self.pubsub = redis.from_url(self.url).pubsub(
+                ignore_subscribe_messages=True
+            )
+            self.reader = asyncio.get_running_loop().create_task(self._read())
+        return self.pubsub
+
+    async def _read(self):
+        from redis.exceptions import ConnectionError
+
+        lost = False
+        while True:
+            try:
+                if lost:
+                    await self._resubscribe()
+                    lost = False
+                if not self.pubsub.subscribed:
+                    await asyncio.sleep(1)
+                    continue
+                message = await self.pubsub.get_message(timeout=1.0)
+            except (ConnectionError, OSError):
+                if not lost:
+                    logger.warning("Live updates lost their Redis subscription.")
+                lost = True
+                await asyncio.sleep(1)
+                continue
+            if message is not None:
+                self.fan_out(message["channel"].decode(), message["data"].decode())
+
+    async def _resubscribe(self):
+        with self.lock:
+            channels = list(self.subscriptions)
+        if channels:
+            await self.pubsub.subscribe(*channels)
+        # Whatever was published meanwhile is gone
+        for name in channels:
+            self.fan_out(name, RESYNC)
+
+
+_brokers = {}
+
+
+def live_broker():
+    kind = settings.LIVE_UPDATES_BROKER
+    if kind not in _brokers:
+        size = settings.LIVE_UPDATES_QUEUE_SIZE
+        _brokers[kind] = (
+            InMemoryBroker(size)
+            if kind == "memory"
+            else RedisBroker(settings.LIVE_UPDATES_REDIS_URL, size)
+        )
+    return _brokers[kind]
@@ -0,0 +1,114 @@
+import asyncio
+import json
+import threading
+from statistics import median, quantiles
+from time import perf_counter, sleep
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.live import RESYNC, InMemoryBroker, channel
+from dashboard.managers.live_manager import LiveUpdateManager
+
+
+class Command(BaseCommand):
+    help = (
+        "Opens many live dashboard streams on the in-memory broker, publishes "
+        "events from a worker thread as the write paths do, and reports the "
+        "open connections and publish-to-stream fan-out latency."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--connections", type=int, default=1000, help="Open streams"
+        )
+        parser.add_argument(
+            "--businesses", type=int, default=10, help="Businesses they watch"
+        )
+        parser.add_argument(
+            "--events", type=int, default=100, help="Events published per business"
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1.0,
+            help="Milliseconds between published events",
+        )
+        parser.add_argument(
+            "--queue-size", type=int, default=100, help="Frames buffered per stream"
+        )
+
+    def handle(self, *args, **options):
+        if options["connections"] < options["businesses"] or options["businesses"] < 1:
+            raise CommandError(
+                "Need at least one business and one connection per business."
+            )
+        if options["events"] < 2:
+            raise CommandError("--events must be at least 2.")
+
+        result = asyncio.run(self.run(**options))
+        samples = result["latencies"]
+        p50, p95 = median(samples), quantiles(samples, n=20)[-1]
+        self.stdout.write(f"connections   {result['connections']}")
+        self.stdout.write(f"published     {result['published']}")
+        self.stdout.write(f"delivered     {len(samples)}")
+        self.stdout.write(f"resyncs       {result['resyncs']}")
+        self.stdout.write(
+            f"fan-out       p50 {p50:8.3f} ms   p95 {p95:8.3f} ms   "
+            f"max {max(samples):8.3f} ms"
+        )
+        self.stdout.write(self.style.SUCCESS("✅ Benchmark finished."))
+
+    async def run(self, connections, businesses, events, interval, queue_size, **_):
+        broker = InMemoryBroker(queue_size)
+        latencies, resyncs = [], [0]
+        ready = asyncio.Event()
+        opened = [0]
+
+        async def listen(business_id):
+            stream = LiveUpdateManager.stream(business_id, broker=broker, heartbeat=60)
+            await anext(stream)  # subscribed
+            opened[0] += 1
+            if opened[0] == connections:
+                ready.set()
+            received = 0
+            try:
+                while received < events:
+                    chunk = await anext(stream)
+                    now = perf_counter()
+                    if chunk.endswith(RESYNC):
+                        resyncs[0] += 1
+                        break  # a real client would reload
+                    for frame in chunk.split("\n\n"):
+                        if frame.startswith("event: bench"):
+                            data = json.loads(frame.split("data: ", 1)[1])
+                            latencies.append((now - data["sent"]) * 1000)
+                            received = data["seq"] + 1
+            finally:
+                await stream.aclose()
+
+        def publish():
+            for seq in range(events):
+                for business_id in range(1, businesses + 1):
+                    broker.publish(
+                        channel(business_id),
+                        LiveUpdateManager.frame(
+                            "bench", {"seq": seq, "sent": perf_counter()}
+                        ),
+                    )
+                sleep(interval / 1000)
+
+        listeners = [
+            asyncio.create_task(listen(i % businesses + 1)) for i in range(connections)
+        ]
+        await ready.wait()
+        open_connections = broker.connections
+        publisher = threading.Thread(target=publish)
+        publisher.start()
+        await asyncio.gather(*listeners)
+        publisher.join()
+        return {
+            "connections": open_connections,
+            "published": events * businesses,
+            "latencies": latencies or [0.0],
+            "resyncs": resyncs[0],
+        }
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from dashboard.managers.rollup_manager import SalesSummaryManager, ProductSalesManager
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the daily sales summary and product sales facts from raw sales"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--business", type=int, help="Only rebuild this business")
+        parser.add_argument("--start", help="First day to rebuild (YYYY-MM-DD)")
+        parser.add_argument("--end", help="Last day to rebuild (YYYY-MM-DD)")
+
+    def handle(self, *args, **options):
+        start = parse_date(options["start"]) if options["start"] else None
+        end = parse_date(options["end"]) if options["end"] else None
+        if (options["start"] and not start) or (options["end"] and not end):
+            raise CommandError("Dates must be in YYYY-MM-DD format.")
+
+        scope = {"business_id": options["business"], "start": start, "end": end}
+        summary_rows = SalesSummaryManager.rebuild(**scope)
+        product_rows = ProductSalesManager.rebuild(**scope)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ Rebuilt {summary_rows} daily sales summary rows and "
+                f"{product_rows} product sales rows."
+            )
+        )
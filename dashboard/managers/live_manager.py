@@ -0,0 +1,158 @@
+import asyncio
+import json
+import logging
+import secrets
+from typing import AsyncIterator, Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from common.dates import business_timezone
+from dashboard.live import channel, live_broker
+from dashboard.models import DailySalesSummary
+from products.models import Product
+
+logger = logging.getLogger(__name__)
+
+
+class LiveUpdateManager:
+    """
+    Deltas for the live dashboard stream.
+
+    Write paths announce what changed once their transaction commits: a new
+    sale with the business's running totals for the day (``sale``), new stock
+    levels (``stock``) and products that just went low (``low_stock``). Each
+    event is serialized once as a server-sent event frame and published on
+    the business's channel; nothing is queried for businesses nobody is
+    watching. Publishing is best effort and never fails the write.
+
+    EventSource cannot send an Authorization header, so a stream is opened
+    with a ticket instead: a random, single-use key kept in the cache for
+    LIVE_UPDATES_TICKET_SECONDS that names the business to stream. A URL
+    that ends up in an access log is worthless once used or expired.
+    """
+
+    @staticmethod
+    def _ticket_key(ticket: str) -> str:
+        return f"live:ticket:{ticket}"
+
+    @classmethod
+    def issue_ticket(cls, business_id: int) -> str:
+        ticket = secrets.token_urlsafe(32)
+        cache.set(
+            cls._ticket_key(ticket),
+            business_id,
+            settings.LIVE_UPDATES_TICKET_SECONDS,
+        )
+        return ticket
+
+    @classmethod
+    def redeem_ticket(cls, ticket: str) -> Optional[int]:
+        """The ticket's business, or None if it is unknown, expired or used."""
+        key = cls._ticket_key(ticket)
+        business_id = cache.get(key)
+        # Only the request that deletes the key gets to use it
+        if business_id is None or not cache.delete(key):
+            return None
+        return business_id
+
+    @staticmethod
+    def frame(event: str, data) -> str:
+        return f"event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n"
+
+    @classmethod
+    def publish(cls, business_id: int, event: str, data) -> int:
+        try:
+            return live_broker().publish(channel(business_id), cls.frame(event, data))
+        except Exception:
+            logger.exception("Could not publish a live %s update.", event)
+            return 0
+
+    @classmethod
+    def watched(cls, business_ids: Iterable[int]) -> List[int]:
+        """The ``business_ids`` with at least one open stream."""
+        channels = {channel(business_id): business_id for business_id in business_ids}
+        try:
+            listening = live_broker().listening(channels)
+        except Exception:
+            logger.exception("Could not look up live update listeners.")
+            return []
+        return [channels[name] for name in listening]
+
+    @classmethod
+    def sale_created(cls, sale):
+        if sale.business_id is not None:
+            transaction.on_commit(lambda: cls.publish_sale(sale))
+
+    @classmethod
+    def publish_sale(cls, sale):
+        if not cls.watched([sale.business_id]):
+            return
+        day = timezone.localdate(sale.sale_date, business_timezone(sale.business_id))
+        today = DailySalesSummary.objects.filter(
+            business_id=sale.business_id, date=day
+        ).aggregate(sale_count=Sum("sale_count"), gross_amount=Sum("gross_amount"))
+        cls.publish(
+            sale.business_id,
+            "sale",
+            {
+                "id": sale.id,
+                "total_amount": sale.total_amount,
+                "payment_method": sale.payment_method,
+                "sale_date": sale.sale_date,
+                "today": {
+                    "date": day,
+                    "sale_count": today["sale_count"] or 0,
+                    "gross_amount": today["gross_amount"] or 0,
+                },
+            },
+        )
+
+    @classmethod
+    def stock_changed(cls, product_ids: List[int]):
+        transaction.on_commit(lambda: cls.publish_stock(product_ids))
+
+    @classmethod
+    def publish_stock(cls, product_ids: List[int]):
+        cls._publish_products(
+            "stock", product_ids, ("id", "sku", "stock", "is_low_stock")
+        )
+
+    @classmethod
+    def publish_low_stock(cls, product_ids: List[int]):
+        cls._publish_products(
+            "low_stock", product_ids, ("id", "sku", "name", "stock", "low_stock_alert")
+        )
+
+    @classmethod
+    def _publish_products(cls, event: str, product_ids: List[int], fields):
+        by_business: Dict[int, List[dict]] = {}
+        for row in Product.objects.filter(pk__in=product_ids).values(
+            "business_id", *fields
+        ):
+            by_business.setdefault(row.pop("business_id"), []).append(row)
+        for business_id in cls.watched(by_business):
+            cls.publish(business_id, event, {"products": by_business[business_id]})
+
+    @classmethod
+    async def stream(
+        cls, business_id: int, broker=None, heartbeat: Optional[float] = None
+    ) -> AsyncIterator[str]:
+        """
+        Server-sent event frames for ``business_id`` until the client goes
+        away, with a comment line every ``heartbeat`` seconds of silence so
+        proxies keep the connection open.
+        """
+        broker = broker or live_broker()
+        heartbeat = heartbeat or settings.LIVE_UPDATES_HEARTBEAT_SECONDS
+        async with await broker.subscribe(channel(business_id)) as subscription:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    yield await subscription.get(heartbeat)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
@@ -0,0 +1,352 @@
+from abc import ABC, abstractmethod
+from collections import Counter, defaultdict
+from datetime import date
+from typing import Dict, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, F, Q, Sum, Value, When
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from accounts.managers.base_manager import BaseModelManager
+from business.models import Business
+from common.dates import business_timezone, date_range_filter
+from dashboard.models import DailySalesSummary, ProductDailySales
+from sales.models import Sale, SaleItem, SaleReturn
+
+
+class RollupManager(BaseModelManager, ABC):
+    """
+    Base manager for incrementally maintained rollup tables.
+
+    Rows are identified by ``key_fields`` and carry additive ``value_fields``.
+    ``apply_deltas`` adds a batch of deltas with atomic ``F()`` updates, so
+    concurrent writers never lose increments. Subclasses that set ``model``
+    must implement ``rebuild_business``.
+    """
+
+    key_fields: Tuple[str, ...] = ()
+    value_fields: Tuple[str, ...] = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Managers are only used through classmethods, so ABC's check on
+        # instantiation never runs; fail when the class is defined instead
+        missing = sorted(
+            name
+            for name in dir(cls)
+            if getattr(getattr(cls, name, None), "__isabstractmethod__", False)
+        )
+        if cls.model is not None and missing:
+            raise TypeError(f"{cls.__name__} does not implement {', '.join(missing)}")
+
+    @classmethod
+    def apply_deltas(cls, deltas: Dict[tuple, Dict[str, object]]):
+        """
+        ``deltas`` maps a key tuple (ordered like ``key_fields``) to the
+        amounts to add to each value field. Keys containing ``None`` are
+        ignored. Issues one INSERT plus one UPDATE per distinct key prefix,
+        regardless of how many keys share that prefix.
+        """
+        cls._check_model()
+        deltas = {
+            key: values
+            for key, values in deltas.items()
+            if None not in key and any(values.values())
+        }
+        if not deltas:
+            return
+
+        *outer_fields, inner_field = cls.key_fields
+        groups = defaultdict(dict)
+        for key, values in deltas.items():
+            groups[key[:-1]][key[-1]] = values
+
+        with transaction.atomic():
+            cls.model.objects.bulk_create(
+                [cls.model(**dict(zip(cls.key_fields, key))) for key in deltas],
+                ignore_conflicts=True,
+            )
+            for outer_key, inner_deltas in groups.items():
+                updates = {}
+                for field in cls.value_fields:
+                    whens = [
+                        When(Q(**{inner_field: inner_value}), then=Value(values[field]))
+                        for inner_value, values in inner_deltas.items()
+                        if values.get(field)
+                    ]
+                    if whens:
+                        updates[field] = F(field) + Case(
+                            *whens,
+                            default=Value(0),
+                            output_field=cls.model._meta.get_field(field),
+                        )
+                cls.model.objects.filter(
+                    **dict(zip(outer_fields, outer_key)),
+                    **{f"{inner_field}__in": list(inner_deltas)},
+                ).update(updated_on=timezone.now(), **updates)
+
+    @classmethod
+    def rebuild(cls, business_id=None, start=None, end=None) -> int:
+        """
+        Recompute the rows in scope from raw data, replacing them. Days are
+        local to each business, so businesses are rebuilt one at a time.
+        Returns the number of rows written.
+        """
+        if business_id:
+            business_ids = [business_id]
+        else:
+            business_ids = Business.objects.values_list("id", flat=True)
+        return sum(
+            cls.rebuild_business(business_id, start, end)
+            for business_id in business_ids
+        )
+
+    @classmethod
+    @abstractmethod
+    def rebuild_business(cls, business_id, start=None, end=None) -> int:
+        """Recompute one business's rows in scope; returns the rows written."""
+
+
+def _local_date(business_id, moment) -> Optional[date]:
+    """The business-local day ``moment`` falls on."""
+    if not moment:
+        return None
+    return timezone.localdate(moment, business_timezone(business_id))
+
+
+class SalesSummaryManager(RollupManager):
+    model = DailySalesSummary
+    key_fields = ("business_id", "date", "payment_method")
+    value_fields = ("sale_count", "gross_amount", "return_count", "refunded_amount")
+
+    @staticmethod
+    def _key(business_id, moment, payment_method) -> tuple:
+        return (business_id, _local_date(business_id, moment), payment_method)
+
+    @classmethod
+    def record_sale(cls, sale: Sale, created: bool):
+        """Roll a created or updated sale into the summary."""
+        deltas = defaultdict(Counter)
+
+        if not created and not getattr(sale, "_loaded_values", None):
+            # Unknown previous state; leave it to rebuild_sales_summary
+            return
+
+        if not created:
+            key = cls._key(
+                sale.loaded_value("business_id"),
+                sale.loaded_value("sale_date"),
+                sale.loaded_value("payment_method"),
+            )
+            deltas[key]["sale_count"] -= 1
+            deltas[key]["gross_amount"] -= sale.loaded_value("total_amount") or 0
+
+        key = cls._key(sale.business_id, sale.sale_date, sale.payment_method)
+        deltas[key]["sale_count"] += 1
+        deltas[key]["gross_amount"] += sale.total_amount or 0
+
+        cls.apply_deltas(deltas)
+
+    @classmethod
+    def remove_sale(cls, sale: Sale):
+        key = cls._key(sale.business_id, sale.sale_date, sale.payment_method)
+        cls.apply_deltas(
+            {key: {"sale_count": -1, "gross_amount": -(sale.total_amount or 0)}}
+        )
+
+    @classmethod
+    def record_return(cls, sale_return: SaleReturn, created: bool, removed=False):
+        """Roll a return into the summary of the day it was booked on."""
+        if created or removed:
+            count = -1 if removed else 1
+            amount = sale_return.refunded_amount * count
+        else:
+            count = 0
+            amount = sale_return.refunded_amount - (
+                sale_return.loaded_value("refunded_amount") or 0
+            )
+
+        sale_info = (
+            SaleItem.objects.filter(pk=sale_return.sale_item_id)
+            .values_list("business_id", "sale__payment_method")
+            .first()
+        )
+        if not sale_info:
+            return
+
+        key = cls._key(sale_info[0], sale_return.created_on, sale_info[1])
+        cls.apply_deltas({key: {"return_count": count, "refunded_amount": amount}})
+
+    @classmethod
+    def rebuild_business(cls, business_id, start=None, end=None) -> int:
+        tz = business_timezone(business_id)
+        sales = Sale.objects.filter(
+            business_id=business_id,
+            **date_range_filter("sale_date", start, end, tz),
+        )
+        returns = SaleReturn.objects.filter(
+            sale_item__business_id=business_id,
+            **date_range_filter("created_on", start, end, tz),
+        )
+        summaries = cls.model.objects.filter(business_id=business_id)
+        if start:
+            summaries = summaries.filter(date__gte=start)
+        if end:
+            summaries = summaries.filter(date__lte=end)
+
+        rows = {}
+        sales_by_day = (
+            sales.annotate(day=TruncDate("sale_date", tzinfo=tz))
+            .values("day", "payment_method")
+            .annotate(count=Count("id"), total=Sum("total_amount"))
+            .order_by()
+        )
+        for entry in sales_by_day:
+            key = (business_id, entry["day"], entry["payment_method"])
+            rows[key] = cls.model(
+                business_id=key[0],
+                date=key[1],
+                payment_method=key[2],
+                sale_count=entry["count"],
+                gross_amount=entry["total"] or 0,
+            )
+
+        returns_by_day = (
+            returns.annotate(day=TruncDate("created_on", tzinfo=tz))
+            .values("day", "sale_item__sale__payment_method")
+            .annotate(count=Count("id"), total=Sum("refunded_amount"))
+            .order_by()
+        )
+        for entry in returns_by_day:
+            key = (business_id, entry["day"], entry["sale_item__sale__payment_method"])
+            row = rows.setdefault(
+                key,
+                cls.model(business_id=key[0], date=key[1], payment_method=key[2]),
+            )
+            row.return_count = entry["count"]
+            row.refunded_amount = entry["total"] or 0
+
+        with transaction.atomic():
+            summaries.delete()
+            cls.model.objects.bulk_create(rows.values(), batch_size=1000)
+
+        return len(rows)
+
+
+class ProductSalesManager(RollupManager):
+    model = ProductDailySales
+    key_fields = ("business_id", "date", "product_id")
+    value_fields = ("quantity", "revenue", "cost")
+
+    @staticmethod
+    def _add(deltas, key, quantity, subtotal, cost_price, sign=1):
+        deltas[key]["quantity"] += sign * quantity
+        deltas[key]["revenue"] += sign * subtotal
+        if cost_price is not None:
+            deltas[key]["cost"] += sign * quantity * cost_price
+
+    @classmethod
+    def record_items(cls, sale: Sale, items):
+        """Roll newly created line items of ``sale`` into the fact table."""
+        business_id = sale.business_id
+        day = _local_date(business_id, sale.sale_date)
+        deltas = defaultdict(Counter)
+        for item in items:
+            cls._add(
+                deltas,
+                (business_id, day, item.product_id),
+                item.quantity,
+                item.subtotal,
+                item.cost_price,
+            )
+        cls.apply_deltas(deltas)
+
+    @classmethod
+    def record_item(cls, item: SaleItem, created: bool):
+        if created:
+            cls.record_items(item.sale, [item])
+            return
+        if not getattr(item, "_loaded_values", None):
+            # Unknown previous state; leave it to rebuild_sales_summary
+            return
+
+        sale = item.sale
+        business_id = sale.business_id
+        day = _local_date(business_id, sale.sale_date)
+        deltas = defaultdict(Counter)
+        cls._add(
+            deltas,
+            (business_id, day, item.loaded_value("product_id")),
+            item.loaded_value("quantity") or 0,
+            item.loaded_value("subtotal") or 0,
+            item.loaded_value("cost_price"),
+            sign=-1,
+        )
+        cls._add(
+            deltas,
+            (business_id, day, item.product_id),
+            item.quantity,
+            item.subtotal,
+            item.cost_price,
+        )
+        cls.apply_deltas(deltas)
+
+    @classmethod
+    def remove_item(cls, item: SaleItem):
+        sale = item.sale
+        business_id = sale.business_id
+        deltas = defaultdict(Counter)
+        cls._add(
+            deltas,
+            (business_id, _local_date(business_id, sale.sale_date), item.product_id),
+            item.quantity,
+            item.subtotal,
+            item.cost_price,
+            sign=-1,
+        )
+        cls.apply_deltas(deltas)
+
+    @classmethod
+    def rebuild_business(cls, business_id, start=None, end=None) -> int:
+        tz = business_timezone(business_id)
+        items = SaleItem.objects.filter(
+            business_id=business_id,
+            product__isnull=False,
+            **date_range_filter("sale__sale_date", start, end, tz),
+        )
+        facts = cls.model.objects.filter(business_id=business_id)
+        if start:
+            facts = facts.filter(date__gte=start)
+        if end:
+            facts = facts.filter(date__lte=end)
+
+        sales_by_day = (
+            items.annotate(day=TruncDate("sale__sale_date", tzinfo=tz))
+            .values("day", "product")
+            .annotate(
+                total_quantity=Sum("quantity"),
+                total_revenue=Sum("subtotal"),
+                total_cost=Sum(
+                    F("quantity") * F("cost_price"), output_field=DecimalField()
+                ),
+            )
+            .order_by()
+        )
+        rows = [
+            cls.model(
+                business_id=business_id,
+                date=entry["day"],
+                product_id=entry["product"],
+                quantity=entry["total_quantity"] or 0,
+                revenue=entry["total_revenue"] or 0,
+                cost=entry["total_cost"] or 0,
+            )
+            for entry in sales_by_day
+        ]
+
+        with transaction.atomic():
+            facts.delete()
+            cls.model.objects.bulk_create(rows, batch_size=1000)
+
+        return len(rows)
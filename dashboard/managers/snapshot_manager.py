@@ -0,0 +1,92 @@
+from datetime import timedelta
+from typing import Callable, Dict, Iterable, Optional
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from common.dates import business_timezone, start_of_day
+
+
+class DashboardSnapshotManager:
+    """
+    Per-business dashboard payloads kept in the default cache.
+
+    A request is served from a single cache read. Snapshots are dropped by
+    domain events (see ``dashboard.signals``) once the triggering transaction
+    commits; ``timeout`` is only a safety net. A snapshot also expires at the
+    business's local midnight, so "today" figures never roll over stale.
+    """
+
+    kinds = ("dashboard", "analytics")
+    timeout = 60 * 60
+
+    @staticmethod
+    def _key(kind: str, business_id: int) -> str:
+        return f"dashboard:snapshot:{kind}:{business_id}"
+
+    @staticmethod
+    def _stats_key(kind: str, outcome: str) -> str:
+        return f"dashboard:snapshot:stats:{kind}:{outcome}"
+
+    @classmethod
+    def get_or_build(cls, kind: str, business_id: int, build: Callable[[], dict]):
+        key = cls._key(kind, business_id)
+
+        snapshot = cache.get(key)
+        if snapshot is not None and timezone.now() < snapshot["valid_until"]:
+            cls._count(kind, "hits")
+            return snapshot["data"]
+
+        cls._count(kind, "misses")
+        tz = business_timezone(business_id)
+        tomorrow = timezone.localdate(timezone=tz) + timedelta(days=1)
+        data = build()
+        cache.set(
+            key,
+            {"valid_until": start_of_day(tomorrow, tz), "data": data},
+            cls.timeout,
+        )
+        return data
+
+    @classmethod
+    def invalidate(cls, business_ids: Iterable[Optional[int]]):
+        keys = [
+            cls._key(kind, business_id)
+            for business_id in set(business_ids)
+            if business_id
+            for kind in cls.kinds
+        ]
+        if keys:
+            # Rebuilding before commit would cache the pre-event state again
+            transaction.on_commit(lambda: cache.delete_many(keys))
+
+    @classmethod
+    def _count(cls, kind: str, outcome: str):
+        key = cls._stats_key(kind, outcome)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+    @classmethod
+    def stats(cls) -> Dict[str, dict]:
+        counters = cache.get_many(
+            [
+                cls._stats_key(kind, outcome)
+                for kind in cls.kinds
+                for outcome in ("hits", "misses")
+            ]
+        )
+        stats = {}
+        for kind in cls.kinds:
+            hits = counters.get(cls._stats_key(kind, "hits"), 0)
+            misses = counters.get(cls._stats_key(kind, "misses"), 0)
+            stats[kind] = {
+                "hits": hits,
+                "misses": misses,
+                "hit_ratio": (
+                    round(hits / (hits + misses), 4) if hits + misses else None
+                ),
+            }
+        return stats
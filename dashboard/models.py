@@ -1,3 +1,72 @@
-from django.db import models
+from django.db.models import (
+    ForeignKey,
+    CharField,
+    DateField,
+    DecimalField,
+    IntegerField,
+    CASCADE,
+    UniqueConstraint,
+)
 
-# Create your models here.
+from common.models import TenantModel
+
+
+class DailySalesSummary(TenantModel):
+    """
+    Per-business, per-day, per-payment-method sales rollup.
+    Maintained incrementally from Sale / SaleReturn writes; rebuild with
+    ``manage.py rebuild_sales_summary``.
+    """
+
+    business = ForeignKey(
+        "business.Business", on_delete=CASCADE, related_name="daily_sales_summaries"
+    )
+    date = DateField()
+    payment_method = CharField(max_length=50)
+    sale_count = IntegerField(default=0)
+    gross_amount = DecimalField(max_digits=14, decimal_places=2, default=0)
+    return_count = IntegerField(default=0)
+    refunded_amount = DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(
+                fields=["business", "date", "payment_method"],
+                name="unique_daily_sales_summary",
+            )
+        ]
+
+    def __str__(self):
+        return (
+            f"{self.business_id} {self.date} {self.payment_method}: {self.gross_amount}"
+        )
+
+
+class ProductDailySales(TenantModel):
+    """
+    Per-business, per-day, per-product sales facts.
+    Maintained incrementally from SaleItem writes; ``cost`` only covers line
+    items whose unit cost was known at the time of sale.
+    """
+
+    business = ForeignKey(
+        "business.Business", on_delete=CASCADE, related_name="product_daily_sales"
+    )
+    product = ForeignKey(
+        "products.Product", on_delete=CASCADE, related_name="daily_sales"
+    )
+    date = DateField()
+    quantity = IntegerField(default=0)
+    revenue = DecimalField(max_digits=14, decimal_places=2, default=0)
+    cost = DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(
+                fields=["business", "date", "product"],
+                name="unique_product_daily_sales",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.business_id} {self.date} {self.product_id}: {self.quantity}"
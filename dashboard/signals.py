@@ -0,0 +1,108 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from billing.models import BillingPayment, Invoice
+from products.models import Product
+from products.signals import low_stock_crossed, stock_changed
+from sales.models import Purchase, Sale, SaleItem, SaleReturn
+from sales.signals import sale_items_bulk_created
+from dashboard.managers.rollup_manager import SalesSummaryManager, ProductSalesManager
+from dashboard.managers.live_manager import LiveUpdateManager
+from dashboard.managers.snapshot_manager import DashboardSnapshotManager
+
+
+@receiver(post_save, sender=Sale)
+def update_sales_summary_on_save(sender, instance, created, **kwargs):
+    SalesSummaryManager.record_sale(instance, created)
+
+
+@receiver(post_delete, sender=Sale)
+def update_sales_summary_on_delete(sender, instance, **kwargs):
+    SalesSummaryManager.remove_sale(instance)
+
+
+@receiver(post_save, sender=SaleReturn)
+def update_sales_summary_on_return(sender, instance, created, **kwargs):
+    SalesSummaryManager.record_return(instance, created)
+
+
+@receiver(post_delete, sender=SaleReturn)
+def update_sales_summary_on_return_delete(sender, instance, **kwargs):
+    SalesSummaryManager.record_return(instance, created=False, removed=True)
+
+
+@receiver(post_save, sender=SaleItem)
+def update_product_sales_on_save(sender, instance, created, **kwargs):
+    ProductSalesManager.record_item(instance, created)
+
+
+@receiver(post_delete, sender=SaleItem)
+def update_product_sales_on_delete(sender, instance, **kwargs):
+    ProductSalesManager.remove_item(instance)
+
+
+@receiver(sale_items_bulk_created, sender=Sale)
+def update_product_sales_on_bulk_create(sender, sale, items, **kwargs):
+    ProductSalesManager.record_items(sale, items)
+
+
+# ----- Snapshot invalidation -----
+
+
+@receiver(post_save, sender=Sale)
+@receiver(post_delete, sender=Sale)
+def invalidate_snapshots_on_sale(sender, instance, **kwargs):
+    DashboardSnapshotManager.invalidate(
+        [instance.business_id, instance.loaded_value("business_id")]
+    )
+
+
+@receiver(post_save, sender=SaleReturn)
+@receiver(post_delete, sender=SaleReturn)
+def invalidate_snapshots_on_return(sender, instance, **kwargs):
+    DashboardSnapshotManager.invalidate([instance.sale_item.business_id])
+
+
+@receiver(post_save, sender=Purchase)
+@receiver(post_delete, sender=Purchase)
+@receiver(post_save, sender=Invoice)
+@receiver(post_delete, sender=Invoice)
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_snapshots(sender, instance, **kwargs):
+    DashboardSnapshotManager.invalidate([instance.business_id])
+
+
+@receiver(post_save, sender=BillingPayment)
+@receiver(post_delete, sender=BillingPayment)
+def invalidate_snapshots_on_payment(sender, instance, **kwargs):
+    DashboardSnapshotManager.invalidate([instance.invoice.business_id])
+
+
+@receiver(stock_changed, sender=Product)
+def invalidate_snapshots_on_stock_change(sender, product_ids, **kwargs):
+    DashboardSnapshotManager.invalidate(
+        Product.objects.filter(pk__in=product_ids)
+        .values_list("business_id", flat=True)
+        .distinct()
+    )
+
+
+# ----- Live updates -----
+
+
+@receiver(post_save, sender=Sale)
+def publish_new_sale(sender, instance, created, **kwargs):
+    if created:
+        LiveUpdateManager.sale_created(instance)
+
+
+@receiver(stock_changed, sender=Product)
+def publish_stock_levels(sender, product_ids, **kwargs):
+    LiveUpdateManager.stock_changed(product_ids)
+
+
+@receiver(low_stock_crossed, sender=Product)
+def publish_low_stock_crossings(sender, product_ids, **kwargs):
+    # Already sent after the commit
+    LiveUpdateManager.publish_low_stock(product_ids)
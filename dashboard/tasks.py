@@ -0,0 +1,57 @@
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.db.models import Sum
+from django.utils import timezone
+
+from common.dates import business_timezone
+from products.managers.notification_manager import NotificationManager
+from products.models import Notification
+from tenants.schemas import tenant_schema, tenant_schemas
+
+from .models import DailySalesSummary
+
+
+@shared_task
+def check_sales_milestones():
+    """
+    Queue a notification for every SALES_MILESTONES total a business's sales
+    reached today. Runs repeatedly; the two day coalescing window keeps each
+    milestone to one notification per user.
+    """
+    queued = 0
+    for schema_name in tenant_schemas():
+        with tenant_schema(schema_name):
+            queued += _queue_sales_milestones()
+    return queued
+
+
+def _queue_sales_milestones() -> int:
+    utc_today = timezone.now().date()
+    totals = (
+        DailySalesSummary.objects.filter(
+            date__range=(utc_today - timedelta(days=1), utc_today + timedelta(days=1))
+        )
+        .values_list("business_id", "date")
+        .annotate(total=Sum("gross_amount"))
+        .order_by()
+    )
+
+    events = []
+    for business_id, day, total in totals:
+        if day != timezone.localdate(timezone=business_timezone(business_id)):
+            continue
+        events += [
+            {
+                "kind": Notification.Kind.SALES_MILESTONE,
+                "business_id": business_id,
+                "dedupe_key": f"sales_milestone:{day.isoformat()}:{milestone}",
+                "window": 2 * 24 * 60 * 60,
+                "message": f"Sales milestone: today's sales passed {milestone}.",
+            }
+            for milestone in settings.SALES_MILESTONES
+            if total >= milestone
+        ]
+    NotificationManager.enqueue(events)
+    return len(events)
@@ -1,3 +1,378 @@
-from django.test import TestCase
+import asyncio
+import json
+from datetime import date
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.cache import cache
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.utils.timezone import localdate
+from rest_framework.test import APIRequestFactory, force_authenticate
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import User
+from billing.models import BillingPayment, Invoice
+from business.models import Business, UserBusiness
+from customers.models import Customer
+from products.managers.inventory_manager import InventoryManager
+from products.models import Product
+from sales.managers.sale_manager import SaleManager
+from sales.models import Purchase, Sale, SaleReturn
+from sales.testing import create_accounts
+
+from .live import live_broker
+from .managers.live_manager import LiveUpdateManager
+from .managers.rollup_manager import (
+    ProductSalesManager,
+    RollupManager,
+    SalesSummaryManager,
+)
+from .managers.snapshot_manager import DashboardSnapshotManager
+from .models import DailySalesSummary, ProductDailySales
+from .views import (
+    AnalyticsDashboardView,
+    DashboardView,
+    LiveUpdatesTicketView,
+    LiveUpdatesView,
+)
+
+
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class SalesRollupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = Business.objects.create(name="Rollup Co")
+        create_accounts(cls.business, ["1001", "1002", "4001"])
+        cls.product = Product.objects.create(
+            business=cls.business, name="Widget", sku="W-1", price=10, stock=100
+        )
+
+    def sell(self, quantity, payment_method="cash"):
+        return SaleManager.create_sale(
+            [{"product": self.product, "quantity": quantity}],
+            business=self.business,
+            payment_method=payment_method,
+        )
+
+    def summary(self):
+        return {
+            row.payment_method: (
+                row.sale_count,
+                row.gross_amount,
+                row.return_count,
+                row.refunded_amount,
+            )
+            for row in DailySalesSummary.objects.filter(business=self.business)
+        }
+
+    def test_sales_and_returns_are_rolled_up_as_they_happen(self):
+        first = self.sell(2)
+        self.sell(3)
+        self.sell(1, payment_method="card")
+        self.assertEqual(
+            self.summary(),
+            {"cash": (2, Decimal("50"), 0, 0), "card": (1, Decimal("10"), 0, 0)},
+        )
+
+        sale_return = SaleReturn.objects.create(
+            sale_item=first.items.get(), quantity=1, refunded_amount=Decimal("10")
+        )
+        sale_return.refunded_amount = Decimal("4")
+        sale_return.save()
+        self.assertEqual(self.summary()["cash"], (2, Decimal("50"), 1, Decimal("4")))
+        sale_return.delete()
+        self.assertEqual(self.summary()["cash"], (2, Decimal("50"), 0, 0))
+
+        # Edits move the sale between keys; deletes take it out
+        first = Sale.objects.get(pk=first.pk)
+        first.payment_method = "card"
+        first.save()
+        self.assertEqual(self.summary()["card"], (2, Decimal("30"), 0, 0))
+        first.delete()
+        self.assertEqual(self.summary()["card"], (1, Decimal("10"), 0, 0))
+        self.assertEqual(
+            ProductDailySales.objects.get(product=self.product).quantity, 4
+        )
+
+    def test_dashboard_top_products_cover_this_month_only(self):
+        self.sell(2)
+        old = Product.objects.create(business=self.business, name="Old", sku="O-1")
+        ProductDailySales.objects.create(
+            business=self.business, product=old, date=date(2000, 1, 1), quantity=500
+        )
+
+        data = DashboardView().build(self.business)
+        self.assertEqual(
+            data["top_products"], [{"product__name": "Widget", "quantity_sold": 2}]
+        )
+
+    def test_deltas_for_many_keys_cost_one_insert_and_one_update(self):
+        day = localdate()
+        deltas = {
+            (self.business.id, day, method): {"sale_count": 1, "gross_amount": 5}
+            for method in ("cash", "card", "online")
+        }
+        deltas[(None, day, "cash")] = {"sale_count": 1}
+        deltas[(self.business.id, day, "credit")] = {"sale_count": 0}
+
+        with self.assertNumQueries(4):  # savepoint, insert, update, release
+            SalesSummaryManager.apply_deltas(deltas)
+        SalesSummaryManager.apply_deltas(deltas)
+        self.assertEqual(
+            self.summary(),
+            {method: (2, Decimal("10"), 0, 0) for method in ("cash", "card", "online")},
+        )
+
+    def test_rebuild_replaces_drifted_rows(self):
+        sale = self.sell(2)
+        self.sell(1, payment_method="card")
+        SaleReturn.objects.create(
+            sale_item=sale.items.get(), quantity=1, refunded_amount=Decimal("10")
+        )
+        expected = self.summary()
+        products = list(ProductDailySales.objects.values_list("quantity", "revenue"))
+
+        DailySalesSummary.objects.update(sale_count=99)
+        DailySalesSummary.objects.create(
+            business=self.business,
+            date=date(2000, 1, 1),
+            payment_method="cash",
+            sale_count=1,
+        )
+        ProductDailySales.objects.update(quantity=0)
+
+        self.assertEqual(SalesSummaryManager.rebuild_business(self.business.id), 2)
+        ProductSalesManager.rebuild_business(self.business.id)
+        self.assertEqual(self.summary(), expected)
+        self.assertEqual(
+            list(ProductDailySales.objects.values_list("quantity", "revenue")),
+            products,
+        )
+
+    def test_incomplete_rollup_managers_fail_when_defined(self):
+        with self.assertRaisesMessage(TypeError, "rebuild_business"):
+
+            class IncompleteManager(RollupManager):
+                model = DailySalesSummary
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class AnalyticsDashboardQueryCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = Business.objects.create(name="Analytics Co")
+        create_accounts(cls.business)
+        cls.user = User.objects.create(username="analyst", email="analyst@x.io")
+        UserBusiness.objects.create(user=cls.user, business=cls.business, role="ADMIN")
+
+        customer = Customer.objects.create(business=cls.business, name="Customer")
+        product = Product.objects.create(
+            business=cls.business, name="Widget", sku="W-1", price=10, stock=50
+        )
+        for number, quantity in [(1, 2), (2, 1)]:
+            sale = SaleManager.create_sale(
+                [{"product": product, "quantity": quantity}],
+                customer=customer,
+                payment_method="cash",
+            )
+            invoice = Invoice.objects.create(
+                business=cls.business,
+                sale=sale,
+                invoice_number=f"INV-T-{number}",
+                total_amount=sale.total_amount,
+                status="pending",
+            )
+        # Pays off the second invoice
+        BillingPayment.objects.create(
+            invoice=invoice, amount=Decimal("10"), payment_method="cash"
+        )
+
+        purchase = Purchase.objects.create(
+            business=cls.business, total_amount=Decimal("40")
+        )
+        Invoice.objects.create(
+            business=cls.business,
+            purchase=purchase,
+            invoice_number="PINV-T-1",
+            total_amount=Decimal("40"),
+            status="overdue",
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_metrics_use_a_fixed_number_of_queries(self):
+        # totals subqueries, invoice aggregate, top products, low stock
+        with self.assertNumQueries(4):
+            data = AnalyticsDashboardView().build(self.business)
+
+        self.assertEqual(data["sales"]["total_sales"], Decimal("30"))
+        self.assertEqual(data["sales"]["total_invoices"], 2)
+        self.assertEqual(data["sales"]["avg_invoice_value"], Decimal("15"))
+        self.assertEqual(data["purchases"]["total_purchases"], Decimal("40"))
+        self.assertEqual(data["purchases"]["total_invoices"], 1)
+        self.assertEqual(data["invoices"], {"pending": 1, "paid": 1, "overdue": 1})
+        self.assertEqual(data["cash"]["total_received"], Decimal("10"))
+        self.assertEqual(data["cash"]["total_receivables"], Decimal("20"))
+
+    def test_cached_snapshot_skips_the_metric_queries(self):
+        view = AnalyticsDashboardView.as_view()
+
+        def get(user):
+            request = APIRequestFactory().get("/dashboard/analytics/")
+            force_authenticate(request, user)
+            return view(request)
+
+        # A fresh user instance per request, as authentication would load
+        first_user = User.objects.get(pk=self.user.pk)
+        second_user = User.objects.get(pk=self.user.pk)
+        # membership lookup, business timezone (cold cache) and the metric
+        # queries, then the membership lookup only
+        with self.assertNumQueries(6):
+            first = get(first_user)
+        with self.assertNumQueries(1):
+            second = get(second_user)
+        self.assertEqual(first.data, second.data)
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHE, NOTIFICATION_QUEUE="memory", LIVE_UPDATES_BROKER="memory"
+)
+class LiveUpdatesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = Business.objects.create(name="Live Co")
+        create_accounts(cls.business, ["1001", "4001"])
+        cls.customer = Customer.objects.create(business=cls.business, name="Walk-in")
+        cls.product = Product.objects.create(
+            business=cls.business,
+            name="Widget",
+            sku="W-1",
+            price=10,
+            stock=12,
+            low_stock_alert=5,
+        )
+        cls.user = User.objects.create(username="watcher", email="watcher@x.io")
+        UserBusiness.objects.create(user=cls.user, business=cls.business, role="ADMIN")
+
+    def sell(self, quantity):
+        # The invoice prerender would need a Celery broker
+        with mock.patch("sales.signals.render_sale_invoice.delay"):
+            with self.captureOnCommitCallbacks(execute=True):
+                SaleManager.create_sale(
+                    [{"product": self.product, "quantity": quantity}],
+                    customer=self.customer,
+                    payment_method="cash",
+                )
+
+    async def test_sales_and_stock_deltas_reach_the_business_stream(self):
+        stream = LiveUpdateManager.stream(self.business.id, heartbeat=5)
+        self.assertEqual(await anext(stream), "retry: 3000\n\n")
+
+        await sync_to_async(self.sell)(8)
+        chunks = ""
+        while chunks.count("event: ") < 3:
+            chunks += await asyncio.wait_for(anext(stream), 1)
+        await stream.aclose()
+        self.assertEqual(live_broker().connections, 0)
+
+        events = {}
+        for frame in chunks.strip().split("\n\n"):
+            event, data = frame.split("\n")
+            events[event[len("event: ") :]] = json.loads(data[len("data: ") :])
+        self.assertEqual(events["sale"]["total_amount"], "80")
+        self.assertEqual(events["sale"]["today"]["sale_count"], 1)
+        self.assertEqual(
+            events["stock"]["products"],
+            [{"id": self.product.id, "sku": "W-1", "stock": 4, "is_low_stock": True}],
+        )
+        self.assertEqual(events["low_stock"]["products"][0]["id"], self.product.id)
+
+    def test_nothing_is_queried_for_unwatched_businesses(self):
+        with self.assertNumQueries(0):
+            LiveUpdateManager.publish_sale(Sale(business=self.business))
+        with self.captureOnCommitCallbacks() as callbacks:
+            InventoryManager.adjust_product_stock(self.product.id, -1)
+        with self.assertNumQueries(1):
+            for callback in callbacks:
+                callback()
+
+    def test_stream_requires_a_ticket_or_a_token_and_a_business(self):
+        view = LiveUpdatesView.as_view()
+
+        def stream(**params):
+            request = AsyncRequestFactory().get("/dashboard/live/", params)
+            return async_to_sync(view)(request)
+
+        def ticket(user):
+            request = APIRequestFactory().post("/dashboard/live/ticket/")
+            force_authenticate(request, user)
+            return LiveUpdatesTicketView.as_view()(request)
+
+        self.assertEqual(stream().status_code, 401)
+        # Access tokens are not accepted in the URL, where they would be logged
+        token = str(AccessToken.for_user(self.user))
+        self.assertEqual(stream(token=token).status_code, 401)
+
+        loner = User.objects.create(username="loner", email="loner@x.io")
+        self.assertEqual(ticket(loner).status_code, 403)
+
+        issued = ticket(self.user)
+        self.assertEqual(issued.status_code, 201)
+        response = stream(ticket=issued.data["ticket"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        # Single use
+        self.assertEqual(stream(ticket=issued.data["ticket"]).status_code, 401)
+
+        request = AsyncRequestFactory().get(
+            "/dashboard/live/", headers={"Authorization": f"Bearer {token}"}
+        )
+        self.assertEqual(async_to_sync(view)(request).status_code, 200)
+
+        # Under WSGI a stream would pin a worker, so it is refused outright
+        request = APIRequestFactory().get(
+            "/dashboard/live/", HTTP_AUTHORIZATION=f"Bearer {token}"
+        )
+        self.assertEqual(async_to_sync(view)(request).status_code, 503)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class SnapshotInvalidationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = Business.objects.create(name="Returns Co")
+        create_accounts(cls.business, ["1001", "4001"])
+        customer = Customer.objects.create(business=cls.business, name="Customer")
+        product = Product.objects.create(
+            business=cls.business, name="Widget", sku="W-1", price=10, stock=5
+        )
+        cls.sale = SaleManager.create_sale(
+            [{"product": product, "quantity": 2}],
+            customer=customer,
+            payment_method="cash",
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_returns_drop_the_business_snapshot(self):
+        DashboardSnapshotManager.get_or_build("dashboard", self.business.id, dict)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            SaleReturn.objects.create(
+                sale_item=self.sale.items.get(),
+                quantity=1,
+                refunded_amount=Decimal("10"),
+            )
+
+        self.assertIsNone(
+            cache.get(DashboardSnapshotManager._key("dashboard", self.business.id))
+        )
+        summary = DailySalesSummary.objects.get(business=self.business)
+        self.assertEqual(summary.return_count, 1)
+        self.assertEqual(summary.refunded_amount, Decimal("10"))
@@ -6,12 +6,18 @@ from .views import (
     ProductSalesChartView,
     CustomerSalesChartView,
     AnalyticsDashboardView,
+    DashboardSnapshotStatsView,
+    LiveUpdatesTicketView,
+    LiveUpdatesView,
+    TrialBalanceView,
+    ProfitAndLossView,
+    BalanceSheetView,
 )
 
 urlpatterns = [
     path("dashboard/", DashboardView.as_view(), name="dashboard"),
     path("reports/sales/export/", SalesCSVExportView.as_view(), name="sales_export"),
-    path("reports/sales/export/", SalesChartView.as_view(), name="sales_chart"),
+    path("reports/sales/chart/", SalesChartView.as_view(), name="sales_chart"),
     path(
         "reports/sales/chart/product-wise/",
         ProductSalesChartView.as_view(),
@@ -22,5 +28,27 @@ urlpatterns = [
         CustomerSalesChartView.as_view(),
         name="customer_sales_chart",
     ),
-    path("dashboard/", AnalyticsDashboardView.as_view(), name="analytics-dashboard"),
+    path(
+        "dashboard/analytics/",
+        AnalyticsDashboardView.as_view(),
+        name="analytics-dashboard",
+    ),
+    path(
+        "dashboard/snapshot-stats/",
+        DashboardSnapshotStatsView.as_view(),
+        name="dashboard-snapshot-stats",
+    ),
+    path("dashboard/live/", LiveUpdatesView.as_view(), name="dashboard-live"),
+    path(
+        "dashboard/live/ticket/",
+        LiveUpdatesTicketView.as_view(),
+        name="dashboard-live-ticket",
+    ),
+    path("reports/trial-balance/", TrialBalanceView.as_view(), name="trial-balance"),
+    path(
+        "reports/profit-and-loss/",
+        ProfitAndLossView.as_view(),
+        name="profit-and-loss",
+    ),
+    path("reports/balance-sheet/", BalanceSheetView.as_view(), name="balance-sheet"),
 ]
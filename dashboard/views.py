@@ -1,102 +1,177 @@
-import csv
-
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
-
-from django.utils.timezone import now
-from django.db.models import Sum
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.utils.timezone import localdate
 from django.db.models.functions import TruncDay
-from django.http import HttpResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.utils.dateparse import parse_date
-from django.db.models import Sum, F
-
+from django.views import View
+from django.db.models import (
+    Count,
+    DecimalField,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+    Value,
+)
+from django.db.models.functions import Coalesce
+
+from sales.managers.balance_manager import AccountBalanceManager
 from sales.models import Sale, SaleItem, Purchase
 from billing.models import Invoice, BillingPayment
 from products.models import Product
+from business.models import Business
+from common.dates import business_timezone, date_range_filter
+from common.errors import ERROR_DETAILS
+from common.exception import InsightHubException
+from common.renderers import EXPORT_RENDERERS
+from .managers.live_manager import LiveUpdateManager
+from .managers.snapshot_manager import DashboardSnapshotManager
+from .models import DailySalesSummary, ProductDailySales
+
+
+def _subquery_sum(queryset, field):
+    """``SUM(field)`` of a correlated queryset as a scalar subquery, 0 if empty"""
+    total = (
+        queryset.order_by()
+        .annotate(group=Value(1))
+        .values("group")
+        .annotate(total=Sum(field))
+        .values("total")
+    )
+    return Coalesce(
+        Subquery(total, output_field=DecimalField()),
+        Value(0, output_field=DecimalField()),
+    )
+
+
+def _user_business(request):
+    business = request.user.business
+    if business is None:
+        raise InsightHubException(
+            code="business_not_found",
+            detail=ERROR_DETAILS["business_not_found"],
+            status_code=status.HTTP_403_FORBIDDEN,
+        )
+    return business
 
 
 class DashboardView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        today = now().date()
+        business = _user_business(request)
+        data = DashboardSnapshotManager.get_or_build(
+            "dashboard", business.id, lambda: self.build(business)
+        )
+        return Response(data)
+
+    def build(self, business):
+        today = localdate(timezone=business_timezone(business.id))
         start_of_month = today.replace(day=1)
 
-        # Total sales today and this month
-        total_sales_today = (
-            Sale.objects.filter(sale_date__date=today).aggregate(
-                total=Sum("total_amount")
-            )["total"]
-            or 0
+        # Total sales today and this month, read from the daily rollup
+        summaries = (
+            DailySalesSummary.objects.for_business(business)
+            .filter(date__gte=start_of_month, date__lte=today)
+            .values("date", "payment_method")
+            .annotate(count=Sum("sale_count"), total=Sum("gross_amount"))
         )
-        total_sales_month = (
-            Sale.objects.filter(sale_date__date__gte=start_of_month).aggregate(
-                total=Sum("total_amount")
-            )["total"]
-            or 0
-        )
-
-        # Top-selling products
+        total_sales_today = 0
+        total_sales_month = 0
+        sales_today_by_payment_method = {}
+        for summary in summaries:
+            total_sales_month += summary["total"]
+            if summary["date"] == today:
+                total_sales_today += summary["total"]
+                sales_today_by_payment_method[summary["payment_method"]] = {
+                    "count": summary["count"],
+                    "total": summary["total"],
+                }
+
+        # Top-selling products this month, over the same days as the totals
         top_products = (
-            SaleItem.objects.values("product__name")
+            ProductDailySales.objects.for_business(business)
+            .filter(date__gte=start_of_month, date__lte=today)
+            .values("product__name")
             .annotate(quantity_sold=Sum("quantity"))
             .order_by("-quantity_sold")[:5]
         )
 
         # Low stock products
-        low_stock = Product.objects.filter(inventory_quantity__lt=5).values(
-            "name", "inventory_quantity"
+        low_stock = (
+            Product.objects.for_business(business)
+            .filter(is_low_stock=True)
+            .values("name", "stock")
         )
 
-        return Response(
-            {
-                "total_sales_today": total_sales_today,
-                "total_sales_month": total_sales_month,
-                "top_products": list(top_products),
-                "low_stock": list(low_stock),
-            }
-        )
+        return {
+            "total_sales_today": total_sales_today,
+            "total_sales_month": total_sales_month,
+            "sales_today_by_payment_method": sales_today_by_payment_method,
+            "top_products": list(top_products),
+            "low_stock": list(low_stock),
+        }
 
 
 class SalesCSVExportView(APIView):
+    """Sales line items as CSV, or Parquet / Arrow with ?format=parquet|arrow"""
+
     permission_classes = [IsAuthenticated]
+    renderer_classes = EXPORT_RENDERERS
+    chunk_size = 2000
+    columns = [
+        ("Sale ID", "int"),
+        ("Date", "timestamp"),
+        ("Customer", "string"),
+        ("Product", "string"),
+        ("Quantity", "int"),
+        ("Price", "decimal"),
+        ("Subtotal", "decimal"),
+    ]
 
     def get(self, request):
-        start = parse_date(request.GET.get("start"))
-        end = parse_date(request.GET.get("end"))
+        start = parse_date(request.GET.get("start", ""))
+        end = parse_date(request.GET.get("end", ""))
 
         if not start or not end:
             return Response({"error": "start and end date required"}, status=400)
 
-        sales = Sale.objects.filter(
-            sale_date__date__gte=start, sale_date__date__lte=end
-        ).prefetch_related("items", "customer")
-
-        # Generate CSV
-        response = HttpResponse(content_type="text/csv")
-        response["Content-Disposition"] = (
-            f'attachment; filename="sales_{start}_{end}.csv"'
+        business = _user_business(request)
+        tz = business_timezone(business.id)
+
+        # One flat item/sale/customer/product join read through a server-side
+        # cursor, so memory stays flat however long the range is
+        items = (
+            SaleItem.objects.for_business(business)
+            .filter(**date_range_filter("sale__sale_date", start, end, tz))
+            .order_by("sale_id", "id")
+            .values_list(
+                "sale_id",
+                "sale__sale_date",
+                Coalesce("sale__customer__name", Value("Guest")),
+                Coalesce("product__name", Value("N/A")),
+                "quantity",
+                "price",
+                "subtotal",
+            )
         )
-        writer = csv.writer(response)
-        writer.writerow(
-            ["Sale ID", "Date", "Customer", "Product", "Quantity", "Price", "Subtotal"]
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            renderer.stream(self.columns, items.iterator(chunk_size=self.chunk_size)),
+            content_type=renderer.media_type,
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="sales_{start}_{end}.{renderer.extension}"'
         )
-
-        for sale in sales:
-            for item in sale.items.all():
-                writer.writerow(
-                    [
-                        sale.id,
-                        sale.sale_date.strftime("%Y-%m-%d %H:%M"),
-                        sale.customer.name if sale.customer else "Guest",
-                        item.product.name if item.product else "N/A",
-                        item.quantity,
-                        item.price,
-                        item.subtotal,
-                    ]
-                )
-
         return response
 
 
@@ -110,9 +185,13 @@ class SalesChartView(APIView):
         if not start or not end:
             return Response({"error": "start and end date required"}, status=400)
 
+        business = _user_business(request)
+        tz = business_timezone(business.id)
+
         sales_by_day = (
-            Sale.objects.filter(sale_date__date__gte=start, sale_date__date__lte=end)
-            .annotate(day=TruncDay("sale_date"))
+            Sale.objects.for_business(business)
+            .filter(**date_range_filter("sale_date", start, end, tz))
+            .annotate(day=TruncDay("sale_date", tzinfo=tz))
             .values("day")
             .annotate(total=Sum("total_amount"))
             .order_by("day")
@@ -134,15 +213,13 @@ class ProductSalesChartView(APIView):
         if not start or not end:
             return Response({"error": "start and end date required"}, status=400)
 
-        # Aggregate sale items by day and product
+        # Aggregate product sales facts by day and product
         sales_data = (
-            SaleItem.objects.filter(
-                sale__sale_date__date__gte=start, sale__sale_date__date__lte=end
-            )
-            .annotate(day=TruncDay("sale__sale_date"))
-            .values("day", "product__name")
-            .annotate(total=Sum("subtotal"))
-            .order_by("day")
+            ProductDailySales.objects.for_business(_user_business(request))
+            .filter(date__gte=start, date__lte=end)
+            .values("date", "product__name")
+            .annotate(total=Sum("revenue"))
+            .order_by("date")
         )
 
         # Prepare data structure for frontend charts
@@ -156,7 +233,7 @@ class ProductSalesChartView(APIView):
         # }
 
         # Extract sorted unique dates and products
-        dates = sorted({entry["day"].date() for entry in sales_data})
+        dates = sorted({entry["date"] for entry in sales_data})
         products = sorted({entry["product__name"] for entry in sales_data})
 
         # Initialize dataset dict: {product: [0]*len(dates)}
@@ -167,7 +244,7 @@ class ProductSalesChartView(APIView):
 
         # Fill data_map
         for entry in sales_data:
-            d = entry["day"].date()
+            d = entry["date"]
             p = entry["product__name"]
             idx = date_index[d]
             data_map[p][idx] = float(
@@ -190,9 +267,13 @@ class CustomerSalesChartView(APIView):
             return Response({"error": "start and end date required"}, status=400)
 
         # Aggregate sales by day and customer
+        business = _user_business(request)
+        tz = business_timezone(business.id)
+
         sales_data = (
-            Sale.objects.filter(sale_date__date__gte=start, sale_date__date__lte=end)
-            .annotate(day=TruncDay("sale_date"))
+            Sale.objects.for_business(business)
+            .filter(**date_range_filter("sale_date", start, end, tz))
+            .annotate(day=TruncDay("sale_date", tzinfo=tz))
             .values("day", "customer__name")
             .annotate(total=Sum("total_amount"))
             .order_by("day")
@@ -220,69 +301,80 @@ class AnalyticsDashboardView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, *args, **kwargs):
-        business = request.user.business  # assuming each user is linked to a business
-
-        # ----- Sales Metrics -----
-        sales = Sale.objects.filter(customer__business=business)
-        total_sales = sales.aggregate(total=Sum("total_amount"))["total"] or 0
-        total_sale_invoices = Invoice.objects.filter(
-            sale__customer__business=business
-        ).count()
-        avg_invoice_value = (
-            total_sales / total_sale_invoices if total_sale_invoices else 0
+        business = _user_business(request)
+        data = DashboardSnapshotManager.get_or_build(
+            "analytics", business.id, lambda: self.build(business)
         )
+        return Response(data)
 
-        # Top Selling Products
-        top_products = (
-            SaleItem.objects.filter(sale__customer__business=business)
-            .values("product__name")
+    def build(self, business):
+        # ----- Sales, Purchases & Cash -----
+        # One query: each total is a correlated subquery on the business row
+        totals = (
+            Business.objects.filter(pk=business.pk)
             .annotate(
-                total_qty=Sum("quantity"), total_sales=Sum(F("quantity") * F("price"))
+                total_sales=_subquery_sum(
+                    Sale.objects.filter(business=OuterRef("pk")),
+                    "total_amount",
+                ),
+                total_purchases=_subquery_sum(
+                    Purchase.objects.filter(business=OuterRef("pk")), "total_amount"
+                ),
+                total_payments_received=_subquery_sum(
+                    BillingPayment.objects.filter(
+                        invoice__business=OuterRef("pk"),
+                        invoice__sale__isnull=False,
+                        is_confirmed=True,
+                    ),
+                    "amount",
+                ),
             )
-            .order_by("-total_qty")[:5]
+            .values("total_sales", "total_purchases", "total_payments_received")
+            .get()
+        )
+
+        # ----- Invoices & Receivables -----
+        # One pass over the business's invoices with conditional aggregates
+        invoices = Invoice.objects.for_business(business).aggregate(
+            sale_invoices=Count("id", filter=Q(sale__isnull=False)),
+            purchase_invoices=Count("id", filter=Q(purchase__isnull=False)),
+            pending=Count("id", filter=Q(status="pending")),
+            paid=Count("id", filter=Q(status="paid")),
+            overdue=Count("id", filter=Q(status="overdue")),
+            receivables=Coalesce(
+                Sum("total_amount", filter=Q(status="pending")),
+                Value(0, output_field=DecimalField()),
+            ),
         )
 
-        # ----- Purchase Metrics -----
-        purchases = Purchase.objects.filter(business=business)
-        total_purchases = purchases.aggregate(total=Sum("total_amount"))["total"] or 0
-        total_purchase_invoices = Invoice.objects.filter(
-            purchase__business=business
-        ).count()
+        total_sales = totals["total_sales"]
+        total_sale_invoices = invoices["sale_invoices"]
+        avg_invoice_value = (
+            total_sales / total_sale_invoices if total_sale_invoices else 0
+        )
+        total_purchases = totals["total_purchases"]
+        total_purchase_invoices = invoices["purchase_invoices"]
         avg_purchase_value = (
             total_purchases / total_purchase_invoices if total_purchase_invoices else 0
         )
 
-        # ----- Invoices & Payments -----
-        pending_invoices = Invoice.objects.filter(
-            business=business, status="pending"
-        ).count()
-        paid_invoices = Invoice.objects.filter(business=business, status="paid").count()
-        overdue_invoices = Invoice.objects.filter(
-            business=business, status="overdue"
-        ).count()
-
-        # ----- Stock Levels -----
-        low_stock_products = Product.objects.filter(
-            business=business, stock__lte=F("low_stock_alert")
-        ).values("name", "stock", "low_stock_alert")
-
-        # ----- Cash & Receivables -----
-        total_payments_received = (
-            Payment.objects.filter(
-                invoice__sale__customer__business=business, is_confirmed=True
-            ).aggregate(total=Sum("amount"))["total"]
-            or 0
+        # Top Selling Products
+        top_products = (
+            ProductDailySales.objects.for_business(business)
+            .values("product__name")
+            .annotate(total_qty=Sum("quantity"), total_sales=Sum("revenue"))
+            .order_by("-total_qty")[:5]
         )
 
-        total_receivables = (
-            Invoice.objects.filter(business=business, status="pending").aggregate(
-                total=Sum("total_amount")
-            )["total"]
-            or 0
+        # ----- Stock Levels -----
+        low_stock_products = (
+            Product.objects.for_business(business)
+            .filter(is_low_stock=True)
+            .values("name", "stock", "low_stock_alert")
         )
 
         # ----- Response -----
-        data = {
+        return {
             "sales": {
                 "total_sales": total_sales,
                 "total_invoices": total_sale_invoices,
@@ -295,15 +387,134 @@ class AnalyticsDashboardView(APIView):
                 "avg_purchase_value": avg_purchase_value,
             },
             "invoices": {
-                "pending": pending_invoices,
-                "paid": paid_invoices,
-                "overdue": overdue_invoices,
+                "pending": invoices["pending"],
+                "paid": invoices["paid"],
+                "overdue": invoices["overdue"],
             },
             "stock": list(low_stock_products),
             "cash": {
-                "total_received": total_payments_received,
-                "total_receivables": total_receivables,
+                "total_received": totals["total_payments_received"],
+                "total_receivables": invoices["receivables"],
             },
         }
 
-        return Response(data)
+
+class DashboardSnapshotStatsView(APIView):
+    """Hit/miss counters of the cached dashboard snapshots"""
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(DashboardSnapshotManager.stats())
+
+
+class LiveUpdatesTicketView(APIView):
+    """
+    Single-use ticket for opening the live updates stream from a browser,
+    valid for LIVE_UPDATES_TICKET_SECONDS.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        business = _user_business(request)
+        return Response(
+            {
+                "ticket": LiveUpdateManager.issue_ticket(business.id),
+                "expires_in": settings.LIVE_UPDATES_TICKET_SECONDS,
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class LiveUpdatesView(View):
+    """
+    Server-sent events stream of the user's business: new sales with the
+    day's totals, stock levels and low-stock crossings as they commit.
+
+    A plain async view, so an open stream holds no worker thread under ASGI
+    (see ASGI_APPLICATION). Under WSGI every stream would hold a worker for
+    as long as it is open, so it is refused there. EventSource cannot send
+    headers; browsers pass a ticket from LiveUpdatesTicketView as
+    ``?ticket=`` instead of the access token.
+    """
+
+    async def get(self, request):
+        if not isinstance(request, ASGIRequest):
+            return JsonResponse(
+                {"error": "Live updates are only served by the ASGI application."},
+                status=503,
+            )
+        try:
+            business_id = await sync_to_async(self.business_id)(request)
+        except AuthenticationFailed as exc:
+            return JsonResponse({"error": str(exc.detail)}, status=401)
+        if business_id is None:
+            return JsonResponse(
+                {"error": ERROR_DETAILS["business_not_found"]}, status=403
+            )
+
+        response = StreamingHttpResponse(
+            LiveUpdateManager.stream(business_id), content_type="text/event-stream"
+        )
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    @staticmethod
+    def business_id(request):
+        ticket = request.GET.get("ticket")
+        if ticket:
+            business_id = LiveUpdateManager.redeem_ticket(ticket)
+            if business_id is None:
+                raise AuthenticationFailed("Invalid or expired ticket.")
+            return business_id
+
+        user, _ = JWTAuthentication().authenticate(request) or (None, None)
+        if user is None:
+            raise AuthenticationFailed("Authentication credentials were not provided.")
+        business = user.business
+        return business.id if business else None
+
+
+class TrialBalanceView(APIView):
+    """Debit/credit balance of every account, now or at the end of ?date="""
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        as_of = parse_date(request.GET.get("date", ""))
+        if request.GET.get("date") and not as_of:
+            return Response({"error": "date must be YYYY-MM-DD"}, status=400)
+
+        business = _user_business(request)
+        return Response(AccountBalanceManager.trial_balance(business.id, as_of))
+
+
+class ProfitAndLossView(APIView):
+    """Income and expenses booked from ?start= to ?end= (inclusive)"""
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        start = parse_date(request.GET.get("start", ""))
+        end = parse_date(request.GET.get("end", ""))
+        if not start or not end:
+            return Response({"error": "start and end date required"}, status=400)
+
+        business = _user_business(request)
+        return Response(AccountBalanceManager.profit_and_loss(business.id, start, end))
+
+
+class BalanceSheetView(APIView):
+    """Assets, liabilities and equity, now or at the end of ?date="""
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        as_of = parse_date(request.GET.get("date", ""))
+        if request.GET.get("date") and not as_of:
+            return Response({"error": "date must be YYYY-MM-DD"}, status=400)
+
+        business = _user_business(request)
+        return Response(AccountBalanceManager.balance_sheet(business.id, as_of))
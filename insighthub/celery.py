@@ -1,5 +1,6 @@
 import os
 from celery import Celery
+from celery.schedules import crontab
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "insighthub.settings")
 
@@ -20,4 +21,21 @@ app.conf.beat_schedule = {
         "task": "insighthub.tasks.process_failed_payloads",
         "schedule": 180.0,
     },
+    # Hourly, as months end at different times in each business's timezone
+    "close-account-balances": {
+        "task": "sales.tasks.close_account_balances",
+        "schedule": crontab(minute=5),
+    },
+    "reconcile-low-stock": {
+        "task": "products.tasks.reconcile_low_stock",
+        "schedule": crontab(minute="*/15"),
+    },
+    "check-sales-milestones": {
+        "task": "dashboard.tasks.check_sales_milestones",
+        "schedule": crontab(minute="*/5"),
+    },
+    "flush-notifications": {
+        "task": "products.tasks.flush_notifications",
+        "schedule": 30.0,
+    },
 }
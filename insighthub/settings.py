@@ -33,7 +33,8 @@ ALLOWED_HOSTS = []
 
 # Application definition
 
-INSTALLED_APPS = [
+# Apps whose tables live in the shared "public" schema in every layout
+SHARED_APPS = [
     "django.contrib.admin",
     "django.contrib.auth",
     "django.contrib.contenttypes",
@@ -45,15 +46,22 @@ INSTALLED_APPS = [
     "django_extensions",
     # apps
     "accounts",
-    "billing",
     "business",
     "common",
+]
+
+# Apps holding per-business data; one copy per schema with SCHEMA_PER_TENANT
+TENANT_APPS = [
+    "django.contrib.contenttypes",
+    "billing",
     "customers",
     "dashboard",
     "products",
     "sales",
 ]
 
+INSTALLED_APPS = SHARED_APPS + [app for app in TENANT_APPS if app not in SHARED_APPS]
+
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -70,7 +78,7 @@ ROOT_URLCONF = "insighthub.urls"
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
-        "DIRS": [],
+        "DIRS": [os.path.join(BASE_DIR, "templates")],
         "APP_DIRS": True,
         "OPTIONS": {
             "context_processors": [
@@ -100,6 +108,10 @@ REST_FRAMEWORK = {
 }
 
 WSGI_APPLICATION = "insighthub.wsgi.application"
+# The live dashboard stream (dashboard/live/) is an async view and is only
+# served under ASGI, e.g. `uvicorn insighthub.asgi:application` or gunicorn
+# with uvicorn's worker class. Under WSGI it answers 503.
+ASGI_APPLICATION = "insighthub.asgi.application"
 
 
 # Database
@@ -115,6 +127,22 @@ DATABASES = {
     }
 }
 
+# Optional schema-per-business layout (django-tenants). Each business gets a
+# PostgreSQL schema with its own TENANT_APPS tables, resolved from the request
+# host through tenants.Domain. See `manage.py migrate_to_schemas`.
+SCHEMA_PER_TENANT = os.environ.get("SCHEMA_PER_TENANT", "False") == "True"
+
+if SCHEMA_PER_TENANT:
+    SHARED_APPS = ["django_tenants", "tenants"] + SHARED_APPS
+    INSTALLED_APPS = ["django_tenants", "tenants"] + INSTALLED_APPS
+    DATABASES["default"]["ENGINE"] = "django_tenants.postgresql_backend"
+    DATABASE_ROUTERS = ("django_tenants.routers.TenantSyncRouter",)
+    MIDDLEWARE.insert(0, "django_tenants.middleware.main.TenantMainMiddleware")
+    TENANT_MODEL = "tenants.Tenant"
+    TENANT_DOMAIN_MODEL = "tenants.Domain"
+    # Hosts without a tenant (login, admin) are served from the public schema
+    SHOW_PUBLIC_IF_NO_TENANT_FOUND = True
+
 CACHES = {
     "default": {
         "BACKEND": "django_redis.cache.RedisCache",
@@ -182,3 +210,30 @@ SIMPLE_JWT = {
     "SIGNING_KEY": SECRET_KEY,  # Use Django's SECRET_KEY for signing tokens
     "AUTH_HEADER_TYPES": ("Bearer",),  # Authorization type for header
 }
+
+# Run Celery tasks inline (tests, local development without a worker)
+CELERY_TASK_ALWAYS_EAGER = os.environ.get("CELERY_TASK_ALWAYS_EAGER", "False") == "True"
+CELERY_TASK_EAGER_PROPAGATES = CELERY_TASK_ALWAYS_EAGER
+
+# Processes rendering invoice PDFs for the batch endpoint, and its size limit
+INVOICE_PDF_WORKERS = int(os.environ.get("INVOICE_PDF_WORKERS", os.cpu_count() or 1))
+INVOICE_PDF_BATCH_LIMIT = int(os.environ.get("INVOICE_PDF_BATCH_LIMIT", 500))
+
+# Notification fan-out: "redis" (a list on the cache server) or "memory"
+NOTIFICATION_QUEUE = os.environ.get("NOTIFICATION_QUEUE", "redis")
+# Repeats of an alert to the same user within this window are dropped
+NOTIFICATION_COALESCE_SECONDS = 60 * 60
+NOTIFICATION_UNREAD_CACHE_SECONDS = 60 * 60
+# Daily sales totals announced to the business's users when reached
+SALES_MILESTONES = [1000, 5000, 10000, 50000, 100000]
+
+# Live dashboard stream: "redis" (pub/sub on the cache server) or "memory"
+LIVE_UPDATES_BROKER = os.environ.get("LIVE_UPDATES_BROKER", "redis")
+LIVE_UPDATES_REDIS_URL = os.environ.get(
+    "LIVE_UPDATES_REDIS_URL", CACHES["default"]["LOCATION"]
+)
+# Frames a stream may fall behind by before it is told to resync
+LIVE_UPDATES_QUEUE_SIZE = 100
+LIVE_UPDATES_HEARTBEAT_SECONDS = 15
+# Lifetime of the single-use ticket a browser opens its stream with
+LIVE_UPDATES_TICKET_SECONDS = 30
@@ -1,7 +1,19 @@
-from kafka import KafkaConsumer
 import json
+import random
+import time
+
+from kafka import KafkaConsumer
 from django.core.management.base import BaseCommand
+from django.db import transaction
+from products.managers.inventory_manager import InventoryManager
 from products.models import Product
+from products.stock_updates import (
+    InMemoryConsumer,
+    apply_batch,
+    next_batch,
+    parse_message,
+)
+from business.models import Business
 
 
 KAFKA_TOPIC = "stock_updates"
@@ -11,33 +23,133 @@ KAFKA_SERVER = "localhost:9092"
 class Command(BaseCommand):
     help = "Consumes stock updates from Kafka and updates Product stock"
 
-    def handle(self, *args, **kwargs):
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch",
+            action="store_true",
+            help="Apply messages in batches with manual offset commits",
+        )
+        parser.add_argument(
+            "--max-records",
+            type=int,
+            default=500,
+            help="Batch mode: messages per batch (default: 500)",
+        )
+        parser.add_argument(
+            "--max-wait-ms",
+            type=int,
+            default=1000,
+            help="Batch mode: longest wait for a batch to fill (default: 1000)",
+        )
+        parser.add_argument(
+            "--benchmark",
+            type=int,
+            metavar="MESSAGES",
+            help="Measure throughput of both modes against an in-process fake "
+            "consumer instead of Kafka (rolled back afterwards)",
+        )
+
+    def handle(self, *args, **options):
+        if options["benchmark"]:
+            return self.benchmark(options)
+
         consumer = KafkaConsumer(
             KAFKA_TOPIC,
             bootstrap_servers=KAFKA_SERVER,
             value_deserializer=lambda m: json.loads(m.decode("utf-8")),
             auto_offset_reset="earliest",
-            enable_auto_commit=True,
+            enable_auto_commit=not options["batch"],
             group_id="stock-update-group",
         )
 
         self.stdout.write(self.style.SUCCESS("✅ Listening to stock updates..."))
 
+        if options["batch"]:
+            self.consume_batches(
+                consumer, options["max_records"], options["max_wait_ms"]
+            )
+        else:
+            self.consume_one_by_one(consumer)
+
+    def consume_one_by_one(self, consumer, verbose=True):
         for message in consumer:
             data = message.value
-            sku = data.get("sku")
-            stock = data.get("stock")
-
-            if not sku or stock is None:
+            parsed = parse_message(data)
+            if parsed is None:
                 self.stdout.write(self.style.WARNING(f"⚠️ Invalid message: {data}"))
                 continue
 
-            try:
-                product = Product.objects.get(sku=sku)
-                product.stock = stock
-                product.save(update_fields=["stock"])
+            (business, sku), stock = parsed
+            # Same lookup as batch mode: scoped to the message's business, or
+            # to the one business holding the SKU when it names none
+            if InventoryManager.set_stock_by_sku({(business, sku): stock}):
+                self.warn_missing(business, sku)
+            elif verbose:
                 self.stdout.write(f"✔️ Updated {sku} to stock {stock}")
-            except Product.DoesNotExist:
+
+    def consume_batches(self, consumer, max_records, max_wait_ms, forever=True):
+        while True:
+            records = next_batch(consumer, max_records, max_wait_ms)
+            if not records:
+                if forever:
+                    continue
+                return
+
+            result = apply_batch(consumer, records)
+            for data in result.invalid:
+                self.stdout.write(self.style.WARNING(f"⚠️ Invalid message: {data}"))
+            for business, sku in result.missing:
+                self.warn_missing(business, sku)
+            if forever:
                 self.stdout.write(
-                    self.style.WARNING(f"❌ Product with SKU '{sku}' not found.")
+                    f"✔️ Applied {result.applied} stock levels from "
+                    f"{result.received} messages"
                 )
+
+    def warn_missing(self, business, sku):
+        self.stdout.write(
+            self.style.WARNING(
+                f"❌ Product with SKU '{sku}' not found"
+                + (f" for business {business}." if business else ".")
+            )
+        )
+
+    def benchmark(self, options):
+        count = options["benchmark"]
+        with transaction.atomic():
+            business = Business.objects.create(name="Stock benchmark business")
+            products = Product.objects.bulk_create(
+                [
+                    Product(business=business, name=f"Product {i}", sku=f"SB-{i}")
+                    for i in range(min(count, 1000))
+                ]
+            )
+            messages = [
+                {
+                    "business": business.id,
+                    "sku": random.choice(products).sku,
+                    "stock": random.randint(0, 500),
+                }
+                for _ in range(count)
+            ]
+
+            started = time.perf_counter()
+            self.consume_one_by_one(InMemoryConsumer(messages), verbose=False)
+            single = time.perf_counter() - started
+
+            started = time.perf_counter()
+            self.consume_batches(
+                InMemoryConsumer(messages),
+                options["max_records"],
+                options["max_wait_ms"],
+                forever=False,
+            )
+            batched = time.perf_counter() - started
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"one by one: {count / single:,.0f} messages/s")
+        self.stdout.write(f"batched:    {count / batched:,.0f} messages/s")
+        self.stdout.write(
+            self.style.SUCCESS(f"✅ Batch mode is {single / batched:.1f}x faster.")
+        )
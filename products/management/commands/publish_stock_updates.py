@@ -32,6 +32,8 @@ class Command(BaseCommand):
                     "sku": row["sku"],
                     "stock": int(row["stock"]),
                 }
+                if row.get("business"):
+                    data["business"] = int(row["business"])
                 producer.send(KAFKA_TOPIC, value=data)
                 count += 1
 
@@ -0,0 +1,216 @@
+import csv
+import time
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from typing import Callable, Dict, Iterable, List, Optional
+
+from django.db import DatabaseError, transaction
+
+from accounts.managers.base_manager import BaseModelManager
+from business.models import Business
+from products.managers.inventory_manager import InventoryManager
+from products.models import Product, ProductCategory
+from products.signals import stock_changed
+
+
+CSV_COLUMNS = [
+    "name",
+    "sku",
+    "price",
+    "stock",
+    "low_stock_alert",
+    "category",
+    "business",
+]
+
+
+class ProductImportManager(BaseModelManager):
+    """
+    Streaming product CSV importer.
+
+    Rows are read lazily and processed in chunks: each chunk is validated in
+    bulk (a couple of IN queries for businesses and categories not seen
+    before), existing (business, sku) pairs are prefetched to tell creates
+    from updates, and the chunk is written with a single upsert. Like every
+    other stock write, the chunk's low stock flags are then refreshed and
+    its products announced through ``stock_changed``.
+    """
+
+    model = Product
+    chunk_size = 1000
+    update_fields = [
+        "name",
+        "price",
+        "stock",
+        "low_stock_alert",
+        "category",
+        "updated_on",
+    ]
+    converters = [
+        ("price", "price", Decimal),
+        ("stock", "stock", int),
+        ("low_stock_alert", "low_stock_alert", int),
+        ("category", "category_id", int),
+        ("business", "business_id", int),
+    ]
+
+    @classmethod
+    def parse_row(cls, row: Dict[str, str]) -> dict:
+        missing = [
+            column for column in CSV_COLUMNS if not (row.get(column) or "").strip()
+        ]
+        if missing:
+            raise ValueError(f"missing {', '.join(missing)}")
+        data = {"name": row["name"].strip(), "sku": row["sku"].strip()}
+        for column, field, convert in cls.converters:
+            try:
+                data[field] = convert(row[column].strip())
+            except (InvalidOperation, ValueError):
+                raise ValueError(f"invalid {column} {row[column]!r}")
+        return data
+
+    @classmethod
+    def import_csv(
+        cls,
+        lines: Iterable[str],
+        chunk_size: Optional[int] = None,
+        on_chunk: Optional[Callable[[dict], None]] = None,
+        business_id: Optional[int] = None,
+    ) -> dict:
+        """
+        Import products from an iterable of CSV lines (e.g. a text-mode
+        upload). Rows whose ``business`` is not ``business_id`` (the
+        uploader's) fail; None accepts any existing business. ``on_chunk``
+        is called with the running totals after every chunk. Returns
+        created/updated/failed counts, row-level errors and the throughput
+        in rows per second.
+        """
+        started = time.perf_counter()
+        result = {"rows": 0, "created": 0, "updated": 0, "failed": 0, "errors": []}
+        known_businesses, known_categories = set(), {}
+
+        reader = enumerate(csv.DictReader(lines), start=1)
+        while True:
+            chunk = list(islice(reader, chunk_size or cls.chunk_size))
+            if not chunk:
+                break
+            cls._import_chunk(
+                chunk, result, known_businesses, known_categories, business_id
+            )
+            if on_chunk:
+                on_chunk(result)
+
+        elapsed = time.perf_counter() - started
+        result["rows_per_second"] = round(result["rows"] / elapsed) if elapsed else 0
+        return result
+
+    @classmethod
+    def _import_chunk(
+        cls, chunk, result, known_businesses, known_categories, business_id=None
+    ):
+        result["rows"] += len(chunk)
+
+        parsed = {}
+        for line, row in chunk:
+            try:
+                data = cls.parse_row(row)
+            except ValueError as err:
+                cls._fail(result, line, err)
+                continue
+            if business_id is not None and data["business_id"] != business_id:
+                cls._fail(
+                    result,
+                    line,
+                    f"business {data['business_id']} is not the uploader's business",
+                )
+                continue
+            parsed[line] = data
+
+        business_ids = {data["business_id"] for data in parsed.values()}
+        new_businesses = business_ids - known_businesses
+        if new_businesses:
+            known_businesses.update(
+                Business.objects.filter(pk__in=new_businesses).values_list(
+                    "id", flat=True
+                )
+            )
+        category_ids = {data["category_id"] for data in parsed.values()}
+        new_categories = category_ids - known_categories.keys()
+        if new_categories:
+            known_categories.update(
+                ProductCategory.objects.filter(pk__in=new_categories).values_list(
+                    "id", "business_id"
+                )
+            )
+
+        # Later rows for the same (business, sku) win, as they would row by row
+        rows = {}
+        for line, data in parsed.items():
+            if data["business_id"] not in known_businesses:
+                cls._fail(
+                    result, line, f"business {data['business_id']} does not exist"
+                )
+            elif data["category_id"] not in known_categories:
+                cls._fail(
+                    result, line, f"category {data['category_id']} does not exist"
+                )
+            elif known_categories[data["category_id"]] != data["business_id"]:
+                cls._fail(
+                    result,
+                    line,
+                    f"category {data['category_id']} does not belong to business "
+                    f"{data['business_id']}",
+                )
+            else:
+                rows[(data["business_id"], data["sku"])] = (line, data)
+        if not rows:
+            return
+
+        existing = set(
+            cls.model.objects.filter(
+                business_id__in={business_id for business_id, _ in rows},
+                sku__in={sku for _, sku in rows},
+            ).values_list("business_id", "sku")
+        )
+
+        products = [cls.model(**data) for _, data in rows.values()]
+        try:
+            with transaction.atomic():
+                cls.model.objects.bulk_create(
+                    products,
+                    update_conflicts=True,
+                    unique_fields=["business", "sku"],
+                    update_fields=cls.update_fields,
+                )
+                product_ids = cls._upserted_ids(products, rows.keys())
+                InventoryManager.refresh_low_stock(product_ids)
+        except DatabaseError as err:
+            for line, _ in rows.values():
+                cls._fail(result, line, err)
+            return
+        stock_changed.send(sender=cls.model, product_ids=product_ids)
+
+        updated = len(existing & rows.keys())
+        result["updated"] += updated
+        result["created"] += len(rows) - updated
+
+    @classmethod
+    def _upserted_ids(cls, products, keys) -> List[int]:
+        product_ids = [product.pk for product in products]
+        if None not in product_ids:
+            return product_ids
+        # Backends that do not return the rows of an upsert (e.g. MySQL)
+        keys = set(keys)
+        return [
+            product_id
+            for product_id, business_id, sku in cls.model.objects.filter(
+                business_id__in={business_id for business_id, _ in keys},
+                sku__in={sku for _, sku in keys},
+            ).values_list("id", "business_id", "sku")
+            if (business_id, sku) in keys
+        ]
+
+    @staticmethod
+    def _fail(result, line, error):
+        result["failed"] += 1
+        result["errors"].append({"row": line, "error": str(error)})
@@ -0,0 +1,190 @@
+from collections import defaultdict
+from functools import reduce
+from operator import or_
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import BooleanField, Case, F, IntegerField, Q, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from accounts.managers.base_manager import BaseModelManager
+from products.models import Product, low_stock_condition
+from products.signals import low_stock_crossed, stock_changed
+
+
+class InventoryManager(BaseModelManager):
+    """
+    Single write path for product stock.
+
+    Changes are applied as ``stock = stock + n`` UPDATEs, so concurrent
+    terminals never lose each other's updates and only the stock column is
+    written. Every write also brings ``is_low_stock`` up to date for the
+    products it touched and announces the ones that just went low.
+    """
+
+    model = Product
+    batch_size = 1000
+
+    @classmethod
+    def adjust_stock(
+        cls, deltas: Dict[int, int], clamp: bool = False, guard: bool = False
+    ) -> int:
+        """
+        Apply ``{product_id: delta}`` to every product in one UPDATE.
+
+        ``clamp`` floors the resulting stock at zero. ``guard`` rejects the
+        whole change with ``ValueError("insufficient_stock")`` if any product
+        would go below zero. Services are never stock tracked and are skipped.
+        Returns the number of products updated.
+        """
+        deltas = {
+            product_id: delta
+            for product_id, delta in deltas.items()
+            if product_id and delta
+        }
+        if not deltas:
+            return 0
+
+        if len(deltas) == 1:
+            change = Value(next(iter(deltas.values())))
+        else:
+            change = Case(
+                *[
+                    When(pk=product_id, then=Value(delta))
+                    for product_id, delta in deltas.items()
+                ],
+                default=Value(0),
+                output_field=IntegerField(),
+            )
+        new_stock = F("stock") + change
+        if clamp:
+            new_stock = Greatest(new_stock, 0)
+
+        products = cls.model.objects.filter(pk__in=deltas, is_service=False)
+        with transaction.atomic():
+            if guard:
+                allowed = [
+                    Q(pk=product_id, stock__gte=-delta)
+                    for product_id, delta in deltas.items()
+                    if delta < 0
+                ]
+                increments = [
+                    product_id for product_id, delta in deltas.items() if delta > 0
+                ]
+                if increments:
+                    allowed.append(Q(pk__in=increments))
+                expected = products.count()
+                updated = products.filter(reduce(or_, allowed)).update(
+                    stock=new_stock, updated_on=timezone.now()
+                )
+                if updated != expected:
+                    raise ValueError("insufficient_stock")
+            else:
+                updated = products.update(stock=new_stock, updated_on=timezone.now())
+            if updated:
+                cls.refresh_low_stock(list(deltas))
+
+        if updated:
+            stock_changed.send(sender=cls.model, product_ids=list(deltas))
+        return updated
+
+    @classmethod
+    def adjust_product_stock(cls, product_id: int, delta: int, **kwargs) -> int:
+        return cls.adjust_stock({product_id: delta}, **kwargs)
+
+    @classmethod
+    def set_stock_by_sku(
+        cls, stock_by_key: Dict[Tuple[Optional[int], str], int]
+    ) -> List[Tuple[Optional[int], str]]:
+        """
+        Overwrite stock levels keyed by ``(business_id, sku)`` with one IN
+        query and batched ``bulk_update``. A ``None`` business matches the
+        SKU only if exactly one business has it. Returns the keys that could
+        not be resolved to a product.
+        """
+        if not stock_by_key:
+            return []
+
+        by_key, by_sku = {}, defaultdict(list)
+        products = cls.model.objects.filter(
+            sku__in={sku for _, sku in stock_by_key}
+        ).only("id", "business_id", "sku", "stock")
+        for product in products:
+            by_key[(product.business_id, product.sku)] = product
+            by_sku[product.sku].append(product)
+
+        changed, missing = [], []
+        for (business_id, sku), stock in stock_by_key.items():
+            if business_id is None:
+                matches = by_sku.get(sku, [])
+                product = matches[0] if len(matches) == 1 else None
+            else:
+                product = by_key.get((business_id, sku))
+
+            if product is None:
+                missing.append((business_id, sku))
+                continue
+            product.stock = stock
+            changed.append(product)
+
+        cls.save_stock(changed)
+        return missing
+
+    @classmethod
+    def save_stock(cls, products: List[Product], fields: Iterable[str] = ()):
+        """
+        Write the in-memory stock of ``products`` (plus any other ``fields``
+        changed along with it) with batched ``bulk_update``.
+        """
+        if not products:
+            return
+        now = timezone.now()
+        for product in products:
+            product.updated_on = now
+        with transaction.atomic():
+            cls.model.objects.bulk_update(
+                products,
+                list(dict.fromkeys(["stock", *fields, "updated_on"])),
+                batch_size=cls.batch_size,
+            )
+            cls.refresh_low_stock([product.id for product in products])
+        stock_changed.send(
+            sender=cls.model, product_ids=[product.id for product in products]
+        )
+
+    @classmethod
+    def refresh_low_stock(cls, product_ids: Optional[List[int]] = None) -> List[int]:
+        """
+        Bring ``is_low_stock`` in line with the stock of ``product_ids``, or
+        of every product when None (the periodic reconcile). Costs one
+        SELECT of the stale flags, plus one UPDATE if any are stale.
+        Products that just went low are announced through
+        ``low_stock_crossed`` once the transaction commits; their ids are
+        returned.
+        """
+        products = cls.model.objects.all()
+        if product_ids is not None:
+            products = products.filter(pk__in=product_ids)
+        low = low_stock_condition()
+        stale = list(
+            products.filter(
+                (Q(is_low_stock=False) & low) | (Q(is_low_stock=True) & ~low)
+            ).values_list("id", "is_low_stock")
+        )
+        if not stale:
+            return []
+
+        crossed = [product_id for product_id, flagged in stale if not flagged]
+        cls.model.objects.filter(pk__in=[product_id for product_id, _ in stale]).update(
+            is_low_stock=Case(
+                When(pk__in=crossed, then=Value(True)),
+                default=Value(False),
+                output_field=BooleanField(),
+            )
+        )
+        if crossed:
+            transaction.on_commit(
+                lambda: low_stock_crossed.send(sender=cls.model, product_ids=crossed)
+            )
+        return crossed
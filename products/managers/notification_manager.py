@@ -0,0 +1,177 @@
+from collections import Counter
+from datetime import timedelta
+from typing import Iterable, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from accounts.managers.base_manager import BaseModelManager
+from business.models import UserBusiness
+from products.models import Notification, Product
+from products.notifications import notification_queue
+from tenants.schemas import current_schema, tenant_schema
+
+
+class NotificationManager(BaseModelManager):
+    """
+    Notification fan-out.
+
+    Producers ``enqueue`` events: ``kind``, ``business_id``, ``message``, a
+    ``dedupe_key`` naming what the alert is about and optionally
+    ``product_id`` and ``window`` (seconds). ``flush`` drains the queue in
+    batches and writes one Notification per event and user of the business
+    with a single ``bulk_create``, skipping users who already got an alert
+    with the same key within the window. Events remember the schema they
+    were queued from and are written back into it.
+
+    Unread counts are cached per user, incremented as notifications are
+    written and dropped (to be recounted once) when some are read.
+    """
+
+    model = Notification
+    batch_size = 1000
+    lock_key = "notifications:flush-lock"
+
+    @staticmethod
+    def _unread_key(user_id: int) -> str:
+        return f"notifications:unread:{user_id}"
+
+    @classmethod
+    def enqueue(cls, events: Iterable[dict]):
+        schema_name = current_schema()
+        if schema_name is not None:
+            events = [{**event, "schema": schema_name} for event in events]
+        notification_queue().push(list(events))
+
+    @classmethod
+    def low_stock_events(cls, product_ids: List[int]) -> List[dict]:
+        products = Product.objects.filter(pk__in=product_ids).only(
+            "id", "business_id", "name", "stock"
+        )
+        return [
+            {
+                "kind": Notification.Kind.LOW_STOCK,
+                "business_id": product.business_id,
+                "product_id": product.id,
+                "dedupe_key": f"low_stock:{product.id}",
+                "message": (
+                    f"Low stock alert: {product.name} has only "
+                    f"{product.stock} items left."
+                ),
+            }
+            for product in products
+        ]
+
+    @classmethod
+    def flush(cls, batch_size: Optional[int] = None) -> int:
+        """Deliver everything queued so far. Returns the notifications written."""
+        # One flusher at a time, so concurrent batches cannot both pass the
+        # duplicate check for the same user and key
+        if not cache.add(cls.lock_key, 1, 5 * 60):
+            return 0
+        try:
+            queue = notification_queue()
+            written = 0
+            while True:
+                events = queue.pop(batch_size or cls.batch_size)
+                if not events:
+                    return written
+                by_schema = {}
+                for event in events:
+                    by_schema.setdefault(event.get("schema"), []).append(event)
+                pending = list(by_schema.values())
+                try:
+                    while pending:
+                        with tenant_schema(pending[0][0].get("schema")):
+                            written += len(cls.deliver(pending[0]))
+                        pending.pop(0)
+                except Exception:
+                    # retried by the next flush
+                    queue.push([event for batch in pending for event in batch])
+                    raise
+        finally:
+            cache.delete(cls.lock_key)
+
+    @classmethod
+    def deliver(cls, events: List[dict]) -> List[Notification]:
+        # The latest event wins when a batch repeats a key
+        latest = {}
+        for event in events:
+            latest[(event["business_id"], event["dedupe_key"])] = event
+        if not latest:
+            return []
+
+        recipients = (
+            UserBusiness.objects.filter(
+                business_id__in={business_id for business_id, _ in latest}
+            )
+            .exclude(business__settings__enable_notifications=False)
+            .values_list("business_id", "user_id")
+        )
+        users_by_business = {}
+        for business_id, user_id in recipients:
+            users_by_business.setdefault(business_id, []).append(user_id)
+        user_ids = {
+            user_id for users in users_by_business.values() for user_id in users
+        }
+        if not user_ids:
+            return []
+
+        now = timezone.now()
+        default_window = settings.NOTIFICATION_COALESCE_SECONDS
+        longest = max(event.get("window", default_window) for event in latest.values())
+        recent = {}
+        for user_id, key, created_on in Notification.objects.filter(
+            user_id__in=user_ids,
+            dedupe_key__in={key for _, key in latest},
+            created_on__gte=now - timedelta(seconds=longest),
+        ).values_list("user_id", "dedupe_key", "created_on"):
+            recent[(user_id, key)] = max(
+                created_on, recent.get((user_id, key), created_on)
+            )
+
+        notifications = []
+        for (business_id, key), event in latest.items():
+            since = now - timedelta(seconds=event.get("window", default_window))
+            for user_id in users_by_business.get(business_id, []):
+                if recent.get((user_id, key), since) > since:
+                    continue
+                notifications.append(
+                    Notification(
+                        user_id=user_id,
+                        business_id=business_id,
+                        product_id=event.get("product_id"),
+                        kind=event["kind"],
+                        dedupe_key=key,
+                        message=event["message"],
+                    )
+                )
+        Notification.objects.bulk_create(notifications, batch_size=cls.batch_size)
+
+        for user_id, count in Counter(n.user_id for n in notifications).items():
+            try:
+                cache.incr(cls._unread_key(user_id), count)
+            except ValueError:
+                pass  # not cached; counted on the next read
+        return notifications
+
+    @classmethod
+    def unread_count(cls, user_id: int) -> int:
+        key = cls._unread_key(user_id)
+        count = cache.get(key)
+        if count is None:
+            count = Notification.objects.filter(user_id=user_id, read=False).count()
+            # add, not set: never overwrite increments made meanwhile
+            cache.add(key, count, settings.NOTIFICATION_UNREAD_CACHE_SECONDS)
+        return count
+
+    @classmethod
+    def mark_read(cls, user_id: int, ids: Optional[List[int]] = None) -> int:
+        notifications = Notification.objects.filter(user_id=user_id, read=False)
+        if ids is not None:
+            notifications = notifications.filter(pk__in=ids)
+        updated = notifications.update(read=True, updated_on=timezone.now())
+        if updated:
+            cache.delete(cls._unread_key(user_id))
+        return updated
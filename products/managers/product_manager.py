@@ -0,0 +1,59 @@
+from typing import Dict, List, Tuple
+
+from django.db import transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from accounts.managers.base_manager import BaseModelManager
+from products.managers.inventory_manager import InventoryManager
+from products.models import Product
+
+
+class ProductManager(BaseModelManager):
+
+    model = Product
+    batch_size = 1000
+
+    @classmethod
+    def update_products(
+        cls, products: QuerySet, changes: Dict[int, dict]
+    ) -> Tuple[List[int], List[int]]:
+        """
+        Apply already validated ``{product_id: {field: value}}`` changes to
+        the products of ``products`` (e.g. a business's catalog). Targets are
+        fetched and locked with one IN query and written with batched
+        ``bulk_update`` in one transaction. Returns the updated and the
+        missing ids.
+        """
+        fields = list(
+            dict.fromkeys(field for change in changes.values() for field in change)
+        )
+        with transaction.atomic():
+            # Locked, so fields an element does not change are written back
+            # exactly as they are
+            found = products.select_for_update().in_bulk(list(changes))
+
+            updated, missing = [], []
+            for product_id, change in changes.items():
+                product = found.get(product_id)
+                if product is None:
+                    missing.append(product_id)
+                    continue
+                for field, value in change.items():
+                    setattr(product, field, value)
+                updated.append(product)
+
+            if "stock" in fields:
+                InventoryManager.save_stock(updated, fields)
+            elif updated:
+                now = timezone.now()
+                for product in updated:
+                    product.updated_on = now
+                cls.model.objects.bulk_update(
+                    updated, [*fields, "updated_on"], batch_size=cls.batch_size
+                )
+                if "low_stock_alert" in fields:
+                    InventoryManager.refresh_low_stock(
+                        [product.id for product in updated]
+                    )
+        return [product.id for product in updated], missing
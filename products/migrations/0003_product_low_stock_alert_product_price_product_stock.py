@@ -0,0 +1,28 @@
+# Generated by Django 5.1.1 on 2026-10-18 02:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0002_product_cost_price"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="low_stock_alert",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="price",
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="stock",
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.1.1 on 2026-10-18 02:47
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F, Q
+
+# products.constants.LOW_STOCK_THRESHOLD when this migration was written
+LOW_STOCK_THRESHOLD = 5
+
+
+def backfill_is_low_stock(apps, schema_editor):
+    Product = apps.get_model("products", "Product")
+    Product.objects.filter(
+        Q(is_service=False)
+        & (
+            Q(low_stock_alert__gt=0, stock__lte=F("low_stock_alert"))
+            | Q(low_stock_alert__lte=0, stock__lt=LOW_STOCK_THRESHOLD)
+        )
+    ).update(is_low_stock=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("business", "0002_paymentmethod_account_code"),
+        ("products", "0004_productimportjob"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="is_low_stock",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(backfill_is_low_stock, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                condition=models.Q(("is_low_stock", True)),
+                fields=["business", "stock"],
+                name="product_low_stock_idx",
+            ),
+        ),
+    ]
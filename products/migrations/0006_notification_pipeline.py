@@ -0,0 +1,71 @@
+# Generated by Django 5.1.1 on 2026-10-18 02:49
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("business", "0002_paymentmethod_account_code"),
+        ("products", "0005_product_is_low_stock"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notification",
+            name="business",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="notifications",
+                to="business.business",
+            ),
+        ),
+        migrations.AddField(
+            model_name="notification",
+            name="dedupe_key",
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name="notification",
+            name="kind",
+            field=models.CharField(
+                blank=True,
+                choices=[
+                    ("low_stock", "Low stock"),
+                    ("sales_milestone", "Sales milestone"),
+                ],
+                max_length=30,
+            ),
+        ),
+        migrations.AddField(
+            model_name="notification",
+            name="product",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="notifications",
+                to="products.product",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                fields=["user", "dedupe_key", "created_on"],
+                name="notification_dedupe_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                condition=models.Q(("read", False)),
+                fields=["user", "created_on"],
+                name="notification_unread_idx",
+            ),
+        ),
+    ]
@@ -9,15 +9,24 @@ from django.db.models import (
     IntegerField,
     BooleanField,
     URLField,
+    FileField,
+    DateTimeField,
+    PositiveIntegerField,
+    TextChoices,
+    F,
+    Q,
 )
+from django.db import transaction
 from django.db.models import Manager
 from django.conf import settings
 
-from common.models import GenericModel
+from common.models import GenericModel, TenantManager, TenantModel
 from business.models import Business
+from products.constants import LOW_STOCK_THRESHOLD
+from products.signals import low_stock_crossed
 
 
-class ProductCategory(GenericModel):
+class ProductCategory(TenantModel):
     business = ForeignKey(
         Business, on_delete=CASCADE, related_name="product_categories"
     )
@@ -28,12 +37,23 @@ class ProductCategory(GenericModel):
         return f"{self.name} ({self.business.name})"
 
 
+def low_stock_condition() -> Q:
+    """
+    Products at or below their own ``low_stock_alert``, or below
+    LOW_STOCK_THRESHOLD when they have none. Services are never low.
+    """
+    return Q(is_service=False) & (
+        Q(low_stock_alert__gt=0, stock__lte=F("low_stock_alert"))
+        | Q(low_stock_alert__lte=0, stock__lt=LOW_STOCK_THRESHOLD)
+    )
+
+
 class ActiveProductManager(Manager):
     def get_queryset(self):
         return super().get_queryset().filter(is_active=True)
 
 
-class Product(GenericModel):
+class Product(TenantModel):
     business = ForeignKey(Business, on_delete=CASCADE, related_name="products")
     category = ForeignKey(
         "ProductCategory",
@@ -49,18 +69,52 @@ class Product(GenericModel):
     unit_of_measure = CharField(max_length=20, default="unit")  # e.g. kg, liter, pcs
     is_service = BooleanField(default=False)  # For services (skip stock tracking)
     tax_rate = DecimalField(max_digits=5, decimal_places=2, default=0)  # GST/VAT %
+    cost_price = DecimalField(
+        max_digits=12, decimal_places=2, null=True, blank=True
+    )  # last known purchase cost
+    price = DecimalField(max_digits=12, decimal_places=2, default=0)
+    stock = IntegerField(default=0)
+    low_stock_alert = IntegerField(default=0)
     is_active = BooleanField(default=True)
     image = URLField(null=True, blank=True)
+    # Maintained by InventoryManager, see low_stock_condition()
+    is_low_stock = BooleanField(default=False)
 
-    objects = Manager()  # Normal manager
+    objects = TenantManager()
 
     class Meta:
         unique_together = ("business", "sku")
-        indexes = [Index(fields=["sku"])]
+        indexes = [
+            Index(fields=["sku"]),
+            Index(
+                fields=["business", "stock"],
+                condition=Q(is_low_stock=True),
+                name="product_low_stock_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.sku}"
 
+    @property
+    def stock_is_low(self) -> bool:
+        if self.is_service:
+            return False
+        if self.low_stock_alert > 0:
+            return self.stock <= self.low_stock_alert
+        return self.stock < LOW_STOCK_THRESHOLD
+
+    def save(self, *args, **kwargs):
+        # Products created below their level are flagged but not announced
+        crossed = self.stock_is_low and not self.is_low_stock and not self._state.adding
+        self.is_low_stock = self.stock_is_low
+        super().save(*args, **kwargs)
+        if crossed:
+            product_id = self.id
+            transaction.on_commit(
+                lambda: low_stock_crossed.send(sender=Product, product_ids=[product_id])
+            )
+
     def delete(self, *args, **kwargs):
         # Soft delete
         self.is_active = False
@@ -111,8 +165,76 @@ class ProductPrice(GenericModel):
 
 
 class Notification(GenericModel):
+    """
+    An in-app alert for one user, written in bulk by NotificationManager.
+    """
+
+    class Kind(TextChoices):
+        LOW_STOCK = "low_stock", "Low stock"
+        SALES_MILESTONE = "sales_milestone", "Sales milestone"
+
     user = ForeignKey(
         settings.AUTH_USER_MODEL, on_delete=CASCADE, related_name="notifications"
     )
+    business = ForeignKey(
+        Business,
+        on_delete=CASCADE,
+        null=True,
+        blank=True,
+        related_name="notifications",
+    )
+    product = ForeignKey(
+        Product,
+        on_delete=SET_NULL,
+        null=True,
+        blank=True,
+        related_name="notifications",
+    )
+    kind = CharField(max_length=30, choices=Kind.choices, blank=True)
+    # Identifies what the alert is about; repeats within a window are dropped
+    dedupe_key = CharField(max_length=100, blank=True)
     message = TextField()
     read = BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            Index(
+                fields=["user", "dedupe_key", "created_on"],
+                name="notification_dedupe_idx",
+            ),
+            Index(
+                fields=["user", "created_on"],
+                condition=Q(read=False),
+                name="notification_unread_idx",
+            ),
+        ]
+
+
+class ProductImportJob(GenericModel):
+    """
+    A product CSV upload processed in the background by
+    ``products.tasks.process_product_import``.
+    """
+
+    class Status(TextChoices):
+        PENDING = "PENDING", "Pending"
+        PROCESSING = "PROCESSING", "Processing"
+        COMPLETED = "COMPLETED", "Completed"
+        FAILED = "FAILED", "Failed"
+
+    file = FileField(upload_to="imports/products/")
+    status = CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+    rows_processed = PositiveIntegerField(default=0)
+    rows_created = PositiveIntegerField(default=0)
+    rows_updated = PositiveIntegerField(default=0)
+    rows_failed = PositiveIntegerField(default=0)
+    rows_per_second = PositiveIntegerField(default=0)
+    error_report = FileField(
+        upload_to="imports/products/errors/", null=True, blank=True
+    )
+    message = TextField(blank=True, null=True)  # why the job failed, if it did
+    started_on = DateTimeField(null=True, blank=True)
+    finished_on = DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Product import #{self.id} ({self.status})"
@@ -0,0 +1,68 @@
+"""
+Queue of pending notification events.
+
+Alert producers push small JSON-able dicts; ``flush_notifications`` drains
+them in batches and fans them out (see NotificationManager). The queue is a
+Redis list on the cache server, or ``InMemoryQueue`` for tests and
+single-process development (``NOTIFICATION_QUEUE = "memory"``).
+"""
+
+import json
+import threading
+from collections import deque
+from typing import List
+
+from django.conf import settings
+
+
+class RedisQueue:
+    key = "notifications:queue"
+
+    @property
+    def client(self):
+        from django_redis import get_redis_connection
+
+        return get_redis_connection("default")
+
+    def push(self, events: List[dict]):
+        if events:
+            self.client.rpush(self.key, *[json.dumps(event) for event in events])
+
+    def pop(self, count: int) -> List[dict]:
+        """Remove and return up to ``count`` events, oldest first."""
+        pipeline = self.client.pipeline(transaction=True)
+        pipeline.lrange(self.key, 0, count - 1)
+        pipeline.ltrim(self.key, count, -1)
+        events, _ = pipeline.execute()
+        return [json.loads(event) for event in events]
+
+    def __len__(self):
+        return self.client.llen(self.key)
+
+
+class InMemoryQueue:
+    """Process-local stand-in for ``RedisQueue`` with the same API."""
+
+    def __init__(self):
+        self.events = deque()
+        self.lock = threading.Lock()
+
+    def push(self, events: List[dict]):
+        with self.lock:
+            self.events.extend(json.loads(json.dumps(event)) for event in events)
+
+    def pop(self, count: int) -> List[dict]:
+        with self.lock:
+            return [self.events.popleft() for _ in range(min(count, len(self.events)))]
+
+    def __len__(self):
+        return len(self.events)
+
+
+_memory_queue = InMemoryQueue()
+
+
+def notification_queue():
+    if settings.NOTIFICATION_QUEUE == "memory":
+        return _memory_queue
+    return RedisQueue()
@@ -1,6 +1,14 @@
-from rest_framework.serializers import ModelSerializer, CharField
+from rest_framework.serializers import (
+    ModelSerializer,
+    CharField,
+    IntegerField,
+    Serializer,
+    SerializerMethodField,
+    ValidationError,
+)
+from django.urls import reverse
 from business.models import Business
-from .models import ProductCategory, Product
+from .models import Notification, ProductCategory, Product, ProductImportJob
 
 
 class BusinessSerializer(ModelSerializer):
@@ -53,3 +61,79 @@ class ProductSerializer(ModelSerializer):
             business=business, category=category, **validated_data
         )
         return product
+
+
+class ProductBulkUpdateSerializer(ModelSerializer):
+    """One element of a bulk update: an id and the fields to change."""
+
+    id = IntegerField()
+
+    class Meta:
+        model = Product
+        fields = [
+            "id",
+            "name",
+            "description",
+            "barcode",
+            "unit_of_measure",
+            "tax_rate",
+            "cost_price",
+            "price",
+            "stock",
+            "low_stock_alert",
+            "is_active",
+            "image",
+        ]
+
+    def validate(self, attrs):
+        # Elements are validated with partial=True, which skips every
+        # required check
+        if "id" not in attrs:
+            raise ValidationError({"id": "This field is required."})
+        unknown = set(self.initial_data) - set(self.fields)
+        if unknown:
+            raise ValidationError(
+                {field: "This field cannot be updated." for field in sorted(unknown)}
+            )
+        return attrs
+
+
+class ProductStockUpdateSerializer(Serializer):
+    id = IntegerField()
+    stock = IntegerField(min_value=0)
+
+
+class ProductImportJobSerializer(ModelSerializer):
+    error_report = SerializerMethodField()
+
+    class Meta:
+        model = ProductImportJob
+        fields = [
+            "id",
+            "status",
+            "rows_processed",
+            "rows_created",
+            "rows_updated",
+            "rows_failed",
+            "rows_per_second",
+            "error_report",
+            "message",
+            "created_on",
+            "started_on",
+            "finished_on",
+        ]
+        read_only_fields = fields
+
+    def get_error_report(self, obj):
+        if not obj.error_report:
+            return None
+        url = reverse("product-import-job-errors", args=[obj.id])
+        request = self.context.get("request")
+        return request.build_absolute_uri(url) if request else url
+
+
+class NotificationSerializer(ModelSerializer):
+    class Meta:
+        model = Notification
+        fields = ["id", "kind", "product", "message", "read", "created_on"]
+        read_only_fields = fields
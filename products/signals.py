@@ -0,0 +1,10 @@
+from django.dispatch import Signal
+
+
+# Sent by InventoryManager after it changed stock with queryset updates, which
+# bypass post_save. Arguments: product_ids.
+stock_changed = Signal()
+
+# Sent on commit with the ids of products whose stock just dropped to their
+# low-stock level. Arguments: product_ids.
+low_stock_crossed = Signal()
@@ -0,0 +1,110 @@
+"""
+Batch processing of stock update messages from the "stock_updates" topic.
+
+Works with a ``kafka.KafkaConsumer`` (created with ``enable_auto_commit=False``)
+or with ``InMemoryConsumer``, which mimics the parts of its API used here so
+the pipeline can be exercised and benchmarked without a broker.
+"""
+
+import time
+from collections import namedtuple
+from typing import Dict, List, Optional, Tuple
+
+from django.db import transaction
+
+from products.managers.inventory_manager import InventoryManager
+
+
+StockKey = Tuple[Optional[int], str]
+BatchResult = namedtuple("BatchResult", ["received", "invalid", "applied", "missing"])
+
+
+class InMemoryConsumer:
+    """
+    Broker-less stand-in for ``KafkaConsumer``: serves ``messages`` (already
+    deserialized values) through ``poll``/iteration and records commits.
+    """
+
+    Record = namedtuple("Record", ["offset", "value"])
+
+    def __init__(self, messages):
+        self.records = [
+            self.Record(offset, value) for offset, value in enumerate(messages)
+        ]
+        self.position = 0
+        self.committed = 0
+
+    def __iter__(self):
+        while self.position < len(self.records):
+            record = self.records[self.position]
+            self.position += 1
+            yield record
+
+    def poll(self, timeout_ms=0, max_records=None):
+        end = len(self.records)
+        if max_records:
+            end = min(end, self.position + max_records)
+        records = self.records[self.position : end]
+        self.position = end
+        return {"stock_updates-0": records} if records else {}
+
+    def commit(self):
+        self.committed = self.position
+
+    def close(self):
+        pass
+
+
+def parse_message(data) -> Optional[Tuple[StockKey, int]]:
+    if not isinstance(data, dict):
+        return None
+    sku = data.get("sku")
+    stock = data.get("stock")
+    if not sku or stock is None:
+        return None
+    try:
+        business = int(data["business"]) if data.get("business") else None
+        return (business, str(sku)), int(stock)
+    except (TypeError, ValueError):
+        return None
+
+
+def next_batch(consumer, max_records: int, max_wait_ms: int) -> List:
+    """Poll until ``max_records`` messages arrived or ``max_wait_ms`` passed."""
+    deadline = time.monotonic() + max_wait_ms / 1000
+    batch = []
+    while len(batch) < max_records:
+        remaining_ms = int((deadline - time.monotonic()) * 1000)
+        if remaining_ms <= 0:
+            break
+        polled = consumer.poll(
+            timeout_ms=remaining_ms, max_records=max_records - len(batch)
+        )
+        if not polled:
+            break
+        for records in polled.values():
+            batch.extend(records)
+    return batch
+
+
+def apply_batch(consumer, records) -> BatchResult:
+    """
+    Collapse ``records`` to the last stock value per (business, sku), apply
+    them in one transaction and commit the consumer offsets only once that
+    transaction has committed.
+    """
+    latest: Dict[StockKey, int] = {}
+    invalid = []
+    for record in records:
+        parsed = parse_message(record.value)
+        if parsed is None:
+            invalid.append(record.value)
+            continue
+        key, stock = parsed
+        latest[key] = stock
+
+    with transaction.atomic():
+        missing = InventoryManager.set_stock_by_sku(latest)
+
+    consumer.commit()
+    return BatchResult(len(records), invalid, len(latest) - len(missing), missing)
@@ -1,36 +1,101 @@
-from django.db.models.signals import post_save
+import csv
+import io
+from io import TextIOWrapper
+
+from celery import shared_task
+from django.core.files.base import ContentFile
 from django.dispatch import receiver
+from django.utils import timezone
+
+from tenants.schemas import tenant_schema, tenant_schemas
+from .models import ProductImportJob
+from .managers.import_manager import ProductImportManager
+from .managers.inventory_manager import InventoryManager
+from .managers.notification_manager import NotificationManager
+from .signals import low_stock_crossed
+
+
+@shared_task
+def reconcile_low_stock():
+    """
+    Re-derive ``is_low_stock`` for every product. Catches stock written
+    around InventoryManager (e.g. raw queryset updates) and announces the
+    products it finds newly low.
+    """
+    crossed = 0
+    for schema_name in tenant_schemas():
+        with tenant_schema(schema_name):
+            crossed += len(InventoryManager.refresh_low_stock())
+    return crossed
+
+
+@receiver(low_stock_crossed)
+def notify_low_stock_crossings(sender, product_ids, **kwargs):
+    NotificationManager.enqueue(NotificationManager.low_stock_events(product_ids))
+
 
-from .models import Product
-from .constants import LOW_STOCK_THRESHOLD
-from sales.models import SaleItem
+@shared_task
+def flush_notifications():
+    """Write the queued alerts as Notification rows."""
+    return NotificationManager.flush()
 
 
-def check_low_stock():
-    low_stock_products = Product.objects.filter(
-        inventory_quantity__lt=LOW_STOCK_THRESHOLD
-    )
-    if low_stock_products.exists():
-        # Send notification to admin/staff
-        for product in low_stock_products:
-            notify_low_stock(product)
+@shared_task
+def process_product_import(job_id, business_id, schema_name=None):
+    """
+    Run a queued ProductImportJob for the uploader's ``business_id``, saving
+    the running counters after every chunk so the status endpoint can report
+    progress.
+    """
+    with tenant_schema(schema_name):
+        _process_product_import(job_id, business_id)
 
 
-def notify_low_stock(product):
-    # Placeholder: You can send email, push notification, or in-app notification
-    message = f"Low stock alert: {product.name} has only {product.inventory_quantity} items left."
-    # e.g., send_email_to_admins(message)
-    print(message)  # For demo purpose
+def _process_product_import(job_id, business_id):
+    job = ProductImportJob.objects.get(pk=job_id)
+    jobs = ProductImportJob.objects.filter(pk=job_id)
+    jobs.update(status=ProductImportJob.Status.PROCESSING, started_on=timezone.now())
 
+    def on_chunk(result):
+        jobs.update(
+            rows_processed=result["rows"],
+            rows_created=result["created"],
+            rows_updated=result["updated"],
+            rows_failed=result["failed"],
+            updated_on=timezone.now(),
+        )
 
-@receiver(post_save, sender=SaleItem)
-def update_inventory_and_check_stock(sender, instance, **kwargs):
-    product = instance.product
-    if product:
-        # Deduct sold quantity from inventory
-        product.inventory_quantity -= instance.quantity
-        product.save()
+    try:
+        with job.file.open("rb") as file:
+            result = ProductImportManager.import_csv(
+                TextIOWrapper(file, encoding="utf-8"),
+                on_chunk=on_chunk,
+                business_id=business_id,
+            )
+    except Exception as err:
+        jobs.update(
+            status=ProductImportJob.Status.FAILED,
+            message=str(err),
+            finished_on=timezone.now(),
+        )
+        raise
 
-        # Check low stock after update
-        if product.inventory_quantity < LOW_STOCK_THRESHOLD:
-            notify_low_stock(product)
+    job.refresh_from_db()
+    if result["errors"]:
+        report = io.StringIO()
+        writer = csv.DictWriter(report, fieldnames=["row", "error"])
+        writer.writeheader()
+        writer.writerows(result["errors"])
+        job.error_report.save(
+            f"product_import_{job.id}_errors.csv",
+            ContentFile(report.getvalue().encode("utf-8")),
+            save=False,
+        )
+    job.status = ProductImportJob.Status.COMPLETED
+    job.rows_processed = result["rows"]
+    job.rows_created = result["created"]
+    job.rows_updated = result["updated"]
+    job.rows_failed = result["failed"]
+    job.rows_per_second = result["rows_per_second"]
+    job.finished_on = timezone.now()
+    job.save()
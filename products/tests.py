@@ -1,3 +1,483 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from accounts.models import User
+from business.models import Business, BusinessSettings, UserBusiness
+from sales.managers.sale_manager import SaleManager
+from sales.testing import create_accounts
+
+from .management.commands.consume_stock_updates import (
+    Command as ConsumeStockUpdates,
+)
+from .managers.import_manager import CSV_COLUMNS, ProductImportManager
+from .managers.inventory_manager import InventoryManager
+from .managers.notification_manager import NotificationManager
+from .models import Notification, Product, ProductCategory, ProductImportJob
+from .notifications import notification_queue
+from .signals import low_stock_crossed, stock_changed
+from .stock_updates import InMemoryConsumer
+from .tasks import flush_notifications, reconcile_low_stock
+from .views import NotificationViewSet, ProductCSVUploadView, ProductViewSet
+
+
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHE, NOTIFICATION_QUEUE="memory", LIVE_UPDATES_BROKER="memory"
+)
+class ProductBulkUpdateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = Business.objects.create(name="Catalog Co")
+        cls.other = Business.objects.create(name="Other Co")
+        cls.user = User.objects.create(username="clerk", email="clerk@x.io")
+        UserBusiness.objects.create(user=cls.user, business=cls.business, role="ADMIN")
+        cls.products = Product.objects.bulk_create(
+            [
+                Product(business=cls.business, name=f"P{i}", sku=f"P-{i}", price=5)
+                for i in range(30)
+            ]
+        )
+        cls.foreign = Product.objects.create(
+            business=cls.other, name="Theirs", sku="T-1", price=5
+        )
+
+    def send(self, method, action, payload):
+        request = getattr(APIRequestFactory(), method)("/", payload, format="json")
+        force_authenticate(request, self.user)
+        return ProductViewSet.as_view({method: action})(request)
+
+    def test_stock_update_is_a_constant_number_of_queries(self):
+        payload = [{"id": product.id, "stock": 7} for product in self.products]
+        payload += [{"id": self.foreign.id, "stock": 1}, {"id": 999999, "stock": 1}]
+        payload += [{"id": self.products[0].id, "stock": -1}, {"stock": 3}]
+
+        # user business, locking IN query, one bulk UPDATE, the low-stock
+        # flag check, the dashboard snapshot invalidation and two savepoints
+        with self.assertNumQueries(9):
+            response = self.send("post", "bulk_update_stock", payload)
+
+        self.assertEqual(len(response.data["updated_ids"]), 30)
+        statuses = {
+            result["id"]: result["status"]
+            for result in response.data["results"]
+            if result["status"] != "updated"
+        }
+        self.assertEqual(
+            statuses,
+            {
+                self.foreign.id: "not_found",
+                999999: "not_found",
+                self.products[0].id: "invalid",
+                None: "invalid",
+            },
+        )
+        self.assertEqual(
+            set(Product.objects.filter(business=self.business).values_list("stock")),
+            {(7,)},
+        )
+        self.foreign.refresh_from_db()
+        self.assertEqual(self.foreign.stock, 0)
+
+    def test_bulk_update_only_writes_whitelisted_fields(self):
+        first, second = self.products[:2]
+        response = self.send(
+            "put",
+            "bulk_update",
+            [
+                {"id": first.id, "price": "9.50", "name": "Renamed"},
+                {"id": second.id, "business": self.other.id},
+                {"id": second.id, "price": "not a price"},
+            ],
+        )
+
+        self.assertEqual(response.data["updated"], [first.id])
+        self.assertEqual(
+            [error["id"] for error in response.data["errors"]], [second.id] * 2
+        )
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.name, str(first.price)), ("Renamed", "9.50"))
+        self.assertEqual(second.business_id, self.business.id)
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHE, NOTIFICATION_QUEUE="memory", LIVE_UPDATES_BROKER="memory"
+)
+class AdjustStockTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = Business.objects.create(name="Stock Co")
+        cls.plenty, cls.scarce = [
+            Product.objects.create(
+                business=cls.business, name=name, sku=name, price=1, stock=stock
+            )
+            for name, stock in (("plenty", 10), ("scarce", 2))
+        ]
+        cls.service = Product.objects.create(
+            business=cls.business, name="Repair", sku="S-1", is_service=True
+        )
+
+    def stock(self):
+        return dict(
+            Product.objects.filter(business=self.business).values_list("sku", "stock")
+        )
+
+    def test_deltas_are_applied_in_one_update(self):
+        # the UPDATE and the low-stock flag check in a savepoint, then the
+        # dashboard snapshot invalidation
+        with self.assertNumQueries(5):
+            updated = InventoryManager.adjust_stock(
+                {self.plenty.id: -3, self.scarce.id: 1, self.service.id: -1}
+            )
+        self.assertEqual(updated, 2)
+        self.assertEqual(self.stock(), {"plenty": 7, "scarce": 3, "S-1": 0})
+
+    def test_clamp_floors_stock_at_zero(self):
+        InventoryManager.adjust_stock(
+            {self.plenty.id: -4, self.scarce.id: -5}, clamp=True
+        )
+        self.assertEqual(self.stock(), {"plenty": 6, "scarce": 0, "S-1": 0})
+
+    def test_guard_rejects_and_rolls_back_the_whole_change(self):
+        with self.assertRaisesMessage(ValueError, "insufficient_stock"):
+            InventoryManager.adjust_stock(
+                {self.plenty.id: -4, self.scarce.id: -3}, guard=True
+            )
+        self.assertEqual(self.stock(), {"plenty": 10, "scarce": 2, "S-1": 0})
+
+        InventoryManager.adjust_stock(
+            {self.plenty.id: -10, self.scarce.id: 1}, guard=True
+        )
+        self.assertEqual(self.stock(), {"plenty": 0, "scarce": 3, "S-1": 0})
+
+    def test_deleting_a_sale_item_gives_back_what_it_took(self):
+        create_accounts(self.business, ["1001", "4001"])
+        sale = SaleManager.create_sale(
+            [{"product": self.plenty, "quantity": 4}],
+            business=self.business,
+            payment_method="cash",
+        )
+        self.assertEqual(self.stock()["plenty"], 6)
+
+        sale.items.get().delete()
+        self.assertEqual(self.stock()["plenty"], 10)
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHE,
+    NOTIFICATION_QUEUE="memory",
+    LIVE_UPDATES_BROKER="memory",
+    CELERY_TASK_ALWAYS_EAGER=True,
+    CELERY_TASK_EAGER_PROPAGATES=True,
+)
+class ProductImportJobTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = Business.objects.create(name="Import Co")
+        cls.category = ProductCategory.objects.create(
+            business=cls.business, name="General"
+        )
+        cls.user = User.objects.create(username="importer", email="importer@x.io")
+        UserBusiness.objects.create(user=cls.user, business=cls.business, role="ADMIN")
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        media = self.settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def upload(self, rows, category=None, user=None):
+        category = category or self.category
+        lines = [",".join(CSV_COLUMNS)]
+        lines += [
+            f"{name},{sku},{price},5,2,{category.id},{category.business_id}"
+            for name, sku, price in rows
+        ]
+        upload = SimpleUploadedFile(
+            "products.csv", "\n".join(lines).encode(), content_type="text/csv"
+        )
+        request = APIRequestFactory().post("/", {"file": upload}, format="multipart")
+        force_authenticate(request, user or self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            return ProductCSVUploadView.as_view()(request)
+
+    def test_job_runs_to_completion_with_an_error_report(self):
+        seen = []
+        import_csv = ProductImportManager.import_csv
+
+        def watch(*args, **kwargs):
+            seen.append(ProductImportJob.objects.values_list("status").get())
+            return import_csv(*args, **kwargs)
+
+        with mock.patch.object(ProductImportManager, "import_csv", side_effect=watch):
+            response = self.upload([("Widget", "W-1", "9.50"), ("Bad", "B-1", "x")])
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data["status"], ProductImportJob.Status.PENDING)
+        self.assertEqual(seen, [(ProductImportJob.Status.PROCESSING,)])
+
+        job = ProductImportJob.objects.get(pk=response.data["job_id"])
+        self.assertEqual(job.status, ProductImportJob.Status.COMPLETED)
+        self.assertEqual(
+            (job.rows_processed, job.rows_created, job.rows_failed), (2, 1, 1)
+        )
+        self.assertIsNotNone(job.started_on)
+        self.assertIsNotNone(job.finished_on)
+        with job.error_report.open("r") as report:
+            self.assertEqual(
+                report.read().splitlines(), ["row,error", "2,invalid price 'x'"]
+            )
+        self.assertTrue(Product.objects.filter(sku="W-1").exists())
+
+    @override_settings(CELERY_TASK_EAGER_PROPAGATES=False)
+    def test_crashed_job_is_marked_failed(self):
+        # A worker's failure stays in the worker, as it would with a broker
+        with mock.patch.object(
+            ProductImportManager, "import_csv", side_effect=RuntimeError("disk full")
+        ):
+            self.assertEqual(self.upload([("Widget", "W-1", "9.50")]).status_code, 202)
+
+        job = ProductImportJob.objects.get()
+        self.assertEqual(job.status, ProductImportJob.Status.FAILED)
+        self.assertEqual(job.message, "disk full")
+        self.assertFalse(job.error_report)
+
+    def test_rows_only_reach_the_uploaders_business(self):
+        other = Business.objects.create(name="Rival Co")
+        rival = Product.objects.create(business=other, name="Theirs", sku="W-1")
+        other_category = ProductCategory.objects.create(business=other, name="All")
+
+        response = self.upload([("Mine", "W-1", "9.50")], category=other_category)
+
+        job = ProductImportJob.objects.get(pk=response.data["job_id"])
+        self.assertEqual((job.rows_created, job.rows_failed), (0, 1))
+        rival.refresh_from_db()
+        self.assertEqual(rival.name, "Theirs")
+
+        loner = User.objects.create(username="loner", email="loner@x.io")
+        response = self.upload([("Mine", "W-2", "9.50")], user=loner)
+        self.assertEqual(response.status_code, 403)
+
+    def test_job_fails_when_it_cannot_be_queued(self):
+        with mock.patch(
+            "products.views.process_product_import.delay",
+            side_effect=OSError("broker down"),
+        ), self.assertLogs("products.views", "ERROR"):
+            response = self.upload([("Widget", "W-1", "9.50")])
+
+        self.assertEqual(response.status_code, 202)
+        job = ProductImportJob.objects.get(pk=response.data["job_id"])
+        self.assertEqual(job.status, ProductImportJob.Status.FAILED)
+        self.assertEqual(job.message, "Could not queue the import: broker down")
+        self.assertIsNotNone(job.finished_on)
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHE, NOTIFICATION_QUEUE="memory", LIVE_UPDATES_BROKER="memory"
+)
+class LowStockFlagTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = Business.objects.create(name="Stock Co")
+        cls.product = Product.objects.create(
+            business=cls.business,
+            name="Widget",
+            sku="W-1",
+            price=10,
+            stock=20,
+            low_stock_alert=10,
+        )
+        cls.service = Product.objects.create(
+            business=cls.business, name="Repair", sku="S-1", is_service=True
+        )
+
+    def setUp(self):
+        self.crossings = []
+        low_stock_crossed.connect(self.record, sender=Product)
+        self.addCleanup(low_stock_crossed.disconnect, self.record, sender=Product)
+
+    def record(self, sender, product_ids, **kwargs):
+        self.crossings.append(product_ids)
+
+    def is_low(self, product):
+        return Product.objects.values_list("is_low_stock", flat=True).get(pk=product.pk)
+
+    def test_only_crossings_are_announced(self):
+        self.assertFalse(self.is_low(self.service))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            InventoryManager.adjust_product_stock(self.product.id, -5)
+        self.assertEqual(self.crossings, [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            InventoryManager.adjust_product_stock(self.product.id, -5)
+        self.assertTrue(self.is_low(self.product))
+        self.assertEqual(self.crossings, [[self.product.id]])
+
+        # Still low: nothing new to announce
+        with self.captureOnCommitCallbacks(execute=True):
+            InventoryManager.adjust_product_stock(self.product.id, -1)
+        self.assertEqual(len(self.crossings), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            InventoryManager.adjust_product_stock(self.product.id, 10)
+        self.assertFalse(self.is_low(self.product))
+
+    def test_reconcile_repairs_writes_that_bypassed_the_manager(self):
+        Product.objects.filter(pk=self.product.pk).update(stock=2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(reconcile_low_stock(), 1)
+        self.assertTrue(self.is_low(self.product))
+        self.assertEqual(self.crossings, [[self.product.id]])
+        self.assertEqual(reconcile_low_stock(), 0)
+
+    def test_csv_imports_refresh_the_flag_and_announce_stock(self):
+        category = ProductCategory.objects.create(business=self.business, name="All")
+        lines = [
+            ",".join(CSV_COLUMNS),
+            f"Widget,W-1,10,4,10,{category.id},{self.business.id}",
+            f"Gadget,G-1,10,50,10,{category.id},{self.business.id}",
+        ]
+        changed = []
+
+        def record_change(sender, product_ids, **kwargs):
+            changed.append(sorted(product_ids))
+
+        stock_changed.connect(record_change, sender=Product)
+        self.addCleanup(stock_changed.disconnect, record_change, sender=Product)
+        with self.captureOnCommitCallbacks(execute=True):
+            ProductImportManager.import_csv(lines)
+
+        gadget = Product.objects.get(sku="G-1")
+        self.assertTrue(self.is_low(self.product))
+        self.assertFalse(self.is_low(gadget))
+        self.assertEqual(self.crossings, [[self.product.id]])
+        self.assertEqual(changed, [sorted([self.product.id, gadget.id])])
+
+    def test_both_stock_consumer_modes_go_through_the_manager(self):
+        other = Business.objects.create(name="Other Co")
+        twin = Product.objects.create(business=other, name="Widget", sku="W-1")
+        command = ConsumeStockUpdates(stdout=StringIO())
+
+        changed = []
+
+        def record_change(sender, product_ids, **kwargs):
+            changed.append(product_ids)
+
+        stock_changed.connect(record_change, sender=Product)
+        self.addCleanup(stock_changed.disconnect, record_change, sender=Product)
+        messages = [
+            {"business": self.business.id, "sku": "W-1", "stock": 3},
+            # Two businesses hold W-1, so a message naming none is not applied
+            {"sku": "W-1", "stock": 90},
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            command.consume_one_by_one(InMemoryConsumer(messages))
+        self.assertTrue(self.is_low(self.product))
+        self.assertEqual(self.crossings, [[self.product.id]])
+        self.assertEqual(changed, [[self.product.id]])
+
+        messages[0]["stock"] = 30
+        with self.captureOnCommitCallbacks(execute=True):
+            command.consume_batches(InMemoryConsumer(messages), 10, 1000, False)
+        self.assertFalse(self.is_low(self.product))
+        self.assertEqual(changed, [[self.product.id]] * 2)
+        twin.refresh_from_db()
+        self.assertEqual(twin.stock, 0)
+        self.assertIn("not found", command.stdout.getvalue())
+
+    def test_low_stock_listing_reads_the_flag(self):
+        user = User.objects.create(username="keeper", email="keeper@x.io")
+        UserBusiness.objects.create(user=user, business=self.business, role="ADMIN")
+        InventoryManager.adjust_product_stock(self.product.id, -15)
+
+        request = APIRequestFactory().get("/")
+        force_authenticate(request, user)
+        response = ProductViewSet.as_view({"get": "low_stock"})(request)
+        self.assertEqual([row["id"] for row in response.data], [self.product.id])
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHE, NOTIFICATION_QUEUE="memory", LIVE_UPDATES_BROKER="memory"
+)
+class NotificationPipelineTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = Business.objects.create(name="Alerts Co")
+        cls.users = [
+            User.objects.create(username=f"staff{i}", email=f"staff{i}@x.io")
+            for i in range(3)
+        ]
+        for user in cls.users:
+            UserBusiness.objects.create(user=user, business=cls.business, role="ADMIN")
+        cls.products = [
+            Product.objects.create(
+                business=cls.business, name=f"P{i}", sku=f"P-{i}", stock=50
+            )
+            for i in range(2)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        queue = notification_queue()
+        queue.pop(len(queue))
+
+    def test_crossings_fan_out_once_per_user_and_product(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            InventoryManager.adjust_stock({p.id: -48 for p in self.products})
+        # Restocked and sold out again within the window
+        InventoryManager.adjust_stock({self.products[0].id: 10})
+        with self.captureOnCommitCallbacks(execute=True):
+            InventoryManager.adjust_stock({self.products[0].id: -10})
+
+        # recipients, recent notifications, one insert
+        with self.assertNumQueries(3):
+            self.assertEqual(flush_notifications(), 6)
+        self.assertEqual(flush_notifications(), 0)
+
+        NotificationManager.enqueue(
+            NotificationManager.low_stock_events([self.products[0].id])
+        )
+        self.assertEqual(flush_notifications(), 0)
+        self.assertEqual(Notification.objects.filter(user=self.users[0]).count(), 2)
+
+    def test_unread_count_is_cached_and_kept_current(self):
+        user = self.users[0]
+        self.assertEqual(NotificationManager.unread_count(user.id), 0)
+
+        NotificationManager.enqueue(
+            NotificationManager.low_stock_events([p.id for p in self.products])
+        )
+        NotificationManager.flush()
+        with self.assertNumQueries(0):
+            self.assertEqual(NotificationManager.unread_count(user.id), 2)
+
+        request = APIRequestFactory().post("/")
+        force_authenticate(request, user)
+        response = NotificationViewSet.as_view({"post": "mark_all_read"})(request)
+        self.assertEqual(response.data["updated"], 2)
+
+        request = APIRequestFactory().get("/")
+        force_authenticate(request, user)
+        response = NotificationViewSet.as_view({"get": "unread_count"})(request)
+        self.assertEqual(response.data["unread"], 0)
+
+    def test_disabled_businesses_are_skipped(self):
+        BusinessSettings.objects.create(
+            business=self.business, enable_notifications=False
+        )
+        NotificationManager.enqueue(
+            NotificationManager.low_stock_events([self.products[0].id])
+        )
+        self.assertEqual(NotificationManager.flush(), 0)
@@ -8,13 +8,18 @@ from .views import (
     ProductViewSet,
     ProductCategoryViewSet,
     ProductCSVUploadView,
+    ProductImportJobViewSet,
+    NotificationViewSet,
     download_csv_template,
-    export_csv,
 )
 
 router = DefaultRouter()
 router.register(r"products", ProductViewSet, basename="product")
 router.register(r"products-categories", ProductCategoryViewSet, basename="category")
+router.register(
+    r"product-import-jobs", ProductImportJobViewSet, basename="product-import-job"
+)
+router.register(r"notifications", NotificationViewSet, basename="notification")
 
 urlpatterns = [
     path("api/", include(router.urls)),
@@ -28,7 +33,6 @@ urlpatterns = [
         download_csv_template,
         name="download-products-csv-template",
     ),
-    path("api/products/export-csv/", export_csv, name="export_csv"),
 ]
 
 if settings.DEBUG:
@@ -1,22 +1,44 @@
 import csv
+import logging
 
-from rest_framework import viewsets, status, filters
+from rest_framework import mixins, viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from io import TextIOWrapper
 from rest_framework.parsers import MultiPartParser
 from rest_framework.views import APIView
 from rest_framework.decorators import api_view, action
-
-from .models import Product, ProductCategory
-from .serializers import ProductSerializer, ProductCategorySerializer
+from django.db import transaction
+from django.utils import timezone
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+
+from common.errors import ERROR_DETAILS
+from common.exception import InsightHubException
+from common.renderers import EXPORT_RENDERERS
+from tenants.schemas import current_schema
+from .managers.notification_manager import NotificationManager
+from .managers.product_manager import ProductManager
+from .models import Notification, Product, ProductCategory, ProductImportJob
+from .serializers import (
+    NotificationSerializer,
+    ProductBulkUpdateSerializer,
+    ProductSerializer,
+    ProductCategorySerializer,
+    ProductImportJobSerializer,
+    ProductStockUpdateSerializer,
+)
+from .tasks import process_product_import
+
+logger = logging.getLogger(__name__)
 
 
 class ProductCategoryViewSet(viewsets.ModelViewSet):
     queryset = ProductCategory.objects.all()
     serializer_class = ProductCategorySerializer
 
+    def get_queryset(self):
+        return ProductCategory.objects.for_business(self.request.user.business)
+
 
 class ProductViewSet(viewsets.ModelViewSet):
     queryset = Product.objects.all()
@@ -31,9 +53,23 @@ class ProductViewSet(viewsets.ModelViewSet):
     search_fields = ["name", "sku", "description"]
     ordering_fields = ["price", "stock", "created_at"]
     ordering = ["name"]
+    export_fields = [
+        ("id", "int"),
+        ("name", "string"),
+        ("sku", "string"),
+        ("price", "decimal"),
+        ("stock", "int"),
+        ("low_stock_alert", "int"),
+        ("category_id", "int"),
+        ("business_id", "int"),
+        ("is_active", "bool"),
+    ]
+    export_chunk_size = 2000
 
     def get_queryset(self):
-        return Product.objects.filter(is_active=True)
+        return Product.objects.for_business(self.request.user.business).filter(
+            is_active=True
+        )
 
     def destroy(self, request, *args, **kwargs):
         """Soft-delete: set is_active = False"""
@@ -53,31 +89,76 @@ class ProductViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=["get"])
     def low_stock(self, request):
         """List products that are low on stock"""
-        low_stock_products = Product.objects.filter(
-            is_active=True, stock__lte=models.F("low_stock_alert")
-        )
+        low_stock_products = self.get_queryset().filter(is_low_stock=True)
         serializer = self.get_serializer(low_stock_products, many=True)
         return Response(serializer.data)
 
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="export-csv",
+        renderer_classes=EXPORT_RENDERERS,
+    )
+    def export_csv(self, request):
+        """Stream the (filtered) catalog as CSV, or ?format=parquet|arrow"""
+        products = self.filter_queryset(self.get_queryset()).values_list(
+            *[field for field, _ in self.export_fields]
+        )
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            renderer.stream(
+                [
+                    (field.replace("_id", ""), kind)
+                    for field, kind in self.export_fields
+                ],
+                products.iterator(chunk_size=self.export_chunk_size),
+            ),
+            content_type=renderer.media_type,
+        )
+        response["Content-Disposition"] = (
+            f"attachment; filename=products_export.{renderer.extension}"
+        )
+        return response
+
+    def bulk_apply(self, serializer_class, partial=False):
+        """
+        Validate every element of a bulk payload, then apply the valid ones
+        in one go. Returns a result per product id.
+        """
+        results, changes = [], {}
+        for data in self.request.data:
+            serializer = serializer_class(data=data, partial=partial)
+            if not serializer.is_valid():
+                results.append(
+                    {
+                        "id": data.get("id") if isinstance(data, dict) else None,
+                        "status": "invalid",
+                        "errors": serializer.errors,
+                    }
+                )
+                continue
+            change = dict(serializer.validated_data)
+            changes.setdefault(change.pop("id"), {}).update(change)
+
+        # Inactive products can still be edited (e.g. re-activated)
+        updated, missing = ProductManager.update_products(
+            Product.objects.for_business(self.request.user.business), changes
+        )
+        results += [{"id": id, "status": "updated"} for id in updated]
+        results += [{"id": id, "status": "not_found"} for id in missing]
+        return results
+
     @action(detail=False, methods=["post"], url_path="bulk-update-stock")
     def bulk_update_stock(self, request):
-        updates = request.data
-        updated = []
-
-        for item in updates:
-            try:
-                product = Product.objects.get(id=item["id"])
-                product.stock = item["stock"]
-                product.save()
-                updated.append(product.id)
-            except Product.DoesNotExist:
-                continue
-            except KeyError:
-                continue
+        if not isinstance(request.data, list):
+            return Response({"error": "Expected a list of products."}, status=400)
 
+        results = self.bulk_apply(ProductStockUpdateSerializer)
+        updated = [result["id"] for result in results if result["status"] == "updated"]
         return Response(
             {
                 "updated_ids": updated,
+                "results": results,
                 "message": f"{len(updated)} products updated successfully.",
             },
             status=status.HTTP_200_OK,
@@ -95,23 +176,17 @@ class ProductViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=["put"], url_path="bulk-update")
     def bulk_update(self, request):
-        updated_ids = []
-        errors = []
-
-        for data in request.data:
-            try:
-                product = Product.objects.get(id=data["id"])
-                for field, value in data.items():
-                    setattr(product, field, value)
-                product.save()
-                updated_ids.append(product.id)
-            except Product.DoesNotExist:
-                errors.append({"id": data["id"], "error": "Product not found"})
-            except Exception as e:
-                errors.append({"id": data.get("id"), "error": str(e)})
+        if not isinstance(request.data, list):
+            return Response({"error": "Expected a list of products."}, status=400)
 
+        results = self.bulk_apply(ProductBulkUpdateSerializer, partial=True)
         return Response(
-            {"updated": updated_ids, "errors": errors}, status=status.HTTP_200_OK
+            {
+                "updated": [r["id"] for r in results if r["status"] == "updated"],
+                "errors": [r for r in results if r["status"] != "updated"],
+                "results": results,
+            },
+            status=status.HTTP_200_OK,
         )
 
 
@@ -123,49 +198,88 @@ class ProductCSVUploadView(APIView):
         if not file:
             return Response({"error": "CSV file is required"}, status=400)
 
-        decoded_file = TextIOWrapper(file.file, encoding="utf-8")
-        reader = csv.DictReader(decoded_file)
+        business = request.user.business
+        if business is None:
+            raise InsightHubException(
+                code="business_not_found",
+                detail=ERROR_DETAILS["business_not_found"],
+                status_code=status.HTTP_403_FORBIDDEN,
+            )
 
-        created = 0
-        updated = 0
-        errors = []
+        job = ProductImportJob.objects.create(file=file, created_by=request.user)
+        job_id, schema_name = job.id, current_schema()
 
-        for i, row in enumerate(reader, start=1):
+        def queue_import():
             try:
-                product_data = {
-                    "name": row["name"],
-                    "sku": row["sku"],
-                    "price": float(row["price"]),
-                    "stock": int(row["stock"]),
-                    "low_stock_alert": int(row["low_stock_alert"]),
-                    "category_id": int(row["category"]),
-                    "business_id": int(row["business"]),
-                }
-
-                product, created_flag = Product.objects.update_or_create(
-                    sku=product_data["sku"],
-                    business_id=product_data["business_id"],
-                    defaults=product_data,
+                # Rows are only imported into the uploader's business
+                process_product_import.delay(job_id, business.id, schema_name)
+            except Exception as err:
+                # Give the client polling the job a final status
+                logger.exception("Could not queue product import job %s.", job_id)
+                ProductImportJob.objects.filter(pk=job_id).update(
+                    status=ProductImportJob.Status.FAILED,
+                    message=f"Could not queue the import: {err}",
+                    finished_on=timezone.now(),
                 )
-                if created_flag:
-                    created += 1
-                else:
-                    updated += 1
 
-            except Exception as e:
-                errors.append(f"Row {i}: {str(e)}")
+        # The worker must not pick the job up before its row is committed
+        transaction.on_commit(queue_import)
 
         return Response(
             {
-                "message": "Upload complete",
-                "created": created,
-                "updated": updated,
-                "errors": errors,
+                "message": "Upload accepted",
+                "job_id": job.id,
+                "status": job.status,
             },
-            status=201,
+            status=status.HTTP_202_ACCEPTED,
         )
 
 
+class ProductImportJobViewSet(viewsets.ReadOnlyModelViewSet):
+    serializer_class = ProductImportJobSerializer
+
+    def get_queryset(self):
+        return ProductImportJob.objects.filter(created_by=self.request.user).order_by(
+            "-created_on"
+        )
+
+    @action(detail=True, methods=["get"], url_path="errors", url_name="errors")
+    def errors(self, request, pk=None):
+        """Download the failed rows of an import as CSV"""
+        job = self.get_object()
+        if not job.error_report:
+            raise Http404("This import has no errors.")
+        return FileResponse(
+            job.error_report.open("rb"),
+            as_attachment=True,
+            filename=f"product_import_{job.id}_errors.csv",
+            content_type="text/csv",
+        )
+
+
+class NotificationViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    serializer_class = NotificationSerializer
+
+    def get_queryset(self):
+        return Notification.objects.filter(user=self.request.user).order_by(
+            "-created_on"
+        )
+
+    @action(detail=False, methods=["get"], url_path="unread-count")
+    def unread_count(self, request):
+        return Response({"unread": NotificationManager.unread_count(request.user.id)})
+
+    @action(detail=True, methods=["post"], url_path="read")
+    def mark_read(self, request, pk=None):
+        NotificationManager.mark_read(request.user.id, [pk])
+        return Response({"status": "read"})
+
+    @action(detail=False, methods=["post"], url_path="read-all")
+    def mark_all_read(self, request):
+        updated = NotificationManager.mark_read(request.user.id)
+        return Response({"updated": updated})
+
+
 @api_view(["GET"])
 def download_csv_template(request):
     response = HttpResponse(content_type="text/csv")
@@ -178,40 +292,3 @@ def download_csv_template(request):
     writer.writerow(["", "", 0.00, 0, 0, 1, 1])  # Example empty row
 
     return response
-
-
-@action(detail=False, methods=["get"], url_path="export-csv")
-def export_csv(self, request):
-    products = self.get_queryset()
-
-    def generate():
-        yield ",".join(
-            [
-                "id",
-                "name",
-                "sku",
-                "price",
-                "stock",
-                "low_stock_alert",
-                "category",
-                "business",
-                "is_active",
-            ]
-        ) + "\n"
-        for p in products:
-            row = [
-                str(p.id),
-                p.name,
-                p.sku,
-                str(p.price),
-                str(p.stock),
-                str(p.low_stock_alert),
-                str(p.category_id or ""),
-                str(p.business_id),
-                str(p.is_active),
-            ]
-            yield ",".join(row) + "\n"
-
-    response = StreamingHttpResponse(generate(), content_type="text/csv")
-    response["Content-Disposition"] = "attachment; filename=products_export.csv"
-    return response
@@ -0,0 +1,81 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from business.models import Business
+from customers.models import Customer
+from products.models import Product
+from sales.managers.sale_manager import SaleManager
+
+
+class Command(BaseCommand):
+    help = (
+        "Counts the queries the batched sale writer issues for growing basket "
+        "sizes. Everything is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            default="1,10,50",
+            help="Comma separated basket sizes (default: 1,10,50)",
+        )
+        parser.add_argument(
+            "--business",
+            type=int,
+            help="Post to this business (needs its chart of accounts); "
+            "guest sales are used otherwise",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            sizes = sorted({int(size) for size in options["sizes"].split(",")})
+        except ValueError:
+            raise CommandError("--sizes must be a comma separated list of integers.")
+
+        results = []
+        with transaction.atomic():
+            if options["business"]:
+                business = Business.objects.get(pk=options["business"])
+                customer = Customer.objects.create(
+                    business=business, name="Benchmark customer"
+                )
+            else:
+                business = Business.objects.create(name="Benchmark business")
+                customer = None
+
+            products = Product.objects.bulk_create(
+                [
+                    Product(
+                        business=business,
+                        name=f"Benchmark product {i}",
+                        sku=f"BENCH-{i}",
+                        price=10,
+                        stock=1_000_000,
+                    )
+                    for i in range(max(sizes))
+                ]
+            )
+
+            for size in sizes:
+                items = [
+                    {"product": product, "quantity": 2} for product in products[:size]
+                ]
+                with CaptureQueriesContext(connection) as queries:
+                    SaleManager.create_sale(
+                        items, customer=customer, payment_method="cash"
+                    )
+                results.append((size, len(queries)))
+
+            transaction.set_rollback(True)
+
+        for size, count in results:
+            self.stdout.write(f"basket of {size:>5} items: {count} queries")
+
+        counts = {count for _, count in results}
+        if len(counts) == 1:
+            self.stdout.write(
+                self.style.SUCCESS("✅ Query count is independent of basket size.")
+            )
+        else:
+            raise CommandError("❌ Query count grows with basket size.")
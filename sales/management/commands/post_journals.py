@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from sales.managers.journal_manager import JournalManager
+from sales.models import Expense, Purchase, Sale
+
+
+class Command(BaseCommand):
+    help = (
+        "Posts journal entries for sales, purchases and expenses. Documents "
+        "already in the journal are skipped, so it is safe to re-run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--business", type=int, help="Only post this business")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Documents posted per transaction (default: 500)",
+        )
+
+    def handle(self, *args, **options):
+        posted = 0
+        for model in (Sale, Purchase, Expense):
+            documents = model.objects.filter(business__isnull=False).order_by("id")
+            if options["business"]:
+                documents = documents.for_business(options["business"])
+
+            batch = []
+            for document in documents.iterator(chunk_size=options["batch_size"]):
+                batch.append(document)
+                if len(batch) == options["batch_size"]:
+                    posted += len(JournalManager.post_documents(batch))
+                    batch = []
+            if batch:
+                posted += len(JournalManager.post_documents(batch))
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Posted {posted} journal entries."))
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from business.models import Business
+from sales.managers.balance_manager import AccountBalanceManager
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes account running balances and monthly snapshots from the raw "
+        "ledger, or with --verify only reports where they disagree with it"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--business", type=int, help="Only this business")
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Compare the stored balances with the ledger without writing",
+        )
+
+    def handle(self, *args, **options):
+        if options["business"]:
+            business_ids = [options["business"]]
+        else:
+            business_ids = Business.objects.values_list("id", flat=True)
+
+        if not options["verify"]:
+            rows = AccountBalanceManager.rebuild(business_id=options["business"])
+            self.stdout.write(
+                self.style.SUCCESS(f"✅ Rebuilt {rows} balance and snapshot rows.")
+            )
+            return
+
+        problems = 0
+        for business_id in business_ids:
+            for problem in AccountBalanceManager.verify(business_id):
+                problems += 1
+                self.stdout.write(f"business {business_id}: {problem}")
+        if problems:
+            raise CommandError(
+                f"❌ {problems} balances differ from the ledger; run without --verify."
+            )
+        self.stdout.write(self.style.SUCCESS("✅ Balances match the ledger."))
@@ -0,0 +1,119 @@
+from typing import Dict, Tuple
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db import transaction
+
+from accounts.managers.base_manager import BaseModelManager
+from business.models import PaymentMethod
+from sales.models import Account
+
+# Accounts the journal posts to regardless of how a document was paid
+SALES_REVENUE = "4001"
+INVENTORY = "1201"
+OPERATING_EXPENSES = "5002"
+
+# Used when a business has not set an account code on its PaymentMethod
+DEFAULT_PAYMENT_ACCOUNTS = {
+    "cash": "1001",
+    "card": "1002",  # Bank/Card Clearing
+    "online": "1003",  # Online Wallet/Payment Gateway
+    "credit": "2001",  # Accounts Payable
+}
+FALLBACK_PAYMENT_ACCOUNT = "1003"
+
+
+class ChartOfAccountsManager(BaseModelManager):
+    """
+    Resolves account codes to Account ids for journal posting.
+
+    Each business's map (its accounts plus its payment method -> account code
+    settings) is loaded once, shared through the cache and kept in-process.
+    A per-business version token in the cache says whether the in-process
+    copy is still current, so steady-state posting costs no database query.
+    """
+
+    model = Account
+    timeout = 60 * 60 * 24
+
+    # business_id -> (version, chart)
+    _local: Dict[int, Tuple[str, dict]] = {}
+
+    @staticmethod
+    def _key(business_id: int) -> str:
+        return f"chart_of_accounts:{business_id}"
+
+    @staticmethod
+    def _version_key(business_id: int) -> str:
+        return f"chart_of_accounts:{business_id}:version"
+
+    @classmethod
+    def _version(cls, business_id: int) -> str:
+        key = cls._version_key(business_id)
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, uuid4().hex, None)
+            version = cache.get(key)
+        return version
+
+    @classmethod
+    def _load(cls, business_id: int, version: str) -> dict:
+        methods = PaymentMethod.objects.filter(
+            business_id=business_id, active=True
+        ).exclude(account_code="")
+        return {
+            "version": version,
+            "accounts": dict(
+                Account.objects.for_business(business_id).values_list("code", "id")
+            ),
+            "payment_methods": {
+                name.lower(): code
+                for name, code in methods.values_list("method_name", "account_code")
+            },
+        }
+
+    @classmethod
+    def chart(cls, business_id: int) -> dict:
+        version = cls._version(business_id)
+        local = cls._local.get(business_id)
+        if local and local[0] == version:
+            return local[1]
+
+        chart = cache.get(cls._key(business_id))
+        if chart is None or chart["version"] != version:
+            chart = cls._load(business_id, version)
+            cache.set(cls._key(business_id), chart, cls.timeout)
+        cls._local[business_id] = (version, chart)
+        return chart
+
+    @classmethod
+    def account_id(cls, business_id: int, code: str) -> int:
+        try:
+            return cls.chart(business_id)["accounts"][code]
+        except KeyError:
+            raise ValueError(f"Account {code} is not configured for this business.")
+
+    @classmethod
+    def payment_account_id(cls, business_id: int, payment_method: str) -> int:
+        """The account money paid by ``payment_method`` goes in or out of."""
+        method = (payment_method or "").lower()
+        code = cls.chart(business_id)["payment_methods"].get(
+            method
+        ) or DEFAULT_PAYMENT_ACCOUNTS.get(method, FALLBACK_PAYMENT_ACCOUNT)
+        return cls.account_id(business_id, code)
+
+    @classmethod
+    def reset(cls):
+        """Forget every in-process map, e.g. after the cache was cleared."""
+        cls._local.clear()
+
+    @classmethod
+    def invalidate(cls, business_id: int):
+        def bump():
+            cls._local.pop(business_id, None)
+            cache.set(cls._version_key(business_id), uuid4().hex, None)
+
+        # Now, so postings later in this transaction see the change, and again
+        # on commit, so nobody keeps a map loaded from the uncommitted state
+        bump()
+        transaction.on_commit(bump)
@@ -0,0 +1,369 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import Subquery, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from common.dates import business_timezone, start_of_day
+from dashboard.managers.rollup_manager import RollupManager
+from sales.models import Account, AccountBalance, AccountBalanceSnapshot, LedgerEntry
+
+ZERO = Decimal(0)
+
+# Account types whose balance normally sits on the debit side
+DEBIT_NORMAL = ("asset", "expense")
+
+Totals = Dict[int, Tuple[Decimal, Decimal]]
+
+
+def _month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def _next_month(period: date) -> date:
+    return date(period.year + period.month // 12, period.month % 12 + 1, 1)
+
+
+class AccountBalanceManager(RollupManager):
+    """
+    Account balances without summing the whole ledger.
+
+    ``AccountBalance`` holds each account's running totals, updated with every
+    posting. ``AccountBalanceSnapshot`` freezes them at each month's close, so
+    a balance at any earlier moment is the latest snapshot before it plus the
+    ledger rows posted since. The ledger is append-only; after manual edits,
+    ``manage.py rebuild_account_balances`` recomputes both from raw entries.
+    """
+
+    model = AccountBalance
+    key_fields = ("business_id", "account_id")
+    value_fields = ("debit_total", "credit_total")
+
+    @classmethod
+    def record_lines(cls, lines: Iterable[LedgerEntry]):
+        """Add newly posted ledger lines to the running totals."""
+        deltas = defaultdict(lambda: {"debit_total": ZERO, "credit_total": ZERO})
+        for line in lines:
+            values = deltas[(line.business_id, line.account_id)]
+            values["debit_total"] += Decimal(line.debit)
+            values["credit_total"] += Decimal(line.credit)
+        cls.apply_deltas(deltas)
+
+    # ----- Reading balances -----
+
+    @classmethod
+    def balances(cls, business_id: int, until: Optional[datetime] = None) -> Totals:
+        """Debit and credit totals per account id, now or just before ``until``."""
+        if until is None:
+            return {
+                account_id: (debit, credit)
+                for account_id, debit, credit in AccountBalance.objects.for_business(
+                    business_id
+                ).values_list("account_id", "debit_total", "credit_total")
+            }
+
+        tz = business_timezone(business_id)
+        # Months before the one ``until`` falls in closed before ``until``
+        closed_before = _month_start(timezone.localtime(until, tz).date())
+        snapshots = AccountBalanceSnapshot.objects.for_business(business_id)
+        latest = snapshots.filter(period__lt=closed_before).order_by("-period")
+        rows = snapshots.filter(
+            period=Subquery(latest.values("period")[:1])
+        ).values_list("period", "account_id", "debit_total", "credit_total")
+
+        totals = defaultdict(lambda: [ZERO, ZERO])
+        period = None
+        for period, account_id, debit, credit in rows:
+            totals[account_id] = [debit, credit]
+
+        lines = LedgerEntry.objects.for_business(business_id).filter(
+            journal_entry__date__lt=until
+        )
+        if period:
+            lines = lines.filter(
+                journal_entry__date__gte=start_of_day(_next_month(period), tz)
+            )
+        for account_id, debit, credit in (
+            lines.values("account_id")
+            .annotate(debit=Sum("debit"), credit=Sum("credit"))
+            .values_list("account_id", "debit", "credit")
+        ):
+            totals[account_id][0] += debit
+            totals[account_id][1] += credit
+        return {account_id: tuple(values) for account_id, values in totals.items()}
+
+    @classmethod
+    def _balances_on(cls, business_id: int, day: Optional[date]) -> Totals:
+        """Totals at the end of the business-local ``day`` (now if None)."""
+        if day is None:
+            return cls.balances(business_id)
+        tz = business_timezone(business_id)
+        return cls.balances(business_id, start_of_day(day + timedelta(days=1), tz))
+
+    # ----- Monthly close, rebuild and verification -----
+
+    @classmethod
+    def _monthly_totals(cls, business_id: int, tz, since=None, until=None) -> list:
+        """Ledger debit/credit sums per (month, account), oldest month first."""
+        lines = LedgerEntry.objects.for_business(business_id)
+        if since:
+            lines = lines.filter(journal_entry__date__gte=since)
+        if until:
+            lines = lines.filter(journal_entry__date__lt=until)
+        return list(
+            lines.annotate(month=TruncMonth("journal_entry__date", tzinfo=tz))
+            .values("month", "account_id")
+            .annotate(debit=Sum("debit"), credit=Sum("credit"))
+            .order_by("month")
+            .values_list("month", "account_id", "debit", "credit")
+        )
+
+    @staticmethod
+    def _cumulate(totals: dict, monthly: list, first: date, until: date) -> dict:
+        """
+        Roll ``monthly`` sums into ``totals`` month by month from ``first`` up
+        to (not including) ``until``. Returns the closing totals per
+        ``(period, account_id)``; later months are added to ``totals`` only.
+        """
+        by_month = defaultdict(list)
+        for month, account_id, debit, credit in monthly:
+            by_month[_month_start(month.date())].append((account_id, debit, credit))
+
+        closing = {}
+        period = first
+        while period < until:
+            for account_id, debit, credit in by_month.pop(period, ()):
+                totals[account_id][0] += debit
+                totals[account_id][1] += credit
+            for account_id, (debit, credit) in totals.items():
+                closing[(period, account_id)] = (debit, credit)
+            period = _next_month(period)
+
+        for rows in by_month.values():
+            for account_id, debit, credit in rows:
+                totals[account_id][0] += debit
+                totals[account_id][1] += credit
+        return closing
+
+    @classmethod
+    def close_months(cls, business_id: int) -> int:
+        """Snapshot every month that ended since the last close."""
+        tz = business_timezone(business_id)
+        current = _month_start(timezone.localdate(timezone=tz))
+        snapshots = AccountBalanceSnapshot.objects.for_business(business_id)
+        last = snapshots.order_by("-period").values_list("period", flat=True).first()
+        if last and _next_month(last) >= current:
+            return 0
+
+        totals = defaultdict(lambda: [ZERO, ZERO])
+        since = None
+        if last:
+            since = start_of_day(_next_month(last), tz)
+            for account_id, debit, credit in snapshots.filter(period=last).values_list(
+                "account_id", "debit_total", "credit_total"
+            ):
+                totals[account_id] = [debit, credit]
+
+        monthly = cls._monthly_totals(business_id, tz, since, start_of_day(current, tz))
+        if last:
+            first = _next_month(last)
+        elif monthly:
+            first = _month_start(monthly[0][0].date())
+        else:
+            return 0  # nothing posted yet
+
+        closing = cls._cumulate(totals, monthly, first, current)
+        # A concurrent close may have written some of these already
+        AccountBalanceSnapshot.objects.bulk_create(
+            cls._snapshot_rows(business_id, closing), ignore_conflicts=True
+        )
+        return len({period for period, _ in closing})
+
+    @staticmethod
+    def _snapshot_rows(business_id: int, closing: dict) -> List[AccountBalanceSnapshot]:
+        return [
+            AccountBalanceSnapshot(
+                business_id=business_id,
+                account_id=account_id,
+                period=period,
+                debit_total=debit,
+                credit_total=credit,
+            )
+            for (period, account_id), (debit, credit) in closing.items()
+        ]
+
+    @classmethod
+    def expected(cls, business_id: int) -> Tuple[Totals, dict]:
+        """Running totals and closed-month snapshots recomputed from the ledger."""
+        tz = business_timezone(business_id)
+        current = _month_start(timezone.localdate(timezone=tz))
+        monthly = cls._monthly_totals(business_id, tz)
+        totals = defaultdict(lambda: [ZERO, ZERO])
+        closing = {}
+        if monthly:
+            first = _month_start(monthly[0][0].date())
+            closing = cls._cumulate(totals, monthly, first, current)
+        return {key: tuple(values) for key, values in totals.items()}, closing
+
+    @classmethod
+    def rebuild_business(cls, business_id, start=None, end=None) -> int:
+        """
+        Replace the business's running totals and snapshots. Balances are
+        cumulative, so the whole history is recomputed whatever the range.
+        """
+        totals, closing = cls.expected(business_id)
+        with transaction.atomic():
+            AccountBalance.objects.for_business(business_id).delete()
+            AccountBalanceSnapshot.objects.for_business(business_id).delete()
+            AccountBalance.objects.bulk_create(
+                [
+                    AccountBalance(
+                        business_id=business_id,
+                        account_id=account_id,
+                        debit_total=debit,
+                        credit_total=credit,
+                    )
+                    for account_id, (debit, credit) in totals.items()
+                ]
+            )
+            AccountBalanceSnapshot.objects.bulk_create(
+                cls._snapshot_rows(business_id, closing)
+            )
+        return len(totals) + len(closing)
+
+    @classmethod
+    def verify(cls, business_id: int) -> List[str]:
+        """
+        Compare the stored running totals and every stored snapshot with the
+        raw ledger. Returns a description of each difference.
+        """
+        totals, closing = cls.expected(business_id)
+        stored_totals = cls.balances(business_id)
+        stored_closing = {
+            (period, account_id): (debit, credit)
+            for period, account_id, debit, credit in AccountBalanceSnapshot.objects.for_business(
+                business_id
+            ).values_list(
+                "period", "account_id", "debit_total", "credit_total"
+            )
+        }
+        stored_periods = {period for period, _ in stored_closing}
+        zero = (ZERO, ZERO)
+
+        problems = []
+        for account_id in set(totals) | set(stored_totals):
+            if stored_totals.get(account_id, zero) != totals.get(account_id, zero):
+                problems.append(
+                    f"account {account_id}: balance {stored_totals.get(account_id, zero)} "
+                    f"!= ledger {totals.get(account_id, zero)}"
+                )
+        for key in set(stored_closing) | {
+            key for key in closing if key[0] in stored_periods
+        }:
+            if stored_closing.get(key, zero) != closing.get(key, zero):
+                problems.append(
+                    f"account {key[1]} {key[0]:%Y-%m}: snapshot "
+                    f"{stored_closing.get(key, zero)} != ledger {closing.get(key, zero)}"
+                )
+        return problems
+
+    # ----- Reports -----
+
+    @staticmethod
+    def _accounts(business_id: int) -> list:
+        return list(
+            Account.objects.for_business(business_id)
+            .order_by("code")
+            .values("id", "code", "name", "type")
+        )
+
+    @staticmethod
+    def _net(account: dict, totals: Totals) -> Decimal:
+        """The balance on the account's normal side."""
+        debit, credit = totals.get(account["id"], (ZERO, ZERO))
+        return debit - credit if account["type"] in DEBIT_NORMAL else credit - debit
+
+    @classmethod
+    def trial_balance(cls, business_id: int, as_of: Optional[date] = None) -> dict:
+        totals = cls._balances_on(business_id, as_of)
+        rows = []
+        for account in cls._accounts(business_id):
+            debit, credit = totals.get(account["id"], (ZERO, ZERO))
+            if not debit and not credit:
+                continue
+            net = debit - credit
+            rows.append(
+                {
+                    "code": account["code"],
+                    "name": account["name"],
+                    "type": account["type"],
+                    "debit": max(net, ZERO),
+                    "credit": max(-net, ZERO),
+                }
+            )
+        return {
+            "as_of": as_of,
+            "accounts": rows,
+            "total_debit": sum((row["debit"] for row in rows), ZERO),
+            "total_credit": sum((row["credit"] for row in rows), ZERO),
+        }
+
+    @classmethod
+    def profit_and_loss(cls, business_id: int, start: date, end: date) -> dict:
+        before = cls.balances(
+            business_id, start_of_day(start, business_timezone(business_id))
+        )
+        after = cls._balances_on(business_id, end)
+        sections = {"income": [], "expense": []}
+        for account in cls._accounts(business_id):
+            if account["type"] not in sections:
+                continue
+            amount = cls._net(account, after) - cls._net(account, before)
+            if amount:
+                sections[account["type"]].append(
+                    {"code": account["code"], "name": account["name"], "amount": amount}
+                )
+
+        total_income = sum((row["amount"] for row in sections["income"]), ZERO)
+        total_expenses = sum((row["amount"] for row in sections["expense"]), ZERO)
+        return {
+            "start": start,
+            "end": end,
+            "income": sections["income"],
+            "expenses": sections["expense"],
+            "total_income": total_income,
+            "total_expenses": total_expenses,
+            "net_profit": total_income - total_expenses,
+        }
+
+    @classmethod
+    def balance_sheet(cls, business_id: int, as_of: Optional[date] = None) -> dict:
+        totals = cls._balances_on(business_id, as_of)
+        sections = defaultdict(list)
+        for account in cls._accounts(business_id):
+            amount = cls._net(account, totals)
+            if amount:
+                sections[account["type"]].append(
+                    {"code": account["code"], "name": account["name"], "amount": amount}
+                )
+
+        def total(section):
+            return sum((row["amount"] for row in sections[section]), ZERO)
+
+        # Profit not yet closed into an equity account
+        current_earnings = total("income") - total("expense")
+        return {
+            "as_of": as_of,
+            "assets": sections["asset"],
+            "liabilities": sections["liability"],
+            "equity": sections["equity"],
+            "current_earnings": current_earnings,
+            "total_assets": total("asset"),
+            "total_liabilities_and_equity": total("liability")
+            + total("equity")
+            + current_earnings,
+        }
@@ -0,0 +1,123 @@
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.template.loader import render_to_string
+
+from accounts.managers.base_manager import BaseModelManager
+from sales.models import Sale
+from sales.pdf import render_pdf
+
+
+class InvoicePDFManager(BaseModelManager):
+    """
+    Rendered sale invoices, stored content-addressed.
+
+    A PDF is stored under a name derived from the sale, its item count and
+    the time it, its customer, items or their products last changed, so a
+    stored file is valid for as long as its name is current and nothing ever
+    has to be invalidated. The same name doubles as the response ETag.
+    """
+
+    model = Sale
+    template = "sales/invoice.html"
+
+    @staticmethod
+    def last_modified(sale: Sale) -> datetime:
+        """When anything the invoice shows last changed."""
+        # Uses the prefetched items and products when there are some
+        items = sale.items.all()
+        return max(
+            [
+                sale.updated_on,
+                *([sale.customer.updated_on] if sale.customer_id else []),
+                *(item.updated_on for item in items),
+                # Lines whose product was deleted keep a null product
+                *(item.product.updated_on for item in items if item.product_id),
+            ]
+        )
+
+    @classmethod
+    def etag(cls, sale: Sale) -> str:
+        # The counts catch deleted items and products, which leave no newer
+        # timestamp behind
+        items = sale.items.all()
+        products = sum(1 for item in items if item.product_id)
+        version = (
+            f"{sale.business_id}:{sale.id}:{len(items)}:{products}:"
+            f"{cls.last_modified(sale).isoformat()}"
+        )
+        return hashlib.sha256(version.encode()).hexdigest()[:32]
+
+    @staticmethod
+    def _directory(sale: Sale) -> str:
+        return f"invoices/{sale.business_id}/sale_{sale.id}"
+
+    @classmethod
+    def path(cls, sale: Sale) -> str:
+        return f"{cls._directory(sale)}/{cls.etag(sale)}.pdf"
+
+    @classmethod
+    def cached(cls, sale: Sale) -> Optional[bytes]:
+        path = cls.path(sale)
+        if not default_storage.exists(path):
+            return None
+        with default_storage.open(path, "rb") as pdf:
+            return pdf.read()
+
+    @classmethod
+    def store(cls, sale: Sale, pdf: bytes) -> str:
+        """Save ``pdf`` as the current version and drop the older ones."""
+        path = cls.path(sale)
+        if not default_storage.exists(path):
+            name = default_storage.save(path, ContentFile(pdf))
+            if name != path:
+                # Another renderer stored the same version first
+                default_storage.delete(name)
+
+        directory = cls._directory(sale)
+        for filename in default_storage.listdir(directory)[1]:
+            if f"{directory}/{filename}" != path:
+                default_storage.delete(f"{directory}/{filename}")
+        return path
+
+    @classmethod
+    def html(cls, sale: Sale) -> str:
+        return render_to_string(cls.template, {"sale": sale})
+
+    @classmethod
+    def pdf(cls, sale: Sale) -> bytes:
+        pdf = cls.cached(sale)
+        if pdf is None:
+            pdf = render_pdf(cls.html(sale))
+            cls.store(sale, pdf)
+        return pdf
+
+    @classmethod
+    def pdfs(
+        cls, sales: Iterable[Sale], max_workers: Optional[int] = None
+    ) -> Dict[int, bytes]:
+        """
+        PDFs for many sales, keyed by sale id. Templates are rendered here;
+        the PDFs that are not stored yet are rendered in a process pool.
+        """
+        sales = list(sales)
+        pdfs = {sale.id: cls.cached(sale) for sale in sales}
+        missing = [sale for sale in sales if pdfs[sale.id] is None]
+
+        documents = [cls.html(sale) for sale in missing]
+        if len(documents) > 1:
+            workers = max_workers or settings.INVOICE_PDF_WORKERS
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                rendered = list(pool.map(render_pdf, documents))
+        else:
+            rendered = [render_pdf(document) for document in documents]
+
+        for sale, pdf in zip(missing, rendered):
+            cls.store(sale, pdf)
+            pdfs[sale.id] = pdf
+        return pdfs
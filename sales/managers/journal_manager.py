@@ -0,0 +1,190 @@
+from decimal import Decimal
+from typing import Iterable, List, Optional
+
+from django.db import IntegrityError, transaction
+
+from accounts.managers.base_manager import BaseModelManager
+from sales.managers.account_manager import (
+    ChartOfAccountsManager,
+    INVENTORY,
+    OPERATING_EXPENSES,
+    SALES_REVENUE,
+)
+from sales.managers.balance_manager import AccountBalanceManager
+from sales.models import Expense, JournalEntry, LedgerEntry, Purchase, Sale
+
+
+class JournalManager(BaseModelManager):
+    """
+    The one write path for journal entries.
+
+    A posting is a plain dict: ``business_id``, ``reference``,
+    ``description`` and ``lines``, a list of ``(account_id, debit, credit)``.
+    Postings are built in memory, checked to balance and written with one
+    insert for the journal entries and one for all of their ledger lines.
+    ``(business, reference)`` is unique, so posting a reference that is
+    already in the journal is a no-op: replays and retries never double-post.
+    Account running balances are updated in the same transaction.
+    """
+
+    model = JournalEntry
+
+    @classmethod
+    def sale_posting(cls, sale: Sale) -> Optional[dict]:
+        if not sale.business_id:
+            return None
+        amount = sale.total_amount
+        return {
+            "business_id": sale.business_id,
+            "reference": f"sale_{sale.id}",
+            "description": f"Sale #{sale.id} - {sale.payment_method}",
+            "lines": [
+                (
+                    ChartOfAccountsManager.payment_account_id(
+                        sale.business_id, sale.payment_method
+                    ),
+                    amount,
+                    0,
+                ),
+                (
+                    ChartOfAccountsManager.account_id(sale.business_id, SALES_REVENUE),
+                    0,
+                    amount,
+                ),
+            ],
+        }
+
+    @classmethod
+    def purchase_posting(cls, purchase: Purchase) -> dict:
+        amount = purchase.total_amount
+        return {
+            "business_id": purchase.business_id,
+            "reference": f"purchase_{purchase.id}",
+            "description": f"Purchase #{purchase.id} - {purchase.payment_method}",
+            "lines": [
+                # Debit: Inventory (Asset)
+                (
+                    ChartOfAccountsManager.account_id(purchase.business_id, INVENTORY),
+                    amount,
+                    0,
+                ),
+                # Credit: Cash/Bank/Payables
+                (
+                    ChartOfAccountsManager.payment_account_id(
+                        purchase.business_id, purchase.payment_method
+                    ),
+                    0,
+                    amount,
+                ),
+            ],
+        }
+
+    @classmethod
+    def expense_posting(cls, expense: Expense) -> dict:
+        amount = expense.amount
+        return {
+            "business_id": expense.business_id,
+            "reference": f"expense_{expense.id}",
+            "description": f"Expense {expense.category} - {amount}",
+            "lines": [
+                (
+                    ChartOfAccountsManager.account_id(
+                        expense.business_id, OPERATING_EXPENSES
+                    ),
+                    amount,
+                    0,
+                ),
+                (
+                    ChartOfAccountsManager.payment_account_id(
+                        expense.business_id, expense.payment_method
+                    ),
+                    0,
+                    amount,
+                ),
+            ],
+        }
+
+    @classmethod
+    def posting_for(cls, document) -> Optional[dict]:
+        if isinstance(document, Sale):
+            return cls.sale_posting(document)
+        if isinstance(document, Purchase):
+            return cls.purchase_posting(document)
+        if isinstance(document, Expense):
+            return cls.expense_posting(document)
+        raise TypeError(f"Cannot post {type(document).__name__} to the journal.")
+
+    @staticmethod
+    def check_balanced(posting: dict):
+        debit = sum((Decimal(line[1]) for line in posting["lines"]), Decimal(0))
+        credit = sum((Decimal(line[2]) for line in posting["lines"]), Decimal(0))
+        if not posting["lines"] or debit != credit:
+            raise ValueError(
+                f"Journal {posting['reference']} does not balance: "
+                f"debit {debit}, credit {credit}."
+            )
+
+    @classmethod
+    def post_documents(cls, documents: Iterable) -> List[JournalEntry]:
+        """Post sales, purchases and expenses, skipping already posted ones."""
+        postings = [cls.posting_for(document) for document in documents]
+        return cls.post([posting for posting in postings if posting])
+
+    @classmethod
+    def post(cls, postings: List[dict]) -> List[JournalEntry]:
+        """Write ``postings`` not in the journal yet; returns the new entries."""
+        for posting in postings:
+            cls.check_balanced(posting)
+        if not postings:
+            return []
+
+        try:
+            with transaction.atomic():
+                return cls._write(postings)
+        except IntegrityError:
+            # A concurrent poster won the race for one of the references;
+            # its entry is committed now and gets skipped on the retry
+            with transaction.atomic():
+                return cls._write(postings)
+
+    @classmethod
+    def _write(cls, postings: List[dict]) -> List[JournalEntry]:
+        posted = set(
+            JournalEntry.objects.filter(
+                business_id__in={posting["business_id"] for posting in postings},
+                reference__in={posting["reference"] for posting in postings},
+            ).values_list("business_id", "reference")
+        )
+        pending = {}
+        for posting in postings:
+            key = (posting["business_id"], posting["reference"])
+            if key not in posted:
+                pending.setdefault(key, posting)
+        if not pending:
+            return []
+
+        journals = JournalEntry.objects.bulk_create(
+            [
+                JournalEntry(
+                    business_id=posting["business_id"],
+                    reference=posting["reference"],
+                    description=posting["description"],
+                )
+                for posting in pending.values()
+            ]
+        )
+        lines = LedgerEntry.objects.bulk_create(
+            [
+                LedgerEntry(
+                    business_id=journal.business_id,
+                    journal_entry=journal,
+                    account_id=account_id,
+                    debit=debit,
+                    credit=credit,
+                )
+                for journal, posting in zip(journals, pending.values())
+                for account_id, debit, credit in posting["lines"]
+            ]
+        )
+        AccountBalanceManager.record_lines(lines)
+        return journals
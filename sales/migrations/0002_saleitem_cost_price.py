@@ -0,0 +1,20 @@
+# Generated by Django 5.1.1 on 2026-10-18 02:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("sales", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="saleitem",
+            name="cost_price",
+            field=models.DecimalField(
+                blank=True, decimal_places=2, max_digits=12, null=True
+            ),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.1.1 on 2026-10-18 02:24
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("business", "0001_initial"),
+        ("customers", "0001_initial"),
+        ("products", "0004_productimportjob"),
+        ("sales", "0002_saleitem_cost_price"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="sale",
+            name="business",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="sales",
+                to="business.business",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="sale",
+            index=models.Index(
+                fields=["business", "sale_date"], name="sale_business_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="saleitem",
+            index=models.Index(
+                fields=["sale", "product"], name="saleitem_sale_product_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,24 @@
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_sale_business(apps, schema_editor):
+    Sale = apps.get_model("sales", "Sale")
+    Party = apps.get_model("customers", "Party")
+    Sale.objects.filter(business__isnull=True, customer__isnull=False).update(
+        business_id=Subquery(
+            Party.objects.filter(pk=OuterRef("customer_id")).values("business_id")[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("customers", "0001_initial"),
+        ("sales", "0003_sale_business_and_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_sale_business, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.1 on 2026-10-18 02:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("business", "0001_initial"),
+        ("sales", "0004_backfill_sale_business"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ledgerentry",
+            name="business",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="ledger_entries",
+                to="business.business",
+            ),
+        ),
+        migrations.AddField(
+            model_name="saleitem",
+            name="business",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="sale_items",
+                to="business.business",
+            ),
+        ),
+    ]
@@ -0,0 +1,33 @@
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_business(apps, schema_editor):
+    Sale = apps.get_model("sales", "Sale")
+    SaleItem = apps.get_model("sales", "SaleItem")
+    JournalEntry = apps.get_model("sales", "JournalEntry")
+    LedgerEntry = apps.get_model("sales", "LedgerEntry")
+
+    SaleItem.objects.filter(business__isnull=True).update(
+        business_id=Subquery(
+            Sale.objects.filter(pk=OuterRef("sale_id")).values("business_id")[:1]
+        )
+    )
+    LedgerEntry.objects.filter(business__isnull=True).update(
+        business_id=Subquery(
+            JournalEntry.objects.filter(pk=OuterRef("journal_entry_id")).values(
+                "business_id"
+            )[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("sales", "0005_sale_item_and_ledger_entry_business"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_business, migrations.RunPython.noop),
+    ]
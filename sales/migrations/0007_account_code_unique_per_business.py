@@ -0,0 +1,27 @@
+# Generated by Django 5.1.1 on 2026-10-18 02:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("business", "0002_paymentmethod_account_code"),
+        ("sales", "0006_backfill_sale_item_and_ledger_entry_business"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="account",
+            name="code",
+            field=models.CharField(max_length=20),
+        ),
+        migrations.AddConstraint(
+            model_name="account",
+            constraint=models.UniqueConstraint(
+                fields=("business", "code"), name="account_business_code_uniq"
+            ),
+        ),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations
+from django.db.models import Min
+
+
+def dedupe_journal_entries(apps, schema_editor):
+    """
+    Sales were posted twice by two post_save receivers. Keep the first
+    journal entry per (business, reference); the rest go with their lines.
+    """
+    JournalEntry = apps.get_model("sales", "JournalEntry")
+    posted = JournalEntry.objects.filter(reference__isnull=False)
+    first_ids = (
+        posted.values("business_id", "reference")
+        .annotate(first_id=Min("id"))
+        .values("first_id")
+    )
+    posted.exclude(id__in=first_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("sales", "0007_account_code_unique_per_business"),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_journal_entries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.1 on 2026-10-18 02:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("business", "0002_paymentmethod_account_code"),
+        ("sales", "0008_dedupe_journal_entries"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name="journalentry",
+            constraint=models.UniqueConstraint(
+                fields=("business", "reference"),
+                name="journalentry_business_reference_uniq",
+            ),
+        ),
+    ]
@@ -0,0 +1,167 @@
+# Generated by Django 5.1.1 on 2026-10-18 02:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("business", "0002_paymentmethod_account_code"),
+        ("sales", "0009_journal_entry_reference_unique"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AccountBalance",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_on", models.DateTimeField(auto_now_add=True)),
+                ("updated_on", models.DateTimeField(auto_now=True)),
+                (
+                    "debit_total",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                (
+                    "credit_total",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+        migrations.CreateModel(
+            name="AccountBalanceSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_on", models.DateTimeField(auto_now_add=True)),
+                ("updated_on", models.DateTimeField(auto_now=True)),
+                ("period", models.DateField()),
+                (
+                    "debit_total",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                (
+                    "credit_total",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="journalentry",
+            index=models.Index(
+                fields=["business", "date"], name="journal_business_date_idx"
+            ),
+        ),
+        migrations.AddField(
+            model_name="accountbalance",
+            name="account",
+            field=models.OneToOneField(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="balance",
+                to="sales.account",
+            ),
+        ),
+        migrations.AddField(
+            model_name="accountbalance",
+            name="business",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="account_balances",
+                to="business.business",
+            ),
+        ),
+        migrations.AddField(
+            model_name="accountbalance",
+            name="created_by",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="%(class)s_created",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddField(
+            model_name="accountbalance",
+            name="updated_by",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="%(class)s_updated",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddField(
+            model_name="accountbalancesnapshot",
+            name="account",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="snapshots",
+                to="sales.account",
+            ),
+        ),
+        migrations.AddField(
+            model_name="accountbalancesnapshot",
+            name="business",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="balance_snapshots",
+                to="business.business",
+            ),
+        ),
+        migrations.AddField(
+            model_name="accountbalancesnapshot",
+            name="created_by",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="%(class)s_created",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddField(
+            model_name="accountbalancesnapshot",
+            name="updated_by",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="%(class)s_updated",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="accountbalancesnapshot",
+            index=models.Index(
+                fields=["business", "period"], name="snapshot_business_period_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="accountbalancesnapshot",
+            constraint=models.UniqueConstraint(
+                fields=("account", "period"), name="unique_account_balance_snapshot"
+            ),
+        ),
+    ]
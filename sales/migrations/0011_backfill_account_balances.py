@@ -0,0 +1,42 @@
+from django.db import migrations
+from django.db.models import Sum
+
+
+def backfill_account_balances(apps, schema_editor):
+    AccountBalance = apps.get_model("sales", "AccountBalance")
+    LedgerEntry = apps.get_model("sales", "LedgerEntry")
+
+    totals = (
+        LedgerEntry.objects.values("account_id", "account__business_id")
+        .annotate(debit_total=Sum("debit"), credit_total=Sum("credit"))
+        .order_by()
+    )
+    AccountBalance.objects.bulk_create(
+        (
+            AccountBalance(
+                business_id=row["account__business_id"],
+                account_id=row["account_id"],
+                debit_total=row["debit_total"] or 0,
+                credit_total=row["credit_total"] or 0,
+            )
+            for row in totals.iterator()
+        ),
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+def remove_account_balances(apps, schema_editor):
+    apps.get_model("sales", "AccountBalance").objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("sales", "0010_account_balances"),
+    ]
+
+    operations = [
+        # Snapshots of the closed months follow from close_account_balances
+        migrations.RunPython(backfill_account_balances, remove_account_balances),
+    ]
@@ -11,16 +11,24 @@ from django.db.models import (
     TextField,
     EmailField,
     PositiveIntegerField,
+    Index,
+    UniqueConstraint,
 )
 from django.core.validators import MinValueValidator
-from django.db import transaction
-from django.core.exceptions import ObjectDoesNotExist, MultipleObjectsReturned
 
-from common.models import GenericModel
+from common.models import GenericModel, LoadedValuesMixin, TenantModel
 from products.models import Product
+from products.managers.inventory_manager import InventoryManager
 
 
-class Sale(GenericModel):
+class Sale(LoadedValuesMixin, TenantModel):
+    business = ForeignKey(
+        "business.Business",
+        on_delete=CASCADE,
+        null=True,
+        blank=True,
+        related_name="sales",
+    )
     customer = ForeignKey(
         "customers.Customer", on_delete=SET_NULL, null=True, blank=True, related_name="sales"
     )
@@ -33,57 +41,35 @@ class Sale(GenericModel):
         choices=[("cash", "Cash"), ("card", "Card"), ("online", "Online Payment")],
     )
 
+    class Meta:
+        indexes = [
+            Index(fields=["business", "sale_date"], name="sale_business_date_idx"),
+        ]
+
     def __str__(self):
         return f"Sale #{self.id} - {self.total_amount}"
 
+    def save(self, *args, **kwargs):
+        if self.business_id is None and self.customer_id:
+            self.business_id = self.customer.business_id
+        super().save(*args, **kwargs)
+
     def create_journal_entry(self):
         """Auto create a journal entry for this sale"""
+        from sales.managers.journal_manager import JournalManager
+
+        return JournalManager.post_documents([self])
 
-        # 1. Get business via customer
-        business = self.customer.business if self.customer else None
-        if not business:
-            return
-
-        # 2. Create journal entry
-        journal = JournalEntry.objects.create(
-            business=business,
-            description=f"Sale #{self.id} - {self.payment_method}",
-            reference=f"sale_{self.id}",
-        )
-
-        # 3. Choose accounts
-        # NOTE: in real-world SaaS, these accounts should be configurable per business
-        if self.payment_method == "cash":
-            debit_account = Account.objects.get(business=business, code="1001")  # Cash
-        elif self.payment_method == "card":
-            debit_account = Account.objects.get(
-                business=business, code="1002"
-            )  # Bank/Card Clearing
-        else:
-            debit_account = Account.objects.get(
-                business=business, code="1003"
-            )  # Online Wallet/Payment Gateway
-
-        credit_account = Account.objects.get(
-            business=business, code="4001"
-        )  # Sales Revenue
-
-        # 4. Create ledger entries (double entry)
-        LedgerEntry.objects.create(
-            journal_entry=journal,
-            account=debit_account,
-            debit=self.total_amount,
-            credit=0,
-        )
-        LedgerEntry.objects.create(
-            journal_entry=journal,
-            account=credit_account,
-            debit=0,
-            credit=self.total_amount,
-        )
-
-
-class SaleItem(GenericModel):
+
+class SaleItem(LoadedValuesMixin, TenantModel):
+    # Denormalized from the sale so tenant filters need no join
+    business = ForeignKey(
+        "business.Business",
+        on_delete=CASCADE,
+        null=True,
+        blank=True,
+        related_name="sale_items",
+    )
     sale = ForeignKey(Sale, on_delete=CASCADE, related_name="items")
     product = ForeignKey(
         Product, on_delete=SET_NULL, null=True, blank=True, related_name="sale_items"
@@ -95,13 +81,27 @@ class SaleItem(GenericModel):
     subtotal = DecimalField(
         max_digits=12, decimal_places=2, validators=[MinValueValidator(0)]
     )  # quantity * price
+    cost_price = DecimalField(
+        max_digits=12, decimal_places=2, null=True, blank=True
+    )  # unit cost at the time of sale, if known
+
+    class Meta:
+        indexes = [
+            Index(fields=["sale", "product"], name="saleitem_sale_product_idx"),
+        ]
 
     def save(self, *args, **kwargs):
+        adding = self._state.adding
+        if self.business_id is None and self.sale_id:
+            self.business_id = self.sale.business_id
         self.subtotal = self.quantity * self.price
+        if adding and self.cost_price is None and self.product:
+            self.cost_price = self.product.cost_price
         super().save(*args, **kwargs)
 
-        # 🔹 Reduce stock if sale is finalized (not just draft)
-        if self.sale and self.sale.id:  # ensure parent sale exists
+        # 🔹 Reduce stock if sale is finalized (not just draft). Later quantity
+        # changes are applied by the post_save signal.
+        if adding and self.sale and self.sale.id:  # ensure parent sale exists
             if self.product and not self.product.is_service:
                 # Record stock movement
                 StockMovement.objects.create(
@@ -113,8 +113,9 @@ class SaleItem(GenericModel):
                 )
 
                 # Reduce product stock
-                self.product.stock = max(0, self.product.stock - self.quantity)
-                self.product.save()
+                InventoryManager.adjust_product_stock(
+                    self.product_id, -self.quantity, clamp=True
+                )
 
     def __str__(self):
         return f"{self.product.name if self.product else 'N/A'} x {self.quantity}"
@@ -149,7 +150,7 @@ class Tax(GenericModel):
     )
 
 
-class SaleReturn(GenericModel):
+class SaleReturn(LoadedValuesMixin, GenericModel):
     sale_item = ForeignKey(SaleItem, on_delete=CASCADE, related_name="returns")
     quantity = IntegerField()
     reason = TextField(blank=True, null=True)
@@ -158,10 +159,10 @@ class SaleReturn(GenericModel):
     )
 
 
-class Account(GenericModel):
+class Account(TenantModel):
     business = ForeignKey("business.Business", on_delete=CASCADE, related_name="accounts")
     name = CharField(max_length=100)
-    code = CharField(max_length=20, unique=True)  # e.g., 1001 = Cash
+    code = CharField(max_length=20)  # e.g., 1001 = Cash
     type = CharField(
         max_length=20,
         choices=[
@@ -173,11 +174,18 @@ class Account(GenericModel):
         ],
     )
 
+    class Meta:
+        constraints = [
+            UniqueConstraint(
+                fields=["business", "code"], name="account_business_code_uniq"
+            ),
+        ]
+
     def __str__(self):
         return f"{self.code} - {self.name}"
 
 
-class JournalEntry(GenericModel):
+class JournalEntry(TenantModel):
     business = ForeignKey("business.Business", on_delete=CASCADE, related_name="journal_entries")
     date = DateTimeField(auto_now_add=True)
     description = CharField(max_length=255, blank=True, null=True)
@@ -185,11 +193,31 @@ class JournalEntry(GenericModel):
         max_length=100, blank=True, null=True
     )  # e.g., Sale ID, Invoice No.
 
+    class Meta:
+        indexes = [
+            Index(fields=["business", "date"], name="journal_business_date_idx"),
+        ]
+        constraints = [
+            # Posting a document twice is a no-op (see JournalManager)
+            UniqueConstraint(
+                fields=["business", "reference"],
+                name="journalentry_business_reference_uniq",
+            ),
+        ]
+
     def __str__(self):
         return f"JournalEntry #{self.id} - {self.date.date()}"
 
 
-class LedgerEntry(GenericModel):
+class LedgerEntry(TenantModel):
+    # Denormalized from the journal entry so tenant filters need no join
+    business = ForeignKey(
+        "business.Business",
+        on_delete=CASCADE,
+        null=True,
+        blank=True,
+        related_name="ledger_entries",
+    )
     journal_entry = ForeignKey(JournalEntry, on_delete=CASCADE, related_name="entries")
     account = ForeignKey(Account, on_delete=CASCADE, related_name="entries")
     debit = DecimalField(
@@ -199,11 +227,62 @@ class LedgerEntry(GenericModel):
         max_digits=12, decimal_places=2, validators=[MinValueValidator(0)]
     )
 
+    def save(self, *args, **kwargs):
+        if self.business_id is None and self.journal_entry_id:
+            self.business_id = self.journal_entry.business_id
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.account.name} | Debit: {self.debit} | Credit: {self.credit}"
 
 
-class Purchase(GenericModel):
+class AccountBalance(TenantModel):
+    """
+    Running debit/credit totals of an account, maintained by JournalManager on
+    every posting; rebuild with ``manage.py rebuild_account_balances``.
+    """
+
+    business = ForeignKey(
+        "business.Business", on_delete=CASCADE, related_name="account_balances"
+    )
+    account = OneToOneField(Account, on_delete=CASCADE, related_name="balance")
+    debit_total = DecimalField(max_digits=14, decimal_places=2, default=0)
+    credit_total = DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"{self.account_id}: Dr {self.debit_total} / Cr {self.credit_total}"
+
+
+class AccountBalanceSnapshot(TenantModel):
+    """
+    An account's cumulative totals at the close of a month (``period`` is the
+    month's first day, in the business's timezone). Reports start from the
+    latest closed month and only sum the ledger rows posted after it.
+    """
+
+    business = ForeignKey(
+        "business.Business", on_delete=CASCADE, related_name="balance_snapshots"
+    )
+    account = ForeignKey(Account, on_delete=CASCADE, related_name="snapshots")
+    period = DateField()
+    debit_total = DecimalField(max_digits=14, decimal_places=2, default=0)
+    credit_total = DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(
+                fields=["account", "period"], name="unique_account_balance_snapshot"
+            ),
+        ]
+        indexes = [
+            Index(fields=["business", "period"], name="snapshot_business_period_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.account_id} {self.period}: Dr {self.debit_total} / Cr {self.credit_total}"
+
+
+class Purchase(TenantModel):
     business = ForeignKey("business.Business", on_delete=CASCADE, related_name="purchases")
     purchase_date = DateTimeField(auto_now_add=True)
     total_amount = DecimalField(
@@ -219,41 +298,12 @@ class Purchase(GenericModel):
         return f"Purchase #{self.id} - {self.total_amount}"
 
     def create_journal_entry(self):
-        journal = JournalEntry.objects.create(
-            business=self.business,
-            description=f"Purchase #{self.id} - {self.payment_method}",
-            reference=f"purchase_{self.id}",
-        )
-
-        # Debit: Inventory (Asset)
-        debit_account = Account.objects.get(
-            business=self.business, code="1201"
-        )  # Inventory
-
-        # Credit: Cash/Bank/Payables
-        if self.payment_method == "cash":
-            credit_account = Account.objects.get(business=self.business, code="1001")
-        elif self.payment_method == "online":
-            credit_account = Account.objects.get(business=self.business, code="1003")
-        else:  # credit purchase
-            credit_account = Account.objects.get(business=self.business, code="2001")
-
-        # Double entry
-        LedgerEntry.objects.create(
-            journal_entry=journal,
-            account=debit_account,
-            debit=self.total_amount,
-            credit=0,
-        )
-        LedgerEntry.objects.create(
-            journal_entry=journal,
-            account=credit_account,
-            debit=0,
-            credit=self.total_amount,
-        )
-
-
-class Expense(GenericModel):
+        from sales.managers.journal_manager import JournalManager
+
+        return JournalManager.post_documents([self])
+
+
+class Expense(TenantModel):
     business = ForeignKey("business.Business", on_delete=CASCADE, related_name="expenses")
     expense_date = DateTimeField(auto_now_add=True)
     description = CharField(max_length=255)
@@ -279,68 +329,10 @@ class Expense(GenericModel):
 
     def create_journal_entry(self):
         """Auto create a journal entry for this expense"""
+        from sales.managers.journal_manager import JournalManager
 
         try:
-            with transaction.atomic():
-                journal = JournalEntry.objects.create(
-                    business=self.business,
-                    description=f"Expense {self.category} - {self.amount}",
-                    reference=f"expense_{self.id}",
-                )
-
-                # Debit: Expense Account (5002)
-                try:
-                    debit_account = Account.objects.get(
-                        business=self.business, code="5002"
-                    )
-                except ObjectDoesNotExist:
-                    raise ValueError(
-                        "Expense account (5002) not configured for this business."
-                    )
-                except MultipleObjectsReturned:
-                    raise ValueError(
-                        "Multiple expense accounts (5002) found for this business."
-                    )
-
-                # Credit: Cash/Bank/Other
-                try:
-                    if self.payment_method == "cash":
-                        credit_account = Account.objects.get(
-                            business=self.business, code="1001"
-                        )
-                    elif self.payment_method == "card":
-                        credit_account = Account.objects.get(
-                            business=self.business, code="1002"
-                        )
-                    else:
-                        credit_account = Account.objects.get(
-                            business=self.business, code="1003"
-                        )
-                except ObjectDoesNotExist:
-                    raise ValueError(
-                        f"Payment method account not configured for {self.payment_method}."
-                    )
-                except MultipleObjectsReturned:
-                    raise ValueError(
-                        f"Multiple accounts found for {self.payment_method} payments."
-                    )
-
-                # Double-entry postings
-                LedgerEntry.objects.create(
-                    journal_entry=journal,
-                    account=debit_account,
-                    debit=self.amount,
-                    credit=0,
-                )
-                LedgerEntry.objects.create(
-                    journal_entry=journal,
-                    account=credit_account,
-                    debit=0,
-                    credit=self.amount,
-                )
-
-                return journal
-
+            return JournalManager.post_documents([self])
         except Exception as e:
             # Log error or re-raise
             raise RuntimeError(
@@ -384,10 +376,11 @@ class PurchaseItem(GenericModel):
     subtotal = DecimalField(max_digits=12, decimal_places=2)
 
     def save(self, *args, **kwargs):
+        adding = self._state.adding
         self.subtotal = self.quantity * self.cost_price
         super().save(*args, **kwargs)
 
-        if self.product and not self.product.is_service:
+        if adding and self.product and not self.product.is_service:
             StockMovement.objects.create(
                 product=self.product,
                 variant=None,
@@ -397,5 +390,7 @@ class PurchaseItem(GenericModel):
             )
 
             # Increase stock
-            self.product.stock += self.quantity
-            self.product.save()
+            InventoryManager.adjust_product_stock(self.product_id, self.quantity)
+            Product.objects.filter(pk=self.product_id).update(
+                cost_price=self.cost_price
+            )
@@ -0,0 +1,9 @@
+def render_pdf(html_string: str) -> bytes:
+    """
+    HTML to PDF bytes. Kept free of Django imports so pool workers can run it
+    without setting Django up.
+    """
+    # WeasyPrint needs Pango at import time; only load it when rendering
+    from weasyprint import HTML
+
+    return HTML(string=html_string).write_pdf()
@@ -6,7 +6,9 @@ from rest_framework.serializers import (
     ValidationError,
 )
 from .models import Sale, SaleItem
+from .managers.sale_manager import SaleManager
 from products.models import Product
+from products.managers.inventory_manager import InventoryManager
 
 
 class SaleItemSerializer(ModelSerializer):
@@ -33,36 +35,12 @@ class SaleSerializer(ModelSerializer):
             "total_amount",
             "items",
         ]
-        read_only_fields = ["total_amount", "sale_date"]
+        # The business always comes from the signed-in user (see SaleViewSet)
+        read_only_fields = ["business", "total_amount", "sale_date"]
 
     def create(self, validated_data):
         items_data = validated_data.pop("items")
-        sale = Sale.objects.create(**validated_data)
-
-        total = 0
-        for item in items_data:
-            product = item["product"]
-            price = item.get("price") or product.price
-            quantity = item["quantity"]
-            subtotal = price * quantity
-
-            SaleItem.objects.create(
-                sale=sale,
-                product=product,
-                quantity=quantity,
-                price=price,
-                subtotal=subtotal,
-            )
-
-            # Deduct inventory
-            product.inventory_quantity -= quantity
-            product.save()
-
-            total += subtotal
-
-        sale.total_amount = total
-        sale.save()
-        return sale
+        return SaleManager.create_sale(items_data, **validated_data)
 
 
 class ReturnSerializer(Serializer):
@@ -78,7 +56,8 @@ class ReturnSerializer(Serializer):
 
     def create(self, validated_data):
         item = SaleItem.objects.get(id=validated_data["sale_item_id"])
-        item.product.inventory_quantity += validated_data["quantity"]
-        item.product.save()
+        InventoryManager.adjust_product_stock(
+            item.product_id, validated_data["quantity"]
+        )
         # optional: create Return model entry
         return validated_data
@@ -1,41 +1,47 @@
+import logging
+from collections import Counter
+
+from django.db import transaction
 from django.db.models.signals import post_save, post_delete
-from django.dispatch import receiver
-from .models import SaleItem, Sale, Purchase, Expense
+from django.dispatch import receiver, Signal
+from business.models import PaymentMethod
+from products.managers.inventory_manager import InventoryManager
+from tenants.schemas import current_schema
+from .managers.account_manager import ChartOfAccountsManager
+from .models import Account, SaleItem, Sale, Purchase, Expense
+from .tasks import render_sale_invoice
+
+logger = logging.getLogger(__name__)
+
+# Sent by the batched sale writer, whose bulk_create skips post_save.
+# Receivers get ``sale`` and ``items`` (the created SaleItem instances).
+sale_items_bulk_created = Signal()
 
 
 @receiver(post_save, sender=SaleItem)
 def update_product_stock_on_save(sender, instance, created, **kwargs):
     """
-    Decrement product stock when a SaleItem is created.
-    If updated, adjust stock accordingly.
+    Adjust product stock when an existing SaleItem's quantity or product
+    changes. New items take their stock out in SaleItem.save.
     """
-    product = instance.product
-    if not product:
+    if created or not getattr(instance, "_loaded_values", None):
         return
 
-    if created:
-        product.stock -= instance.quantity
-    else:
-        # When updating, calculate difference
-        old_instance = sender.objects.get(pk=instance.pk)
-        difference = instance.quantity - old_instance.quantity
-        product.stock -= difference
-
-    product.stock = max(product.stock, 0)  # prevent negative stock
-    product.save()
+    deltas = Counter()
+    deltas[instance.loaded_value("product_id")] += instance.loaded_value("quantity")
+    deltas[instance.product_id] -= instance.quantity
+    InventoryManager.adjust_stock(deltas, clamp=True)  # prevent negative stock
 
 
 @receiver(post_delete, sender=SaleItem)
 def restore_product_stock_on_delete(sender, instance, **kwargs):
     """
-    Restore product stock if a SaleItem is deleted.
+    Restore product stock if a SaleItem is deleted, floored at zero like the
+    sale and edit paths.
     """
-    product = instance.product
-    if not product:
-        return
-
-    product.stock += instance.quantity
-    product.save()
+    InventoryManager.adjust_product_stock(
+        instance.product_id, instance.quantity, clamp=True
+    )
 
 
 @receiver(post_save, sender=Sale)
@@ -45,9 +51,22 @@ def create_sale_journal_entry(sender, instance, created, **kwargs):
 
 
 @receiver(post_save, sender=Sale)
-def create_sale_entry(sender, instance, created, **kwargs):
-    if created:
-        instance.create_journal_entry()
+def prerender_sale_invoice(sender, instance, created, **kwargs):
+    """
+    Render the invoice PDF in the background once the sale is committed.
+    Best effort: without a broker the first download renders it instead.
+    """
+    if not created:
+        return
+    sale_id, schema_name = instance.id, current_schema()
+
+    def queue_render():
+        try:
+            render_sale_invoice.delay(sale_id, schema_name)
+        except Exception:
+            logger.exception("Could not queue the invoice render for sale %s.", sale_id)
+
+    transaction.on_commit(queue_render)
 
 
 @receiver(post_save, sender=Purchase)
@@ -60,3 +79,11 @@ def create_purchase_entry(sender, instance, created, **kwargs):
 def create_expense_entry(sender, instance, created, **kwargs):
     if created:
         instance.create_journal_entry()
+
+
+@receiver(post_save, sender=Account)
+@receiver(post_delete, sender=Account)
+@receiver(post_save, sender=PaymentMethod)
+@receiver(post_delete, sender=PaymentMethod)
+def invalidate_chart_of_accounts(sender, instance, **kwargs):
+    ChartOfAccountsManager.invalidate(instance.business_id)
@@ -0,0 +1,32 @@
+from celery import shared_task
+
+from tenants.schemas import schema_businesses, tenant_schema, tenant_schemas
+from .managers.balance_manager import AccountBalanceManager
+from .managers.invoice_pdf_manager import InvoicePDFManager
+from .models import Sale
+
+
+@shared_task
+def close_account_balances():
+    """Snapshot account balances for every month that ended since the last run."""
+    closed = 0
+    for schema_name in tenant_schemas():
+        with tenant_schema(schema_name):
+            business_ids = schema_businesses(schema_name).values_list("id", flat=True)
+            for business_id in business_ids:
+                closed += AccountBalanceManager.close_months(business_id)
+    return closed
+
+
+@shared_task
+def render_sale_invoice(sale_id, schema_name=None):
+    """Store the invoice PDF so the first download does not wait for it."""
+    with tenant_schema(schema_name):
+        sale = (
+            Sale.objects.filter(id=sale_id)
+            .select_related("customer")
+            .prefetch_related("items__product")
+            .first()
+        )
+        if sale:
+            InvoicePDFManager.pdf(sale)
@@ -0,0 +1,28 @@
+"""Fixtures shared by the test suites that post sales journals."""
+
+from typing import Dict, Iterable, Optional
+
+from sales.models import Account
+
+# Account code -> type for every account the journal posts to
+CHART_OF_ACCOUNTS = {
+    "1001": "asset",
+    "1002": "asset",
+    "1003": "asset",
+    "1201": "asset",
+    "2001": "liability",
+    "4001": "income",
+    "5002": "expense",
+}
+
+
+def create_accounts(
+    business, codes: Optional[Iterable[str]] = None
+) -> Dict[str, Account]:
+    """Create ``codes`` (by default the whole chart) for ``business``."""
+    return {
+        code: Account.objects.create(
+            business=business, name=code, code=code, type=CHART_OF_ACCOUNTS[code]
+        )
+        for code in codes or CHART_OF_ACCOUNTS
+    }
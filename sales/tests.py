@@ -1,3 +1,653 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from importlib import import_module
+from unittest import mock, skipUnless
+from zoneinfo import ZoneInfo
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from accounts.models import User
+from business.models import Business, PaymentMethod, UserBusiness
+from common.dates import date_range_filter
+from customers.models import Customer
+from products.models import Product
+
+from .managers.account_manager import ChartOfAccountsManager
+from .managers.balance_manager import AccountBalanceManager
+from .managers.invoice_pdf_manager import InvoicePDFManager
+from .managers.journal_manager import JournalManager
+from .managers.sale_manager import SaleManager
+from .tasks import render_sale_invoice
+from .testing import create_accounts
+from .views import SaleViewSet
+from .models import (
+    Account,
+    AccountBalance,
+    AccountBalanceSnapshot,
+    JournalEntry,
+    LedgerEntry,
+    Purchase,
+    Sale,
+    SaleItem,
+    StockMovement,
+)
+
+
+@skipUnless(connection.vendor == "postgresql", "EXPLAIN output is PostgreSQL's")
+class SaleDateRangeIndexTests(TestCase):
+    """
+    The report filters must be answerable from the composite indexes. Test
+    tables are tiny, so sequential scans are disabled to make the planner
+    show whether an index *can* serve the query.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = Business.objects.create(name="Indexed Co")
+        cls.product = Product.objects.create(
+            business=cls.business, name="Widget", sku="W-1", price=10, stock=0
+        )
+
+    def explain(self, queryset):
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        return queryset.explain()
+
+    def test_sale_date_range_uses_business_date_index(self):
+        sales = Sale.objects.filter(
+            business=self.business,
+            **date_range_filter(
+                "sale_date", date(2025, 1, 1), date(2025, 1, 31), ZoneInfo("UTC")
+            ),
+        )
+        self.assertIn("sale_business_date_idx", self.explain(sales))
+
+    def test_sale_item_lookup_uses_sale_product_index(self):
+        items = SaleItem.objects.filter(sale_id=1, product=self.product)
+        plan = self.explain(items)
+        self.assertIn("saleitem_sale_product_idx", plan)
+        self.assertNotIn("Seq Scan", plan)
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class TenantScopingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = Business.objects.create(name="Tenant Co")
+        cls.other = Business.objects.create(name="Other Co")
+        create_accounts(cls.business, ["1001", "4001"])
+        cls.product = Product.objects.create(
+            business=cls.business, name="Widget", sku="W-1", price=10, stock=5
+        )
+
+    def test_guest_sale_rows_carry_the_business(self):
+        sale = SaleManager.create_sale(
+            [{"product": self.product, "quantity": 2}],
+            business=self.business,
+            payment_method="cash",
+        )
+
+        self.assertEqual(list(Sale.objects.for_business(self.business)), [sale])
+        self.assertEqual(
+            SaleItem.objects.for_business(self.business).get().sale_id, sale.id
+        )
+        self.assertTrue(LedgerEntry.objects.for_business(self.business).exists())
+        for model in (Sale, SaleItem, LedgerEntry):
+            self.assertFalse(model.objects.for_business(self.other).exists())
+
+    def test_sales_are_created_in_the_users_business(self):
+        user = User.objects.create(username="clerk", email="clerk@x.io", is_staff=True)
+        UserBusiness.objects.create(user=user, business=self.business, role="ADMIN")
+        request = APIRequestFactory().post(
+            "/",
+            {
+                "business": self.other.id,
+                "payment_method": "cash",
+                "items": [
+                    {
+                        "product": self.product.id,
+                        "quantity": 1,
+                        "price": 10,
+                        "subtotal": 10,
+                    }
+                ],
+            },
+            format="json",
+        )
+        force_authenticate(request, user)
+        response = SaleViewSet.as_view({"post": "create"})(request)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["business"], self.business.id)
+        self.assertFalse(Sale.objects.for_business(self.other).exists())
+
+    def test_no_business_means_no_rows(self):
+        SaleManager.create_sale(
+            [{"product": self.product, "quantity": 1}],
+            business=self.business,
+            payment_method="cash",
+        )
+        self.assertFalse(Sale.objects.for_business(None).exists())
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class SaleWriterTests(TestCase):
+    """The batched writer must leave the rows saving item by item leaves."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = Business.objects.create(name="Writer Co")
+        create_accounts(cls.business, ["1001", "4001"])
+
+    def setUp(self):
+        cache.clear()
+        ChartOfAccountsManager.reset()
+
+    def basket(self, prefix):
+        # stocked, oversold (clamped at zero) and a service
+        products = [
+            Product.objects.create(
+                business=self.business,
+                name=f"{prefix} {i}",
+                sku=f"{prefix}-{i}",
+                price=price,
+                stock=stock,
+                cost_price=Decimal("4.00"),
+                is_service=is_service,
+            )
+            for i, (price, stock, is_service) in enumerate(
+                [(10, 10, False), (Decimal("2.50"), 1, False), (30, 0, True)]
+            )
+        ]
+        return [
+            {"product": product, "quantity": quantity}
+            for product, quantity in zip(products, (3, 4, 1))
+        ]
+
+    def rows(self, sale, basket):
+        index = {item["product"].id: i for i, item in enumerate(basket)}
+        items = sorted(
+            (
+                index[item.product_id],
+                item.quantity,
+                item.price,
+                item.subtotal,
+                item.cost_price,
+                item.business_id,
+            )
+            for item in sale.items.all()
+        )
+        movements = sorted(
+            (index[movement.product_id], movement.movement_type, movement.quantity)
+            for movement in StockMovement.objects.filter(reference=f"Sale:{sale.id}")
+        )
+        stock = [Product.objects.get(pk=item["product"].pk).stock for item in basket]
+        ledger = sorted(
+            LedgerEntry.objects.filter(
+                journal_entry__reference=f"sale_{sale.id}"
+            ).values_list("account__code", "debit", "credit")
+        )
+        return items, movements, stock, ledger, sale.total_amount
+
+    def test_batched_writer_matches_saving_each_item(self):
+        per_item_basket = self.basket("A")
+        total = sum(
+            item["product"].price * item["quantity"] for item in per_item_basket
+        )
+        with transaction.atomic():
+            per_item = Sale.objects.create(
+                business=self.business, total_amount=total, payment_method="cash"
+            )
+            for item in per_item_basket:
+                SaleItem(
+                    sale=per_item,
+                    product=item["product"],
+                    quantity=item["quantity"],
+                    price=item["product"].price,
+                ).save()
+
+        batched_basket = self.basket("B")
+        batched = SaleManager.create_sale(
+            batched_basket, business=self.business, payment_method="cash"
+        )
+
+        expected = self.rows(per_item, per_item_basket)
+        self.assertEqual(self.rows(batched, batched_basket), expected)
+        # Stock is taken out once, and never below zero
+        self.assertEqual(expected[2], [7, 0, 0])
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class ChartOfAccountsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = Business.objects.create(name="Ledger Co")
+        cls.accounts = create_accounts(cls.business, ["1001", "1002", "1003", "4001"])
+
+    def setUp(self):
+        cache.clear()
+        ChartOfAccountsManager.reset()
+
+    def test_map_is_loaded_once(self):
+        with self.assertNumQueries(2):
+            ChartOfAccountsManager.account_id(self.business.id, "4001")
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                ChartOfAccountsManager.payment_account_id(self.business.id, "card"),
+                self.accounts["1002"].id,
+            )
+
+        # Another process only finds the map in the shared cache
+        ChartOfAccountsManager.reset()
+        with self.assertNumQueries(0):
+            ChartOfAccountsManager.account_id(self.business.id, "4001")
+
+    def test_account_changes_reload_the_map(self):
+        ChartOfAccountsManager.account_id(self.business.id, "4001")
+        with self.assertRaises(ValueError):
+            ChartOfAccountsManager.account_id(self.business.id, "5002")
+
+        expenses = Account.objects.create(
+            business=self.business, name="Expenses", code="5002", type="expense"
+        )
+        self.assertEqual(
+            ChartOfAccountsManager.account_id(self.business.id, "5002"), expenses.id
+        )
+
+    def test_payment_method_account_is_configurable(self):
+        self.assertEqual(
+            ChartOfAccountsManager.payment_account_id(self.business.id, "cash"),
+            self.accounts["1001"].id,
+        )
+        PaymentMethod.objects.create(
+            business=self.business, method_name="Cash", account_code="1003"
+        )
+        self.assertEqual(
+            ChartOfAccountsManager.payment_account_id(self.business.id, "cash"),
+            self.accounts["1003"].id,
+        )
+
+    def test_posting_a_sale_needs_no_account_lookups(self):
+        product = Product.objects.create(
+            business=self.business, name="Widget", sku="W-1", price=10, stock=5
+        )
+        items = [{"product": product, "quantity": 1}]
+        SaleManager.create_sale(items, business=self.business, payment_method="cash")
+
+        with CaptureQueriesContext(connection) as queries:
+            sale = SaleManager.create_sale(
+                items, business=self.business, payment_method="cash"
+            )
+        self.assertFalse(
+            [query for query in queries if '"sales_account"' in query["sql"]]
+        )
+        self.assertEqual(
+            set(
+                LedgerEntry.objects.filter(
+                    journal_entry__reference=f"sale_{sale.id}"
+                ).values_list("account__code", flat=True)
+            ),
+            {"1001", "4001"},
+        )
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class JournalPostingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = Business.objects.create(name="Journal Co")
+        create_accounts(cls.business, ["1001", "1201", "2001", "4001"])
+        cls.product = Product.objects.create(
+            business=cls.business, name="Widget", sku="W-1", price=10, stock=5
+        )
+
+    def setUp(self):
+        cache.clear()
+        ChartOfAccountsManager.reset()
+
+    def test_sale_is_posted_once_and_balances(self):
+        sale = SaleManager.create_sale(
+            [{"product": self.product, "quantity": 2}],
+            business=self.business,
+            payment_method="cash",
+        )
+        journal = JournalEntry.objects.get(reference=f"sale_{sale.id}")
+        lines = journal.entries.values_list("account__code", "debit", "credit")
+        self.assertCountEqual(
+            lines, [("1001", Decimal("20"), Decimal("0")), ("4001", 0, Decimal("20"))]
+        )
+
+        # Replays are no-ops
+        self.assertEqual(JournalManager.post_documents([sale]), [])
+        self.assertEqual(sale.create_journal_entry(), [])
+        self.assertEqual(JournalEntry.objects.count(), 1)
+        self.assertEqual(LedgerEntry.objects.count(), 2)
+
+    def test_batch_is_written_with_two_inserts(self):
+        # bulk_create skips the post_save posting
+        purchases = Purchase.objects.bulk_create(
+            [
+                Purchase(
+                    business=self.business, total_amount=amount, payment_method=method
+                )
+                for amount, method in [(5, "cash"), (7, "credit"), (9, "cash")]
+            ]
+        )
+        ChartOfAccountsManager.chart(self.business.id)
+
+        # posted references, journal insert, ledger insert and the running
+        # balance upsert (insert + update), plus two savepoints
+        with self.assertNumQueries(9):
+            journals = JournalManager.post_documents(purchases)
+        self.assertEqual(len(journals), 3)
+        self.assertEqual(LedgerEntry.objects.for_business(self.business).count(), 6)
+        self.assertEqual(JournalManager.post_documents(purchases), [])
+
+    def test_unbalanced_posting_is_rejected(self):
+        account = Account.objects.get(business=self.business, code="1001")
+        with self.assertRaises(ValueError):
+            JournalManager.post(
+                [
+                    {
+                        "business_id": self.business.id,
+                        "reference": "manual_1",
+                        "description": "",
+                        "lines": [(account.id, 10, 0), (account.id, 0, 9)],
+                    }
+                ]
+            )
+        self.assertFalse(JournalEntry.objects.exists())
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    TIME_ZONE="UTC",
+)
+class AccountBalanceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = Business.objects.create(name="Balanced Co")
+        create_accounts(cls.business, ["1001", "1201", "2001", "4001"])
+        cls.product = Product.objects.create(
+            business=cls.business, name="Widget", sku="W-1", price=10, stock=100
+        )
+
+    def setUp(self):
+        cache.clear()
+        ChartOfAccountsManager.reset()
+
+    def sell(self, quantity, posted_on=None):
+        sale = SaleManager.create_sale(
+            [{"product": self.product, "quantity": quantity}],
+            business=self.business,
+            payment_method="cash",
+        )
+        if posted_on:
+            JournalEntry.objects.filter(reference=f"sale_{sale.id}").update(
+                date=datetime(*posted_on, tzinfo=dt_timezone.utc)
+            )
+        return sale
+
+    def raw_totals(self, until):
+        rows = (
+            LedgerEntry.objects.filter(journal_entry__date__lt=until)
+            .values("account_id")
+            .annotate(debit=Sum("debit"), credit=Sum("credit"))
+        )
+        return {row["account_id"]: (row["debit"], row["credit"]) for row in rows}
+
+    def test_posting_keeps_running_balances(self):
+        self.sell(2)
+        Purchase.objects.create(
+            business=self.business, total_amount=7, payment_method="credit"
+        )
+
+        with self.assertNumQueries(2):
+            report = AccountBalanceManager.trial_balance(self.business.id)
+        self.assertEqual(
+            [(row["code"], row["debit"], row["credit"]) for row in report["accounts"]],
+            [("1001", 20, 0), ("1201", 7, 0), ("2001", 0, 7), ("4001", 0, 20)],
+        )
+        self.assertEqual(report["total_debit"], report["total_credit"])
+        self.assertEqual(AccountBalanceManager.verify(self.business.id), [])
+
+    def test_migration_backfills_balances_from_the_ledger(self):
+        from django.apps import apps
+
+        migration = import_module("sales.migrations.0011_backfill_account_balances")
+        self.sell(2)
+        self.sell(3)
+        AccountBalance.objects.all().delete()
+
+        migration.backfill_account_balances(apps, None)
+        self.assertEqual(AccountBalanceManager.verify(self.business.id), [])
+        migration.remove_account_balances(apps, None)
+        self.assertFalse(AccountBalance.objects.exists())
+
+    def test_snapshot_plus_delta_matches_the_ledger(self):
+        self.sell(1, posted_on=(2024, 1, 15))
+        self.sell(2, posted_on=(2024, 2, 10))
+        self.sell(3, posted_on=(2024, 2, 25))
+        self.sell(4, posted_on=(2024, 3, 5))
+        # Journal dates were moved after posting
+        AccountBalanceManager.rebuild(business_id=self.business.id)
+        self.assertTrue(
+            AccountBalanceSnapshot.objects.filter(period=date(2024, 2, 1)).exists()
+        )
+
+        until = datetime(2024, 2, 20, tzinfo=dt_timezone.utc)
+        # January's snapshot plus February's rows up to the 20th
+        with self.assertNumQueries(2):
+            balances = AccountBalanceManager.balances(self.business.id, until)
+        self.assertEqual(balances, self.raw_totals(until))
+
+        pnl = AccountBalanceManager.profit_and_loss(
+            self.business.id, date(2024, 2, 1), date(2024, 2, 29)
+        )
+        self.assertEqual(pnl["total_income"], Decimal("50"))
+        self.assertEqual(pnl["net_profit"], Decimal("50"))
+
+        sheet = AccountBalanceManager.balance_sheet(self.business.id, date(2024, 2, 29))
+        self.assertEqual(sheet["total_assets"], Decimal("60"))
+        self.assertEqual(sheet["current_earnings"], Decimal("60"))
+        self.assertEqual(sheet["total_assets"], sheet["total_liabilities_and_equity"])
+
+    def test_monthly_close_continues_from_the_last_snapshot(self):
+        self.sell(1, posted_on=(2024, 1, 15))
+        self.sell(2, posted_on=(2024, 2, 10))
+        AccountBalanceManager.rebuild(business_id=self.business.id)
+        AccountBalanceSnapshot.objects.filter(period__gte=date(2024, 2, 1)).delete()
+
+        self.assertGreater(AccountBalanceManager.close_months(self.business.id), 0)
+        self.assertEqual(AccountBalanceManager.close_months(self.business.id), 0)
+        self.assertEqual(AccountBalanceManager.verify(self.business.id), [])
+
+    def test_verify_reports_drift_until_rebuilt(self):
+        self.sell(1, posted_on=(2024, 1, 15))
+        AccountBalanceManager.rebuild(business_id=self.business.id)
+        AccountBalance.objects.filter(account__code="1001").update(debit_total=99)
+        AccountBalanceSnapshot.objects.filter(
+            account__code="4001", period=date(2024, 1, 1)
+        ).update(credit_total=1)
+
+        self.assertEqual(len(AccountBalanceManager.verify(self.business.id)), 2)
+        AccountBalanceManager.rebuild(business_id=self.business.id)
+        self.assertEqual(AccountBalanceManager.verify(self.business.id), [])
+
+
+@override_settings(
+    INVOICE_PDF_WORKERS=2,
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    LIVE_UPDATES_BROKER="memory",
+)
+class InvoicePDFTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = Business.objects.create(name="Printing Co")
+        create_accounts(cls.business, ["1001", "4001"])
+        cls.user = User.objects.create(
+            username="cashier", email="cashier@x.io", is_staff=True
+        )
+        UserBusiness.objects.create(user=cls.user, business=cls.business, role="ADMIN")
+        product = Product.objects.create(
+            business=cls.business, name="Widget", sku="W-1", price=10, stock=50
+        )
+        cls.sales = [
+            SaleManager.create_sale(
+                [{"product": product, "quantity": quantity}],
+                business=cls.business,
+                payment_method="cash",
+            )
+            for quantity in (1, 2, 3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        ChartOfAccountsManager.reset()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        media = self.settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        patcher = mock.patch(
+            "sales.managers.invoice_pdf_manager.render_pdf",
+            side_effect=lambda html: b"%PDF " + html.encode(),
+        )
+        self.render_pdf = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get(self, action, headers=None, **params):
+        request = APIRequestFactory().get("/", params, headers=headers)
+        force_authenticate(request, self.user)
+        view = SaleViewSet.as_view({"get": action})
+        if action == "invoice":
+            return view(request, pk=self.sales[0].pk)
+        return view(request)
+
+    def test_invoice_is_rendered_once_and_revalidated_by_etag(self):
+        first = self.get("invoice")
+        self.assertEqual(first.status_code, 200)
+        self.assertTrue(first.content.startswith(b"%PDF"))
+
+        again = self.get("invoice")
+        self.assertEqual(again.content, first.content)
+        self.assertEqual(self.render_pdf.call_count, 1)
+
+        not_modified = self.get("invoice", headers={"If-None-Match": first["ETag"]})
+        self.assertEqual(not_modified.status_code, 304)
+
+        # Changing the sale gives it a new version
+        sale = self.sales[0]
+        sale.payment_method = "card"
+        sale.save()
+        changed = self.get("invoice", headers={"If-None-Match": first["ETag"]})
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed["ETag"], first["ETag"])
+        self.assertEqual(self.render_pdf.call_count, 2)
+
+    def test_etag_follows_everything_the_invoice_shows(self):
+        customer = Customer.objects.create(business=self.business, name="Ada")
+        products = [
+            Product.objects.create(
+                business=self.business, name=f"Part {i}", sku=f"PT-{i}", stock=5
+            )
+            for i in range(2)
+        ]
+        sale = SaleManager.create_sale(
+            [{"product": product, "quantity": 1} for product in products],
+            business=self.business,
+            customer=customer,
+            payment_method="cash",
+        )
+
+        def etag():
+            return InvoicePDFManager.etag(
+                Sale.objects.select_related("customer")
+                .prefetch_related("items__product")
+                .get(pk=sale.pk)
+            )
+
+        later = timezone.now() + timedelta(hours=1)
+        seen = [etag()]
+        Customer.objects.filter(pk=customer.pk).update(name="Ada L.", updated_on=later)
+        seen.append(etag())
+        later += timedelta(hours=1)
+        Product.objects.filter(pk=products[0].pk).update(
+            name="Renamed", updated_on=later
+        )
+        seen.append(etag())
+        # Deleting an item that is not the newest leaves the timestamp as is
+        SaleItem.objects.filter(sale=sale, product=products[1]).delete()
+        seen.append(etag())
+
+        self.assertEqual(len(set(seen)), 4)
+
+    def test_invoices_render_after_their_product_is_deleted(self):
+        before = self.get("invoice")
+        # Product.delete only deactivates; a queryset delete nulls the lines
+        Product.objects.filter(pk=self.sales[0].items.get().product_id).delete()
+
+        response = self.get("invoice", headers={"If-None-Match": before["ETag"]})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], before["ETag"])
+
+        with mock.patch(
+            "sales.managers.invoice_pdf_manager.ProcessPoolExecutor",
+            ThreadPoolExecutor,
+        ):
+            response = self.get("invoices", ids=",".join(str(s.id) for s in self.sales))
+        self.assertEqual(response.status_code, 200)
+        render_sale_invoice(self.sales[1].id)
+
+    def test_batch_renders_missing_invoices_into_a_zip(self):
+        self.get("invoice")
+
+        # Mocks cannot cross into worker processes
+        with mock.patch(
+            "sales.managers.invoice_pdf_manager.ProcessPoolExecutor",
+            ThreadPoolExecutor,
+        ):
+            response = self.get("invoices", ids=",".join(str(s.id) for s in self.sales))
+
+        self.assertEqual(response.status_code, 200)
+        with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+            self.assertEqual(
+                archive.namelist(), [f"invoice_{sale.id}.pdf" for sale in self.sales]
+            )
+        self.assertEqual(self.render_pdf.call_count, 3)
+
+        self.assertEqual(self.get("invoices").status_code, 400)
+
+    def test_sales_are_saved_when_the_prerender_cannot_be_queued(self):
+        with mock.patch(
+            "sales.signals.render_sale_invoice.delay", side_effect=OSError
+        ) as delay, self.assertLogs("sales.signals", "ERROR"):
+            with self.captureOnCommitCallbacks(execute=True):
+                sale = SaleManager.create_sale(
+                    [{"product": self.sales[0].items.get().product, "quantity": 1}],
+                    business=self.business,
+                    payment_method="cash",
+                )
+
+        delay.assert_called_once()
+        self.assertTrue(Sale.objects.filter(pk=sale.pk).exists())
@@ -1,11 +1,23 @@
-from django.template.loader import render_to_string
+import io
+import zipfile
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
 from django.http import HttpResponse
-from weasyprint import HTML
-from rest_framework import viewsets
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.dateparse import parse_date
+from django.utils.http import http_date, quote_etag
+from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 
-from .models import Sale
+from common.dates import business_timezone, date_range_filter
+from common.errors import ERROR_DETAILS
+from common.exception import InsightHubException
+from .managers.invoice_pdf_manager import InvoicePDFManager
+from .models import Sale, SaleItem, SaleReturn
 from .serializers import SaleSerializer
 from .filters import SaleFilter
 from .permissions import IsStaffUser
@@ -21,6 +33,19 @@ class SaleViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated, IsStaffUser]
     filterset_class = SaleFilter
 
+    def get_queryset(self):
+        return self.queryset.for_business(self.request.user.business)
+
+    def perform_create(self, serializer):
+        business = self.request.user.business
+        if business is None:
+            raise InsightHubException(
+                code="business_not_found",
+                detail=ERROR_DETAILS["business_not_found"],
+                status_code=status.HTTP_403_FORBIDDEN,
+            )
+        serializer.save(business=business)
+
     @action(detail=True, methods=["post"])
     def return_item(self, request, pk=None):
         sale = self.get_object()
@@ -35,27 +60,93 @@ class SaleViewSet(viewsets.ModelViewSet):
         if quantity > item.quantity:
             return Response({"error": "Cannot return more than sold."}, status=400)
 
-        # Restore inventory
-        item.product.inventory_quantity += quantity
-        item.product.save()
+        with transaction.atomic():
+            # Saving the reduced quantity restores stock through
+            # InventoryManager (see sales.signals.update_product_stock_on_save)
+            item.quantity -= quantity
+            item.subtotal = item.price * item.quantity
+            item.save()
 
-        # Optionally adjust subtotal
-        item.quantity -= quantity
-        item.subtotal = item.price * item.quantity
-        item.save()
+            SaleReturn.objects.create(
+                sale_item=item,
+                quantity=quantity,
+                reason=request.data.get("reason"),
+                refunded_amount=item.price * quantity,
+            )
 
-        # Update sale total
-        sale.total_amount = sum(i.subtotal for i in sale.items.all())
-        sale.save()
+            # Update sale total
+            sale.total_amount = (
+                SaleItem.objects.filter(sale=sale).aggregate(total=Sum("subtotal"))[
+                    "total"
+                ]
+                or 0
+            )
+            sale.save()
 
         return Response({"status": "item returned"})
 
     @action(detail=True, methods=["get"])
     def invoice(self, request, pk=None):
         sale = self.get_object()
-        html_string = render_to_string("sales/invoice.html", {"sale": sale})
-        pdf_file = HTML(string=html_string).write_pdf()
+        etag = quote_etag(InvoicePDFManager.etag(sale))
+        last_modified = int(InvoicePDFManager.last_modified(sale).timestamp())
+
+        # A client re-requesting a PDF it already has gets a 304
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = HttpResponse(
+                InvoicePDFManager.pdf(sale), content_type="application/pdf"
+            )
+            response["Content-Disposition"] = (
+                f'inline; filename="invoice_{sale.id}.pdf"'
+            )
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    @action(detail=False, methods=["get"])
+    def invoices(self, request):
+        """
+        A zip of invoice PDFs for end-of-day printing: the sales in
+        ``?ids=1,2,3`` or every sale made on ``?date=YYYY-MM-DD``.
+        """
+        sales = self.filter_queryset(self.get_queryset())
+        ids, day = request.query_params.get("ids"), request.query_params.get("date")
+        if ids:
+            try:
+                sales = sales.filter(id__in=[int(id) for id in ids.split(",")])
+            except ValueError:
+                return Response({"error": "ids must be comma separated."}, status=400)
+        elif day and parse_date(day):
+            business = request.user.business
+            tz = business_timezone(business.id if business else None)
+            sales = sales.filter(
+                **date_range_filter("sale_date", parse_date(day), parse_date(day), tz)
+            )
+        else:
+            return Response({"error": "Pass ids or a date."}, status=400)
+
+        sales = list(sales.order_by("id")[: settings.INVOICE_PDF_BATCH_LIMIT + 1])
+        if len(sales) > settings.INVOICE_PDF_BATCH_LIMIT:
+            return Response(
+                {
+                    "error": f"At most {settings.INVOICE_PDF_BATCH_LIMIT} "
+                    "invoices per batch."
+                },
+                status=400,
+            )
+
+        archive = io.BytesIO()
+        # PDFs are compressed already
+        with zipfile.ZipFile(archive, "w", zipfile.ZIP_STORED) as zip_file:
+            for sale_id, pdf in InvoicePDFManager.pdfs(sales).items():
+                zip_file.writestr(f"invoice_{sale_id}.pdf", pdf)
 
-        response = HttpResponse(pdf_file, content_type="application/pdf")
-        response["Content-Disposition"] = f'inline; filename="invoice_{sale.id}.pdf"'
+        response = HttpResponse(archive.getvalue(), content_type="application/zip")
+        response["Content-Disposition"] = (
+            f'attachment; filename="invoices_{day or "batch"}.zip"'
+        )
         return response
@@ -0,0 +1,76 @@
+from statistics import median, quantiles
+from time import perf_counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django_tenants.utils import get_public_schema_name, schema_context
+
+from business.models import Business
+from dashboard.views import AnalyticsDashboardView, DashboardView
+from sales.models import Sale
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares dashboard build latency for one business between the shared "
+        "tables in the public schema and the business's own schema. Run it "
+        "after migrate_to_schemas, before the shared rows are dropped."
+    )
+
+    views = {"dashboard": DashboardView, "analytics": AnalyticsDashboardView}
+
+    def add_arguments(self, parser):
+        parser.add_argument("business", type=int, help="Business to benchmark")
+        parser.add_argument(
+            "--runs", type=int, default=20, help="Timed builds per view and layout"
+        )
+
+    def handle(self, *args, **options):
+        if not settings.SCHEMA_PER_TENANT:
+            raise CommandError("Set SCHEMA_PER_TENANT=True to use tenant schemas.")
+        if options["runs"] < 2:
+            raise CommandError("--runs must be at least 2.")
+
+        business = (
+            Business.objects.select_related("tenant")
+            .filter(pk=options["business"], tenant__isnull=False)
+            .first()
+        )
+        if business is None:
+            raise CommandError(
+                "Business not found or not moved yet; run migrate_to_schemas first."
+            )
+        if Sale._meta.db_table not in connection.introspection.table_names():
+            raise CommandError("The public schema has no shared tables to compare.")
+
+        layouts = {
+            "shared": get_public_schema_name(),
+            "schema": business.tenant.schema_name,
+        }
+        for name, view in self.views.items():
+            timings = {
+                layout: self.time_build(view, business, schema, options["runs"])
+                for layout, schema in layouts.items()
+            }
+            for layout, (p50, p95) in timings.items():
+                self.stdout.write(
+                    f"{name:<10} {layout:<7} p50 {p50:8.2f} ms   p95 {p95:8.2f} ms"
+                )
+            speedup = timings["shared"][0] / timings["schema"][0]
+            self.stdout.write(
+                f"{name:<10} schema layout is {speedup:.2f}x faster (p50)"
+            )
+
+        self.stdout.write(self.style.SUCCESS("✅ Benchmark finished."))
+
+    @staticmethod
+    def time_build(view, business, schema, runs):
+        with schema_context(schema):
+            view().build(business)  # warm up plans and caches
+            samples = []
+            for _ in range(runs):
+                started = perf_counter()
+                view().build(business)
+                samples.append((perf_counter() - started) * 1000)
+        return median(samples), quantiles(samples, n=20)[-1]
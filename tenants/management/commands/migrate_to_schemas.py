@@ -0,0 +1,66 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from business.models import Business
+from tenants.managers.tenant_manager import TenantSchemaManager
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves businesses from the shared tables into their own schemas: creates "
+        "and migrates each schema, then copies the business's rows into it. "
+        "The shared rows are left in place."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--business",
+            type=int,
+            action="append",
+            help="Only move this business (repeatable); all businesses otherwise",
+        )
+        parser.add_argument(
+            "--domain-suffix",
+            help="Route business-<id>.<suffix> to each new schema, e.g. "
+            "--domain-suffix insighthub.app",
+        )
+
+    def handle(self, *args, **options):
+        if not settings.SCHEMA_PER_TENANT:
+            raise CommandError("Set SCHEMA_PER_TENANT=True to use tenant schemas.")
+
+        businesses = Business.objects.filter(tenant__isnull=True).order_by("id")
+        if options["business"]:
+            businesses = businesses.filter(id__in=options["business"])
+
+        moved = 0
+        for business in businesses:
+            domain = (
+                f"business-{business.id}.{options['domain_suffix']}"
+                if options["domain_suffix"]
+                else None
+            )
+            tenant = TenantSchemaManager.create_for_business(business, domain)
+            try:
+                copied = TenantSchemaManager.copy_business_rows(tenant)
+            except Exception:
+                # Leave no half-filled schema behind so the move can be retried
+                tenant.delete(force_drop=True)
+                raise
+            moved += 1
+            skipped = [label for label, rows in copied.items() if rows is None]
+            self.stdout.write(
+                f"{business} -> {tenant.schema_name}: "
+                f"{sum(rows or 0 for rows in copied.values())} rows in "
+                f"{len(copied) - len(skipped)} tables"
+            )
+            if skipped:
+                self.stdout.write(
+                    self.style.WARNING(
+                        f"Not owned by a business, not copied: {', '.join(skipped)}"
+                    )
+                )
+
+        self.stdout.write(
+            self.style.SUCCESS(f"✅ Moved {moved} businesses into their own schemas.")
+        )
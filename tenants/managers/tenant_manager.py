@@ -0,0 +1,126 @@
+from collections import deque
+from typing import Dict, List, Optional, Type
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Model
+from django_tenants.utils import get_public_schema_name, schema_context
+
+from accounts.managers.base_manager import BaseModelManager
+from business.models import Business
+from tenants.models import Domain, Tenant
+
+
+class TenantSchemaManager(BaseModelManager):
+    """
+    Moves businesses from the shared-table layout into their own schemas.
+
+    The shared tables in ``public`` are only read: rows stay there until the
+    operator drops them, so switching SCHEMA_PER_TENANT off again is a
+    rollback.
+    """
+
+    model = Tenant
+
+    @staticmethod
+    def schema_name(business_id: int) -> str:
+        return f"business_{business_id}"
+
+    @staticmethod
+    def tenant_models() -> List[Type[Model]]:
+        """Concrete models whose tables get a copy in every tenant schema."""
+        labels = {
+            app.rsplit(".", 1)[-1]
+            for app in settings.TENANT_APPS
+            if app not in settings.SHARED_APPS
+        }
+        return [
+            model
+            for model in apps.get_models()
+            if model._meta.app_label in labels
+            and model._meta.managed
+            and not model._meta.proxy
+        ]
+
+    @staticmethod
+    def business_path(model: Type[Model]) -> Optional[str]:
+        """
+        Shortest lookup from ``model`` to its owning Business through forward
+        foreign keys, e.g. ``"sale_item__business"`` for SaleReturn. None for
+        models not owned by a business.
+        """
+        queue = deque([(model, "")])
+        seen = {model}
+        while queue:
+            current, path = queue.popleft()
+            for field in current._meta.concrete_fields:
+                if not field.many_to_one and not field.one_to_one:
+                    continue
+                lookup = f"{path}__{field.name}" if path else field.name
+                target = field.related_model
+                if target is Business:
+                    return lookup
+                if target not in seen:
+                    seen.add(target)
+                    queue.append((target, lookup))
+        return None
+
+    @classmethod
+    def create_for_business(
+        cls, business: Business, domain: Optional[str] = None
+    ) -> Tenant:
+        """Create and migrate the business's schema (and route ``domain`` to it)."""
+        tenant = Tenant(business=business, schema_name=cls.schema_name(business.id))
+        tenant.save(verbosity=0)
+        if domain:
+            Domain.objects.create(domain=domain, tenant=tenant, is_primary=True)
+        return tenant
+
+    @classmethod
+    def copy_business_rows(cls, tenant: Tenant) -> Dict[str, int]:
+        """
+        Copy the business's rows from the shared ``public`` tables into the
+        tenant schema, keeping primary keys, then move the schema's sequences
+        past them. Returns the number of rows copied per model; rows of models
+        not owned by a business are left behind and counted as None.
+        """
+        quote = connection.ops.quote_name
+        public = get_public_schema_name()
+        models = cls.tenant_models()
+        copied = {}
+
+        connection.set_schema_to_public()
+        # Foreign keys are deferred to commit, so tables can be filled in any order
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                for model in models:
+                    path = cls.business_path(model)
+                    if path is None:
+                        copied[model._meta.label] = None
+                        continue
+                    rows = model._base_manager.filter(**{path: tenant.business_id})
+                    pk_sql, params = rows.values("pk").query.sql_with_params()
+
+                    table = quote(model._meta.db_table)
+                    columns = ", ".join(
+                        quote(field.column)
+                        for field in model._meta.local_concrete_fields
+                    )
+                    cursor.execute(
+                        f"INSERT INTO {quote(tenant.schema_name)}.{table} ({columns}) "
+                        f"SELECT {columns} FROM {quote(public)}.{table} "
+                        f"WHERE {quote(model._meta.pk.column)} IN ({pk_sql})",
+                        params,
+                    )
+                    copied[model._meta.label] = cursor.rowcount
+
+            with schema_context(tenant.schema_name):
+                with connection.cursor() as cursor:
+                    for statement in connection.ops.sequence_reset_sql(
+                        no_style(), models
+                    ):
+                        cursor.execute(statement)
+
+        return copied
@@ -0,0 +1,23 @@
+from django.db.models import CASCADE, OneToOneField
+from django_tenants.models import DomainMixin, TenantMixin
+
+from business.models import Business
+from common.models import GenericModel
+
+
+class Tenant(TenantMixin, GenericModel):
+    """
+    The PostgreSQL schema holding one business's tables when the project runs
+    with SCHEMA_PER_TENANT. Saving a new tenant creates and migrates its schema.
+    """
+
+    business = OneToOneField(Business, on_delete=CASCADE, related_name="tenant")
+
+    auto_create_schema = True
+
+    def __str__(self):
+        return f"{self.business} ({self.schema_name})"
+
+
+class Domain(DomainMixin):
+    """Host name routed to a tenant's schema by TenantMainMiddleware."""
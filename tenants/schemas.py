@@ -0,0 +1,75 @@
+"""
+Schema handling for work done outside a request.
+
+With SCHEMA_PER_TENANT, TenantMainMiddleware puts a request's connection on
+its business's schema, but Celery workers start on ``public``. Code that
+queues a task passes ``current_schema()`` along and the task runs inside
+``tenant_schema(schema_name)``; periodic tasks visit every schema from
+``tenant_schemas()``. In the shared-table layout all of these are no-ops.
+"""
+
+from contextlib import contextmanager
+from typing import List, Optional
+
+from django.conf import settings
+from django.db import connection
+
+from business.models import Business
+
+
+def current_schema() -> Optional[str]:
+    """The schema the connection is on; None in the shared-table layout."""
+    if not settings.SCHEMA_PER_TENANT:
+        return None
+    return connection.schema_name
+
+
+@contextmanager
+def tenant_schema(schema_name: Optional[str]):
+    """Run the block in ``schema_name``, or where we are when it is None."""
+    if schema_name is None or not settings.SCHEMA_PER_TENANT:
+        yield
+        return
+
+    from django_tenants.utils import schema_context
+
+    with schema_context(schema_name):
+        yield
+
+
+def tenant_schemas() -> List[Optional[str]]:
+    """
+    Every schema holding business rows: ``public`` (businesses not moved
+    yet) followed by one per tenant. ``[None]`` in the shared-table layout.
+    """
+    if not settings.SCHEMA_PER_TENANT:
+        return [None]
+
+    from django_tenants.utils import get_public_schema_name, get_tenant_model
+
+    public = get_public_schema_name()
+    with tenant_schema(public):
+        schemas = list(
+            get_tenant_model()
+            .objects.exclude(schema_name=public)
+            .order_by("schema_name")
+            .values_list("schema_name", flat=True)
+        )
+    return [public, *schemas]
+
+
+def schema_businesses(schema_name: Optional[str]):
+    """
+    The businesses whose rows live in ``schema_name``: the tenant's own
+    business, the businesses without a tenant for ``public``, and all of
+    them in the shared-table layout.
+    """
+    businesses = Business.objects.all()
+    if schema_name is None or not settings.SCHEMA_PER_TENANT:
+        return businesses
+
+    from django_tenants.utils import get_public_schema_name
+
+    if schema_name == get_public_schema_name():
+        return businesses.filter(tenant__isnull=True)
+    return businesses.filter(tenant__schema_name=schema_name)
@@ -0,0 +1,130 @@
+from contextlib import contextmanager
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from accounts.models import User
+from business.models import Business, UserBusiness
+from dashboard.tasks import check_sales_milestones
+from products.managers.notification_manager import NotificationManager
+from products.models import Notification, Product
+from products.notifications import notification_queue
+from products.tasks import flush_notifications, reconcile_low_stock
+from sales.managers.sale_manager import SaleManager
+from sales.tasks import render_sale_invoice
+from sales.testing import create_accounts
+
+from .schemas import current_schema, schema_businesses, tenant_schema, tenant_schemas
+
+
+class SchemaRecorder:
+    """Stands in for django-tenants' schema_context, which needs PostgreSQL."""
+
+    def __init__(self):
+        self.entered = []
+
+    def __call__(self, schema_name):
+        @contextmanager
+        def context():
+            self.entered.append(schema_name)
+            yield
+
+        return context()
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class SharedLayoutTests(TestCase):
+    def test_schema_helpers_are_no_ops(self):
+        business = Business.objects.create(name="Shared Co")
+        recorder = SchemaRecorder()
+        with mock.patch("django_tenants.utils.schema_context", recorder):
+            with tenant_schema("business_1"):
+                pass
+
+        self.assertEqual(recorder.entered, [])
+        self.assertIsNone(current_schema())
+        self.assertEqual(tenant_schemas(), [None])
+        self.assertEqual(list(schema_businesses(None)), [business])
+
+
+@override_settings(
+    SCHEMA_PER_TENANT=True,
+    NOTIFICATION_QUEUE="memory",
+    LIVE_UPDATES_BROKER="memory",
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+)
+class TenantTaskTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = Business.objects.create(name="Tenant Co")
+        create_accounts(cls.business, ["1001", "4001"])
+        cls.user = User.objects.create(username="owner", email="owner@x.io")
+        UserBusiness.objects.create(user=cls.user, business=cls.business, role="ADMIN")
+        cls.product = Product.objects.create(
+            business=cls.business, name="Widget", sku="W-1", price=10, stock=100
+        )
+
+    def setUp(self):
+        cache.clear()
+        queue = notification_queue()
+        queue.pop(len(queue))
+        self.recorder = SchemaRecorder()
+        for patcher in (
+            mock.patch("django_tenants.utils.schema_context", self.recorder),
+            self.on_schema("public"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def on_schema(self, schema_name):
+        return mock.patch(
+            "tenants.schemas.connection", mock.Mock(schema_name=schema_name)
+        )
+
+    def test_sales_queue_their_invoice_with_their_schema(self):
+        with self.on_schema("business_1"), mock.patch(
+            "sales.signals.render_sale_invoice.delay"
+        ) as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                sale = SaleManager.create_sale(
+                    [{"product": self.product, "quantity": 1}],
+                    business=self.business,
+                    payment_method="cash",
+                )
+
+        delay.assert_called_once_with(sale.id, "business_1")
+
+    def test_queued_tasks_run_in_the_schema_they_were_queued_from(self):
+        with mock.patch("sales.tasks.InvoicePDFManager.pdf"):
+            render_sale_invoice(0, "business_1")
+        render_sale_invoice(0)
+
+        self.assertEqual(self.recorder.entered, ["business_1"])
+
+    def test_periodic_tasks_visit_every_schema(self):
+        schemas = ["public", "business_1"]
+        with mock.patch("dashboard.tasks.tenant_schemas", return_value=schemas):
+            check_sales_milestones()
+        with mock.patch("products.tasks.tenant_schemas", return_value=schemas):
+            reconcile_low_stock()
+
+        self.assertEqual(self.recorder.entered, schemas * 2)
+
+    def test_notifications_are_written_into_the_schema_they_were_queued_from(self):
+        event = {
+            "kind": Notification.Kind.LOW_STOCK,
+            "business_id": self.business.id,
+            "product_id": self.product.id,
+            "dedupe_key": f"low_stock:{self.product.id}",
+            "message": "Low stock alert",
+        }
+        with self.on_schema("business_1"):
+            NotificationManager.enqueue([event])
+        NotificationManager.enqueue([{**event, "dedupe_key": "other"}])
+
+        self.assertEqual(flush_notifications(), 2)
+        self.assertEqual(self.recorder.entered, ["business_1", "public"])
+        self.assertEqual(Notification.objects.filter(user=self.user).count(), 2)